@@ -0,0 +1,272 @@
+# scripts/bench_algorithms.py
+
+"""
+Micro-benchmark of every algorithm AlgorithmFactory can build.
+
+Each case runs ``select_server`` and ``release_server`` over a ServerPool of
+``size`` backends:
+
+- ``concurrency`` picks are kept in flight, each released once it becomes the
+  oldest pick, so connection-counting algorithms see realistic counts;
+- with ``flap`` > 0, that fraction of operations first flips a random
+  backend's health, bumping the pool version and forcing any cached schedule,
+  ring or index to be rebuilt.
+
+Only the select and release calls are timed. A second pass under tracemalloc
+records the peak memory allocated above the starting point, which catches
+per-pick copies of the server list, and the memory still held per operation
+afterwards, which catches leaks.
+
+    python -m scripts.bench_algorithms                   # print the matrix
+    python -m scripts.bench_algorithms --save-baseline   # store it as the baseline
+    python -m scripts.bench_algorithms --check           # exit 1 on regressions
+
+The test suite runs a reduced matrix through :func:`check_scaling`, which
+compares how the cost grows from the smallest to the largest pool against the
+baseline; that ratio depends far less on the machine than absolute timings.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from src.async_flow.algorithms.alg_strategy import AlgorithmFactory
+from src.async_flow.enums import AlgorithmType
+from src.async_flow.models.config import Server
+from src.async_flow.server_pool import ServerPool
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_algorithms_baseline.json")
+
+ALGORITHMS = tuple(algorithm.value for algorithm in AlgorithmType)
+SIZES = (10, 1000, 10000)
+CONCURRENCY = (1, 64)
+# A flip still re-syncs each algorithm's cached structures: WRR schedules, LC buckets and the
+# Maglev table, built inline for small pools and in the background for large ones. Flaps stay
+# rare so the per-pick cost is what gets measured, and the baseline keys stay comparable.
+FLAP_RATES = (0.0, 0.001)
+
+# Routing keys for the algorithms that hash one
+KEYS = tuple(f"client-{i}" for i in range(1024))
+
+# Allowed growth over the baseline before a case counts as a regression
+TIME_TOLERANCE = 2.0
+MEMORY_TOLERANCE = 2.0
+# Absolute slack so tiny baselines do not fail on noise
+MEMORY_SLACK_BYTES = 4096
+RATIO_SLACK = 1.0
+
+
+def case_name(algorithm: str, size: int, concurrency: int, flap: float) -> str:
+    return f"{algorithm}/n={size}/c={concurrency}/flap={flap:g}"
+
+
+class Workload:
+    """One algorithm over one pool, driven one select/release pair at a time."""
+
+    def __init__(self, algorithm_type: str, size: int, concurrency: int = 1, flap: float = 0.0, seed: int = 0):
+        self.servers = [Server(host="10.0.0.1", port=1024 + i, weight=1 + i % 4) for i in range(size)]
+        self.pool = ServerPool(self.servers)
+        self.algorithm = AlgorithmFactory().build(algorithm_type)
+        self.concurrency = concurrency
+        self.flap = flap
+
+        # Algorithms draw from the global generator; seed it for repeatable runs
+        random.seed(seed)
+        self._rng = random.Random(seed)
+        self._in_flight = deque()
+        self._index = 0
+
+    async def run(self, operations: int) -> int:
+        """Run ``operations`` picks and return the nanoseconds spent inside the algorithm."""
+        algorithm = self.algorithm
+        release = getattr(algorithm, "release_server", None)
+        uses_key = algorithm.uses_routing_key
+        in_flight = self._in_flight
+        clock = time.perf_counter_ns
+        elapsed = 0
+
+        for _ in range(operations):
+            if self.flap and self._rng.random() < self.flap:
+                await self._flap()
+
+            key = KEYS[self._index % len(KEYS)] if uses_key else None
+            self._index += 1
+            healthy = self.pool.get_healthy_servers()
+            started = clock()
+            in_flight.append(await algorithm.select_server(healthy, key))
+            elapsed += clock() - started
+
+            if len(in_flight) > self.concurrency:
+                server = in_flight.popleft()
+                if release is not None:
+                    started = clock()
+                    await release(server)
+                    elapsed += clock() - started
+        return elapsed
+
+    async def _flap(self):
+        server = self.servers[self._rng.randrange(len(self.servers))]
+        if not server.healthy:
+            await self.pool.mark_healthy(server)
+        elif len(self.pool.get_healthy_servers()) > 1:
+            # Keep at least one backend up
+            await self.pool.mark_unhealthy(server)
+
+
+async def _timed(algorithm: str, size: int, concurrency: int, flap: float, operations: int) -> int:
+    workload = Workload(algorithm, size, concurrency, flap)
+    # Warm up so structures cached on the pool version exist before timing
+    await workload.run(min(operations, 1000))
+    return await workload.run(operations)
+
+
+async def _memory(algorithm: str, size: int, concurrency: int, flap: float, operations: int):
+    workload = Workload(algorithm, size, concurrency, flap)
+    await workload.run(min(operations, 1000))
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        await workload.run(operations)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(current - start, 0), peak - start
+
+
+def measure(algorithm: str, size: int, concurrency: int = 1, flap: float = 0.0,
+            operations: int = 5000, repeat: int = 3) -> Dict[str, float]:
+    """Benchmark one case; the time is the best of ``repeat`` runs."""
+    best = min(asyncio.run(_timed(algorithm, size, concurrency, flap, operations)) for _ in range(repeat))
+    retained, peak = asyncio.run(_memory(algorithm, size, concurrency, flap, operations))
+    return {
+        "ns_per_op": best / operations,
+        "peak_bytes": peak,
+        "retained_bytes_per_op": retained / operations,
+    }
+
+
+def run_matrix(algorithms: Iterable[str] = ALGORITHMS, sizes: Iterable[int] = SIZES,
+               concurrency: Iterable[int] = CONCURRENCY, flap_rates: Iterable[float] = FLAP_RATES,
+               operations: int = 5000, repeat: int = 3) -> Iterator[Tuple[str, Dict[str, float]]]:
+    """Measure every combination, yielding ``(case name, result)`` as each one finishes."""
+    for algorithm in algorithms:
+        for size in sizes:
+            for in_flight in concurrency:
+                for flap in flap_rates:
+                    yield case_name(algorithm, size, in_flight, flap), measure(
+                        algorithm, size, in_flight, flap, operations, repeat
+                    )
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict:
+    """Read a baseline written by ``--save-baseline``: its results and the Python version it ran on."""
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def _memory_regressions(name: str, result: Dict[str, float], expected: Dict[str, float],
+                        tolerance: float) -> List[str]:
+    regressions = []
+    for field in ("peak_bytes", "retained_bytes_per_op"):
+        limit = expected[field] * tolerance + (MEMORY_SLACK_BYTES if field == "peak_bytes" else 1)
+        if result[field] > limit:
+            regressions.append(f"{name}: {field} {result[field]:.0f} > {limit:.0f}")
+    return regressions
+
+
+def check(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+          time_tolerance: float = TIME_TOLERANCE, memory_tolerance: float = MEMORY_TOLERANCE) -> List[str]:
+    """Compare absolute per-operation cost against the baseline; returns one message per regression."""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        limit = expected["ns_per_op"] * time_tolerance
+        if result["ns_per_op"] > limit:
+            regressions.append(f"{name}: {result['ns_per_op']:.0f} ns/op > {limit:.0f}")
+        regressions.extend(_memory_regressions(name, result, expected, memory_tolerance))
+    return regressions
+
+
+def check_scaling(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                  small: int, large: int, time_tolerance: float = TIME_TOLERANCE,
+                  memory_tolerance: float = MEMORY_TOLERANCE, memory: bool = True) -> List[str]:
+    """
+    Compare how the cost grows from ``small`` to ``large`` backends against the
+    baseline, so an algorithm turning O(n) per pick fails on any machine.
+    Memory does not depend on CPU speed and is compared as-is unless ``memory``
+    is False (allocation sizes differ between Python versions).
+    """
+    regressions = []
+    marker = f"/n={small}/"
+    for name, result in results.items():
+        if marker not in name:
+            continue
+        name_large = name.replace(marker, f"/n={large}/")
+        if name_large not in results or name not in baseline or name_large not in baseline:
+            continue
+        ratio = results[name_large]["ns_per_op"] / result["ns_per_op"]
+        expected = baseline[name_large]["ns_per_op"] / baseline[name]["ns_per_op"]
+        limit = expected * time_tolerance + RATIO_SLACK
+        if ratio > limit:
+            regressions.append(f"{name_large}: {ratio:.1f}x the cost at n={small}, limit {limit:.1f}x")
+    for name, result in results.items():
+        if memory and name in baseline:
+            regressions.extend(_memory_regressions(name, result, baseline[name], memory_tolerance))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the load balancing algorithms")
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=ALGORITHMS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES), help="Backend pool sizes")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=list(CONCURRENCY),
+                        help="Picks kept in flight before each release")
+    parser.add_argument("--flap", nargs="+", type=float, default=list(FLAP_RATES),
+                        help="Fraction of operations preceded by a health flip")
+    parser.add_argument("--operations", type=int, default=5000, help="Select/release pairs per run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the fastest is kept")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline file")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a case regressed against the baseline")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE,
+                        help="Allowed slowdown over the baseline")
+    args = parser.parse_args()
+
+    results = {}
+    for name, result in run_matrix(args.algorithms, args.sizes, args.concurrency, args.flap,
+                                   args.operations, args.repeat):
+        results[name] = result
+        print(f"{name:>48}: {result['ns_per_op']:9.0f} ns/op  "
+              f"peak {result['peak_bytes'] / 1024:8.1f} KiB  "
+              f"retained {result['retained_bytes_per_op']:6.1f} B/op")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline:
+            json.dump({
+                "python": sys.version.split()[0],
+                "operations": args.operations,
+                "results": results,
+            }, baseline, indent=2, sort_keys=True)
+            baseline.write("\n")
+        print(f"Baseline written to {args.baseline}")
+
+    if args.check:
+        regressions = check(results, load_baseline(args.baseline)["results"], time_tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
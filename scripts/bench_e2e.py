@@ -0,0 +1,340 @@
+# scripts/bench_e2e.py
+
+"""
+End-to-end benchmark of the load balancer.
+
+Starts ``--backends`` mock backends in a child process, runs the load
+balancer in another child process for every protocol and algorithm, and
+drives it with an async load generator:
+
+- closed loop: ``--concurrency`` clients each send the next request as soon
+  as the previous one completes;
+- open loop: requests start at a fixed ``--rate`` regardless of how fast
+  they complete. Latency is measured from the intended start time, so
+  queueing in front of a slow balancer is not hidden (no coordinated omission).
+
+Every run reports RPS, p50/p99/p999 latency, the balancer's CPU time and
+RSS, and RPS per core (requests per CPU second of the balancer, which does
+not depend on how much CPU the load generator leaves it). HTTP runs repeat
+for every engine in ``--http-engines``. ``--output`` saves all runs as JSON
+to diff across commits.
+
+    python -m scripts.bench_e2e --protocols http tcp --algorithms round_robin least_connections \\
+        --backends 4 --latency exp:2 --response-bytes 1024 --mode closed --concurrency 64 \\
+        --duration 10 --output bench.json
+
+    python -m scripts.bench_e2e --protocols http --algorithms round_robin --http-engines aiohttp passthrough \\
+        --latency const:0 --concurrency 32
+
+Latency distributions (milliseconds): ``const:5``, ``uniform:1:10``,
+``exp:5`` (exponential with mean 5) and ``lognormal:5:0.5`` (median 5, sigma 0.5).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+from scripts.bench_common import cpu_seconds, free_port, rss_bytes, wait_for_port
+from src.async_flow.core import LoadBalancer
+from src.async_flow.enums import AlgorithmType, HttpEngine, ProtocolType
+from src.async_flow.models.config import LoadBalancerConfig
+
+TCP_REQUEST = b"GET\n"
+
+
+def latency_sampler(spec: str) -> Callable[[], float]:
+    """Build a sampler returning backend latencies in seconds from a distribution spec."""
+    kind, *args = spec.split(":")
+    values = [float(arg) / 1000 for arg in args]
+    match kind:
+        case "const":
+            return lambda: values[0]
+        case "uniform":
+            return lambda: random.uniform(values[0], values[1])
+        case "exp":
+            return lambda: random.expovariate(1 / values[0]) if values[0] else 0.0
+        case "lognormal":
+            # sigma is unitless
+            return lambda: random.lognormvariate(math.log(values[0]), float(args[1]))
+        case _:
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+# ---------------------------------------------------------------------------
+# Mock backends
+
+
+async def _serve_backends(protocol: str, ports: List[int], latency: str, response_bytes: int):
+    sample = latency_sampler(latency)
+    body = b"x" * response_bytes
+
+    if protocol == ProtocolType.HTTP.value:
+        async def handle(request: web.Request) -> web.Response:
+            delay = sample()
+            if delay:
+                await asyncio.sleep(delay)
+            return web.Response(body=body)
+
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        for port in ports:
+            await web.TCPSite(runner, "127.0.0.1", port, backlog=4096).start()
+    else:
+        async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                await reader.readline()
+                delay = sample()
+                if delay:
+                    await asyncio.sleep(delay)
+                writer.write(body)
+                await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        for port in ports:
+            await asyncio.start_server(handle_connection, "127.0.0.1", port, backlog=4096)
+
+    await asyncio.Future()
+
+
+def _run_backends(protocol: str, ports: List[int], latency: str, response_bytes: int):
+    asyncio.run(_serve_backends(protocol, ports, latency, response_bytes))
+
+
+def _run_load_balancer(config: LoadBalancerConfig):
+    asyncio.run(LoadBalancer(config).start())
+
+
+# ---------------------------------------------------------------------------
+# Load generator
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.dropped = 0
+
+    async def timed(self, request: Callable[[], Awaitable[None]], started: float):
+        try:
+            await request()
+        except Exception:
+            self.errors += 1
+            return
+        self.latencies.append(time.perf_counter() - started)
+
+
+async def closed_loop(request: Callable[[], Awaitable[None]], recorder: Recorder, concurrency: int, duration: float):
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        while time.perf_counter() < deadline:
+            await recorder.timed(request, time.perf_counter())
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+
+
+async def open_loop(request: Callable[[], Awaitable[None]], recorder: Recorder, rate: float, duration: float,
+                    max_in_flight: int):
+    in_flight = set()
+    started = time.perf_counter()
+    for index in range(int(rate * duration)):
+        intended = started + index / rate
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            # The balancer cannot keep up; count it rather than queue without bound
+            recorder.dropped += 1
+            continue
+        task = asyncio.create_task(recorder.timed(request, intended))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    await asyncio.gather(*in_flight)
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return float("nan")
+    # Nearest rank
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+async def _drive(args, protocol: str, port: int, pid: int) -> Dict:
+    if protocol == ProtocolType.HTTP.value:
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0))
+        url = f"http://127.0.0.1:{port}/"
+
+        async def request():
+            async with session.get(url) as resp:
+                await resp.read()
+                if resp.status != 200:
+                    raise RuntimeError(f"HTTP {resp.status}")
+    else:
+        session = None
+
+        async def request():
+            # One connection per request, so every request goes through backend selection
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            try:
+                writer.write(TCP_REQUEST)
+                received = len(await reader.read())
+            finally:
+                writer.close()
+            if received != args.response_bytes:
+                raise RuntimeError(f"Short response: {received} bytes")
+
+    async def run(recorder: Recorder, duration: float):
+        if args.mode == "closed":
+            await closed_loop(request, recorder, args.concurrency, duration)
+        else:
+            await open_loop(request, recorder, args.rate, duration, args.max_in_flight)
+
+    try:
+        if args.warmup:
+            await run(Recorder(), args.warmup)
+
+        recorder = Recorder()
+        cpu_before = cpu_seconds(pid)
+        started = time.perf_counter()
+        await run(recorder, args.duration)
+        elapsed = time.perf_counter() - started
+        cpu = cpu_seconds(pid) - cpu_before
+        rss = rss_bytes(pid)
+    finally:
+        if session is not None:
+            await session.close()
+
+    ordered = sorted(recorder.latencies)
+    return {
+        "requests": len(ordered),
+        "errors": recorder.errors,
+        "dropped": recorder.dropped,
+        "duration_s": elapsed,
+        "rps": len(ordered) / elapsed,
+        "latency_ms": {
+            "mean": sum(ordered) / len(ordered) * 1000 if ordered else float("nan"),
+            "p50": _percentile(ordered, 0.50) * 1000,
+            "p99": _percentile(ordered, 0.99) * 1000,
+            "p999": _percentile(ordered, 0.999) * 1000,
+            "max": ordered[-1] * 1000 if ordered else float("nan"),
+        },
+        "lb_cpu_s": cpu,
+        "lb_cpu_percent": cpu / elapsed * 100,
+        "rps_per_core": len(ordered) / cpu if cpu else float("nan"),
+        "lb_rss_bytes": rss,
+    }
+
+
+async def _bench(args, protocol: str, algorithm: str, http_engine: Optional[str] = None) -> Dict:
+    backend_ports = [free_port() for _ in range(args.backends)]
+    listen_port = free_port()
+    context = multiprocessing.get_context("fork")
+
+    backends = context.Process(
+        target=_run_backends, args=(protocol, backend_ports, args.latency, args.response_bytes), daemon=True
+    )
+    config = LoadBalancerConfig(
+        listen={"host": "127.0.0.1", "port": listen_port, "protocol": protocol},
+        health_check={"interval": 3600, "timeout": 2, "path": "/health"},
+        load_balance={
+            "algorithms": algorithm,
+            "servers": [{"host": "127.0.0.1", "port": port, "weight": 1} for port in backend_ports]
+        },
+        proxy={"http_engine": http_engine or HttpEngine.AIOHTTP.value},
+        logging={"access_log": False}
+    )
+    balancer = context.Process(target=_run_load_balancer, args=(config,), daemon=True)
+
+    backends.start()
+    balancer.start()
+    try:
+        for port in backend_ports:
+            await wait_for_port(port)
+        await wait_for_port(listen_port)
+        result = await _drive(args, protocol, listen_port, balancer.pid)
+    finally:
+        for process in (balancer, backends):
+            process.terminate()
+            process.join()
+
+    return {"protocol": protocol, "http_engine": http_engine, "algorithm": algorithm, "mode": args.mode, **result}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load balancer benchmark")
+    parser.add_argument("--protocols", nargs="+", default=[p.value for p in ProtocolType],
+                        choices=[p.value for p in ProtocolType])
+    parser.add_argument("--algorithms", nargs="+", default=[a.value for a in AlgorithmType],
+                        choices=[a.value for a in AlgorithmType])
+    parser.add_argument("--http-engines", nargs="+", default=[HttpEngine.AIOHTTP.value],
+                        choices=[e.value for e in HttpEngine], help="HTTP engines to run the http protocol with")
+    parser.add_argument("--backends", type=int, default=4, help="Number of mock backends")
+    parser.add_argument("--latency", default="const:1", help="Backend latency distribution, in ms")
+    parser.add_argument("--response-bytes", type=int, default=1024, help="Response body size")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed", help="Load generator mode")
+    parser.add_argument("--concurrency", type=int, default=64, help="Clients in closed-loop mode")
+    parser.add_argument("--rate", type=float, default=1000, help="Requests per second in open-loop mode")
+    parser.add_argument("--max-in-flight", type=int, default=10000, help="Open-loop requests allowed in flight")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds measured per run")
+    parser.add_argument("--warmup", type=float, default=1, help="Seconds of unmeasured load before each run")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    runs = []
+    for protocol in args.protocols:
+        engines = args.http_engines if protocol == ProtocolType.HTTP.value else [None]
+        for engine in engines:
+            for algorithm in args.algorithms:
+                result = asyncio.run(_bench(args, protocol, algorithm, engine))
+                latency = result["latency_ms"]
+                label = f"{protocol}/{engine}" if engine else protocol
+                print(
+                    f"{label:>16} {algorithm:>22}: {result['rps']:9.0f} rps  "
+                    f"p50 {latency['p50']:7.2f}ms  p99 {latency['p99']:7.2f}ms  p999 {latency['p999']:7.2f}ms  "
+                    f"errors {result['errors']}  dropped {result['dropped']}  "
+                    f"cpu {result['lb_cpu_percent']:5.1f}%  {result['rps_per_core']:7.0f} rps/core  "
+                    f"rss {result['lb_rss_bytes'] / 2 ** 20:6.1f}MiB"
+                )
+                runs.append(result)
+
+    if args.output:
+        report = {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+            "runs": runs,
+        }
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
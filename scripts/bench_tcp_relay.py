@@ -0,0 +1,131 @@
+# scripts/bench_tcp_relay.py
+
+"""
+Throughput benchmark for the TCP relay engines.
+
+Runs the load balancer in a child process for each engine, pushes a payload
+through it to a sink backend over several parallel connections and reports
+MB/s and the CPU seconds the load balancer process used. With ``--idle N``
+it also opens N idle connections and reports the load balancer's RSS per connection.
+
+    python -m scripts.bench_tcp_relay --size-mb 512 --connections 4 --idle 5000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+
+from scripts.bench_common import cpu_seconds, free_port, rss_bytes, wait_for_port
+from src.async_flow.core import LoadBalancer
+from src.async_flow.models.config import LoadBalancerConfig
+from src.async_flow.relay import SPLICE_AVAILABLE
+
+CHUNK = b"\0" * (256 * 1024)
+
+
+def _run_load_balancer(engine: str, listen_port: int, backend_port: int, chunk_size: int):
+    config = LoadBalancerConfig(
+        listen={"host": "127.0.0.1", "port": listen_port, "protocol": "tcp"},
+        health_check={"interval": 3600, "timeout": 2, "path": "/health"},
+        load_balance={
+            "algorithms": "round_robin",
+            "servers": [{"host": "127.0.0.1", "port": backend_port, "weight": 1}]
+        },
+        proxy={"tcp_relay": engine, "chunk_size": chunk_size}
+    )
+    asyncio.run(LoadBalancer(config).start_tcp_server())
+
+
+async def _sink(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    # Discard everything, then report the byte count back
+    received = 0
+    try:
+        while data := await reader.read(1 << 20):
+            received += len(data)
+    except ConnectionError:
+        return
+    writer.write(str(received).encode())
+    await writer.drain()
+    writer.close()
+
+
+async def _push(port: int, size: int) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    sent = 0
+    while sent < size:
+        writer.write(CHUNK)
+        await writer.drain()
+        sent += len(CHUNK)
+    writer.write_eof()
+    received = int(await reader.read())
+    writer.close()
+    return received
+
+
+async def _idle(port: int, count: int, pid: int) -> float:
+    """Open ``count`` idle connections and return the load balancer's RSS growth per connection."""
+    rss_before = rss_bytes(pid)
+    writers = []
+    try:
+        for _ in range(count):
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writers.append(writer)
+        # Let the load balancer connect every client upstream
+        await asyncio.sleep(1)
+        return (rss_bytes(pid) - rss_before) / count
+    finally:
+        for writer in writers:
+            writer.close()
+
+
+async def _bench(engine: str, size: int, connections: int, chunk_size: int, idle: int):
+    backend = await asyncio.start_server(_sink, "127.0.0.1", 0)
+    backend_port = backend.sockets[0].getsockname()[1]
+    listen_port = free_port()
+
+    process = multiprocessing.get_context("fork").Process(
+        target=_run_load_balancer, args=(engine, listen_port, backend_port, chunk_size), daemon=True
+    )
+    process.start()
+    try:
+        await wait_for_port(listen_port)
+
+        cpu_before = cpu_seconds(process.pid)
+        started = time.perf_counter()
+        received = await asyncio.gather(*(_push(listen_port, size // connections) for _ in range(connections)))
+        elapsed = time.perf_counter() - started
+        cpu = cpu_seconds(process.pid) - cpu_before
+        per_connection = await _idle(listen_port, idle, process.pid) if idle else None
+    finally:
+        process.terminate()
+        process.join()
+        # Let the sinks see the upstream connections close before the loop ends
+        await asyncio.sleep(0.5)
+        backend.close()
+        await backend.wait_closed()
+
+    total_mb = sum(received) / (1 << 20)
+    print(f"{engine:>8}: {total_mb:8.0f} MB in {elapsed:6.2f}s = {total_mb / elapsed:8.1f} MB/s, "
+          f"load balancer CPU {cpu:.2f}s")
+    if per_connection is not None:
+        print(f"{'':>8}  {idle} idle connections: {per_connection / 1024:.1f} KiB RSS each")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare TCP relay engine throughput")
+    parser.add_argument("--size-mb", type=int, default=512, help="Total payload per engine in MB")
+    parser.add_argument("--connections", type=int, default=4, help="Parallel client connections")
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024, help="Relay chunk size in bytes")
+    parser.add_argument("--idle", type=int, default=0, help="Idle connections to open for the memory measurement")
+    args = parser.parse_args()
+
+    engines = ["stream", "protocol"] + (["splice"] if SPLICE_AVAILABLE else [])
+    for engine in engines:
+        asyncio.run(_bench(engine, args.size_mb << 20, args.connections, args.chunk_size, args.idle))
+    if not SPLICE_AVAILABLE:
+        print("splice: not available on this platform")
+
+
+if __name__ == "__main__":
+    main()
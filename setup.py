@@ -18,7 +18,7 @@ setup(
     packages=find_packages(where='src'),
     package_dir={'': 'src'},
     install_requires=[
-        'aiohttp>=3.8.0',
+        'aiohttp>=3.9.0',
         'pydantic>=1.8.0',
         'pyyaml>=6.0',
         'toml>=0.10.2',
@@ -0,0 +1,46 @@
+import logging
+import random
+import time
+from typing import Optional
+
+from src.async_flow.logger import get_logger
+from src.async_flow.models.config import Logging as LoggingConfig, Server
+
+
+class AccessLog:
+    """
+    Sampled access log, one record per HTTP request or TCP connection.
+
+    ``sampled()`` is the only per-request cost when a request is not logged.
+    Records are formatted lazily with %-style arguments, and the fields are
+    also attached as ``record.access`` so a structured (e.g. JSON) formatter
+    can emit them as-is.
+    """
+
+    def __init__(self, config: LoggingConfig):
+        self.logger = get_logger("AccessLog")
+        self.sample_rate = config.access_log_sample_rate if config.access_log else 0.0
+
+    def sampled(self) -> bool:
+        """Decide whether the current request is logged."""
+        if self.sample_rate <= 0.0:
+            return False
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        return self.logger.isEnabledFor(logging.INFO)
+
+    def log(self, client: Optional[str], method: str, target: str, status, upstream: Optional[Server], started: float):
+        """Write the record of a request that ``sampled()`` selected."""
+        duration_ms = (time.monotonic() - started) * 1000
+        upstream_address = f"{upstream.host}:{upstream.port}" if upstream is not None else "-"
+        self.logger.info(
+            '%s "%s %s" %s %s %.2fms', client or "-", method, target, status, upstream_address, duration_ms,
+            extra={"access": {
+                "client": client,
+                "method": method,
+                "target": target,
+                "status": status,
+                "upstream": upstream_address,
+                "duration_ms": duration_ms,
+            }}
+        )
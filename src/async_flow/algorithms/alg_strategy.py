@@ -1,8 +1,14 @@
+from typing import Optional
+
 from src.async_flow.algorithms.base_algorithm import BaseAlgorithm
+from src.async_flow.algorithms.consistent_hash import ConsistentHashAlg
 from src.async_flow.algorithms.least_connections import LeastConnectionsAlg
+from src.async_flow.algorithms.peak_ewma import PeakEwmaAlg
+from src.async_flow.algorithms.power_of_two_choices import PowerOfTwoChoicesAlg
 from src.async_flow.algorithms.round_robin import RoundRobinAlg
 from src.async_flow.algorithms.weighted_round_robin import WeightedRoundRobinAlg
 from src.async_flow.enums import AlgorithmType
+from src.async_flow.models.config import AlgorithmOptions
 
 
 class AlgorithmContext:
@@ -17,16 +23,31 @@ class AlgorithmContext:
     def algorithm(self, algorithm):
         self._algorithm = algorithm
 
-    async def execute(self, server_list):
-        return await self.algorithm.select_server(server_list)
+    async def execute(self, server_list, key=None, exclude=None):
+        if exclude:
+            # Retrying: pick a backend that has not been tried for this request yet
+            return await self.algorithm.select_server_excluding(server_list, key, exclude)
+        return await self.algorithm.select_server(server_list, key)
 
     async def release(self, server):
         if hasattr(self.algorithm, "release_server"):
             await self.algorithm.release_server(server)
 
+    def observe(self, server, ttfb: float, duration: float):
+        """Report upstream time-to-first-byte and completion time, in seconds."""
+        if hasattr(self.algorithm, "observe"):
+            self.algorithm.observe(server, ttfb, duration)
+
+    def forget(self, server):
+        """Drop the state kept for a server that left the pool."""
+        if hasattr(self.algorithm, "forget"):
+            self.algorithm.forget(server)
+
 
 class AlgorithmFactory:
-    def build(self, algorithm_type: str) -> BaseAlgorithm:
+    def build(self, algorithm_type: str, options: Optional[AlgorithmOptions] = None) -> BaseAlgorithm:
+        if options is None:
+            options = AlgorithmOptions()
         match algorithm_type:
             case AlgorithmType.ROUND_ROBIN.value:
                 return RoundRobinAlg()
@@ -34,5 +55,13 @@ class AlgorithmFactory:
                 return WeightedRoundRobinAlg()
             case AlgorithmType.LEAST_CONNECTIONS.value:
                 return LeastConnectionsAlg()
+            case AlgorithmType.POWER_OF_TWO_CHOICES.value:
+                return PowerOfTwoChoicesAlg(use_weights=options.use_weights)
+            case AlgorithmType.PEAK_EWMA.value:
+                return PeakEwmaAlg(
+                    decay_time=options.decay_time, default_rtt=options.default_rtt, use_weights=options.use_weights
+                )
+            case AlgorithmType.CONSISTENT_HASH.value:
+                return ConsistentHashAlg()
             case _:
                 raise ValueError()
@@ -1,18 +1,43 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Collection, Hashable, List, Optional, Sequence
 
 from src.async_flow.models.config import Server
 
 
 class BaseAlgorithm(ABC):
+    # Whether select_server needs a routing key; core.py only extracts one when it does
+    uses_routing_key = False
+
     @abstractmethod
-    async def select_server(self, server_list: List[Server]) -> Server:
+    async def select_server(self, server_list: List[Server], key: Optional[str] = None) -> Server:
 
         """
         :param server_list: List of available servers.
+        :param key: Routing key of the request (client IP, header, cookie or path prefix).
         Select a server based on the algorithm.
         Must be implemented by subclasses.
         """
         raise NotImplementedError("Subclasses must implement this method.")
 
+    async def select_server_excluding(
+            self, server_list: List[Server], key: Optional[str] = None, exclude: Collection[Server] = ()
+    ) -> Server:
+        """
+        Select a server that is not in ``exclude``, to retry a request on another backend.
+        By default the algorithm runs over the remaining servers.
+        """
+        remaining = [server for server in server_list if server not in exclude]
+        return await self.select_server(remaining, key)
 
+    @staticmethod
+    def _snapshot_key(server_list: Sequence[Server]) -> Hashable:
+        """
+        Cache key for structures derived from ``server_list``. A ServerSnapshot
+        from ServerPool.get_healthy_servers() carries the pool ``version``, which
+        changes whenever membership, health or weights do; plain lists fall back
+        to member identity and weight.
+        """
+        version: Optional[int] = getattr(server_list, "version", None)
+        if version is not None:
+            return version
+        return tuple((id(server), server.weight) for server in server_list)
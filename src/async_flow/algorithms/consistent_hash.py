@@ -0,0 +1,193 @@
+import asyncio
+import hashlib
+import random
+from functools import reduce
+from math import gcd
+from typing import Collection, Generator, List, Optional, Sequence, Set
+
+from src.async_flow.algorithms.base_algorithm import BaseAlgorithm
+from src.async_flow.models.config import Server
+
+# Table slots per server; Maglev keeps the split within a few percent at 100
+SLOTS_PER_SERVER = 100
+# Tables up to this many slots are built inline (a few milliseconds); larger ones are
+# built in the background, yielding to the event loop every BUILD_CHUNK probed slots
+INLINE_TABLE_SIZE = 8192
+BUILD_CHUNK = 4096
+
+
+def _hash(value: str, salt: bytes = b"") -> int:
+    # Stable across processes, unlike hash(), so every worker routes a key the same way
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8, salt=salt).digest(), "little")
+
+
+def _next_prime(n: int) -> int:
+    candidate = n if n % 2 else n + 1
+    while any(candidate % d == 0 for d in range(3, int(candidate ** 0.5) + 1, 2)):
+        candidate += 2
+    return candidate
+
+
+class ConsistentHashAlg(BaseAlgorithm):
+    """
+    Maglev consistent hashing.
+
+    Every server fills slots of a prime-sized lookup table following its own
+    permutation, taking ``weight`` turns per round, so a key is routed with one
+    hash and one index. When a server leaves the healthy set only its slots,
+    about 1/n of the keys, move to other servers.
+
+    The table has about ``SLOTS_PER_SERVER`` slots per server, resized only
+    when the pool halves or doubles, and is rebuilt when the ServerPool
+    snapshot version changes. Large tables are built in a background task:
+    until it finishes, keys are served from the old table and keys owned by a
+    server that left the healthy set are rehashed, or by plain modulo hashing
+    before the first table exists.
+    """
+
+    uses_routing_key = True
+
+    def __init__(self, table_size: Optional[int] = None):
+        # Fixed table size; by default sized from the pool
+        self.table_size = table_size
+        self._table: List[Server] = []
+        self._table_key = None
+        # Healthy set the picks must come from, which the table may not reflect yet
+        self._live: Set[Server] = set()
+        self._build: Optional[asyncio.Task] = None
+        self._build_key = None
+
+    async def select_server(self, server_list: List[Server], key: Optional[str] = None) -> Server:
+        """
+        Implements Maglev hashing to select the server owning ``key``.
+        Requests without a key are spread at random.
+        """
+        if not server_list:
+            raise ValueError("No servers available to select.")
+
+        if key is None:
+            return server_list[random.randrange(len(server_list))]
+
+        live_key = self._snapshot_key(server_list)
+        if live_key != self._table_key:
+            self._refresh(server_list, live_key)
+            if live_key != self._table_key:
+                # Stale table: keys of servers that left are rehashed onto the live ones
+                for attempt in range(4 if self._table else 0):
+                    server = self._table[_hash(f"{key}#{attempt}" if attempt else key) % len(self._table)]
+                    if server in self._live:
+                        return server
+                # No table yet: plain modulo hashing keeps keys stable until it is built
+                return server_list[_hash(key) % len(server_list)]
+
+        return self._table[_hash(key) % len(self._table)]
+
+    def _refresh(self, server_list: Sequence[Server], live_key):
+        """Rebuild the table for ``server_list``: inline when it is small, else in the background."""
+        if live_key == self._build_key:
+            # Already being built
+            return
+        self._live = set(server_list)
+        if self._build is not None:
+            self._build.cancel()
+            self._build = None
+            self._build_key = None
+        size = self._size_for(server_list)
+        if size <= INLINE_TABLE_SIZE:
+            self._table = self.build_table(server_list, size)
+            self._table_key = live_key
+        else:
+            self._build_key = live_key
+            self._build = asyncio.create_task(self._rebuild(list(server_list), size, live_key))
+
+    def _size_for(self, server_list: Sequence[Server]) -> int:
+        if self.table_size:
+            return _next_prime(self.table_size)
+        target = SLOTS_PER_SERVER * len(server_list)
+        current = len(self._table)
+        # A new size moves almost every key, so keep the current one until the pool halves or doubles
+        if current and target // 2 <= current <= target * 2:
+            return current
+        return _next_prime(target)
+
+    async def _rebuild(self, server_list: List[Server], size: int, table_key):
+        filling = _fill_table(server_list, size)
+        try:
+            while True:
+                next(filling)
+                await asyncio.sleep(0)
+        except StopIteration as done:
+            self._table = done.value
+            self._table_key = table_key
+        finally:
+            if self._build is asyncio.current_task():
+                self._build = None
+                self._build_key = None
+
+    async def select_server_excluding(
+            self, server_list: List[Server], key: Optional[str] = None, exclude: Collection[Server] = ()
+    ) -> Server:
+        """
+        Rehash ``key`` with an attempt suffix against the full table, so a retried
+        key lands on a stable fallback server without rebuilding the table.
+        """
+        if key is not None:
+            for attempt in range(1, len(exclude) + 3):
+                server = await self.select_server(server_list, f"{key}#{attempt}")
+                if server not in exclude:
+                    return server
+        return await super().select_server_excluding(server_list, None, exclude)
+
+    @staticmethod
+    def build_table(server_list: Sequence[Server], table_size: Optional[int] = None) -> List[Server]:
+        """Populate the Maglev lookup table for ``server_list``, of a prime size of at least ``table_size``."""
+        filling = _fill_table(server_list, _next_prime(table_size or SLOTS_PER_SERVER * len(server_list)))
+        try:
+            while True:
+                next(filling)
+        except StopIteration as done:
+            return done.value
+
+
+def _fill_table(server_list: Sequence[Server], size: int) -> Generator[None, None, List[Server]]:
+    """Fill a Maglev table of ``size`` slots, yielding every BUILD_CHUNK probes so the work can be spread out."""
+    offsets = []
+    skips = []
+    for position, server in enumerate(server_list, 1):
+        name = f"{server.host}:{server.port}"
+        offsets.append(_hash(name, b"offset") % size)
+        skips.append(_hash(name, b"skip") % (size - 1) + 1)
+        if position % (BUILD_CHUNK // 8) == 0:
+            # Hashing a server costs about as much as probing eight slots
+            yield
+    divisor = reduce(gcd, (server.weight for server in server_list))
+    turns = [server.weight // divisor for server in server_list]
+
+    next_index = [0] * len(server_list)
+    table: List[Optional[Server]] = [None] * size
+    filled = 0
+    # Slots probed since the last yield; probing dominates as the table fills up
+    probes = 0
+    while True:
+        for position, server in enumerate(server_list):
+            offset, skip, index = offsets[position], skips[position], next_index[position]
+            for _ in range(turns[position]):
+                slot = (offset + index * skip) % size
+                while table[slot] is not None:
+                    index += 1
+                    slot = (offset + index * skip) % size
+                    probes += 1
+                    if probes >= BUILD_CHUNK:
+                        # The last free slots can take many probes to find
+                        probes = 0
+                        yield
+                table[slot] = server
+                index += 1
+                filled += 1
+                if filled == size:
+                    return table
+                probes += 1
+                if probes >= BUILD_CHUNK:
+                    probes = 0
+                    yield
+            next_index[position] = index
@@ -1,50 +1,141 @@
-import asyncio
 import random
-from typing import Dict, List
+from typing import Collection, Dict, List, Optional, Sequence
 
 from src.async_flow.algorithms.base_algorithm import BaseAlgorithm
 from src.async_flow.models.config import Server
 
 
 class LeastConnectionsAlg(BaseAlgorithm):
+    """
+    Least Connections over bucketed counts.
+
+    Live servers are grouped into buckets by their number of open connections
+    and the lowest non-empty bucket is tracked, so ``select_server`` and
+    ``release_server`` are O(1). Ties are broken by picking uniformly at random
+    within the lowest bucket.
+
+    Neither method awaits, so they run atomically on the event loop and need no lock.
+    """
+
     def __init__(self):
+        # Open connections per server, including servers that left the pool but still
+        # have requests in flight (they keep their count if they come back)
         self._open_conn: Dict[Server, int] = {}
-        self._lock = asyncio.Lock()
+        # count -> live servers with that many open connections
+        self._buckets: Dict[int, List[Server]] = {}
+        # live server -> its position inside its bucket, for O(1) removal
+        self._position: Dict[Server, int] = {}
+        self._min_count = 0
+        self._members_key = None
 
-    async def select_server(self, server_list: List[Server]) -> Server:
+    async def select_server(self, server_list: List[Server], key: Optional[str] = None) -> Server:
         """
         Implements Least Connection algorithm to select the next server.
         """
         if not server_list:
             raise ValueError("No servers available to select.")
 
-        async with self._lock:
-            # Ensure every live server has a counter
-            for server in server_list:
-                self._open_conn.setdefault(server, 0)
+        members_key = self._snapshot_key(server_list)
+        if members_key != self._members_key:
+            self._sync_members(server_list)
+            self._members_key = members_key
+
+        bucket = self._buckets[self._min_count]
+        chosen = bucket[random.randrange(len(bucket))]
+
+        # request goes to this
+        self._move(chosen, self._min_count, self._min_count + 1)
+        self._open_conn[chosen] += 1
+        return chosen
 
-            # Remove stale entries (servers that disappeared from the pool)
-            stale = set(self._open_conn) - set(server_list)
-            for s in stale:
-                self._open_conn.pop(s, None)
+    async def select_server_excluding(
+            self, server_list: List[Server], key: Optional[str] = None, exclude: Collection[Server] = ()
+    ) -> Server:
+        """
+        Pick the least loaded server not in ``exclude``. Buckets are walked from
+        the lowest count, skipping excluded servers, so a retry scans at most
+        ``len(exclude) + 1`` servers instead of re-deriving the members.
+        """
+        if not server_list:
+            raise ValueError("No servers available to select.")
 
-            # need it to be random
-            random.shuffle(server_list)
-            chosen = min(server_list, key=self._open_conn.get)
+        members_key = self._snapshot_key(server_list)
+        if members_key != self._members_key:
+            self._sync_members(server_list)
+            self._members_key = members_key
 
-            # request goes to this
-            self._open_conn[chosen] += 1
-            return chosen
+        for count in sorted(self._buckets):
+            bucket = self._buckets[count]
+            start = random.randrange(len(bucket))
+            for step in range(len(bucket)):
+                chosen = bucket[(start + step) % len(bucket)]
+                if chosen not in exclude:
+                    self._move(chosen, count, count + 1)
+                    self._open_conn[chosen] += 1
+                    return chosen
+        raise ValueError("No servers available to select.")
 
     async def release_server(self, server: Server) -> None:
-        async with self._lock:
-            if server not in self._open_conn:
-                # log this bcz why do we have unknown server - warning?
-                return
+        count = self._open_conn.get(server)
+        if count is None:
+            # log this bcz why do we have unknown server - warning?
+            return
 
+        if count == 0:
+            # double-release
+            # log at WARNING?
+            return
+
+        if server in self._position:
+            self._move(server, count, count - 1)
+            self._open_conn[server] = count - 1
+        elif count == 1:
+            # Last in-flight request of a server that left the pool
+            del self._open_conn[server]
+        else:
+            self._open_conn[server] = count - 1
+
+    def active_connections(self, server: Server) -> int:
+        """Number of requests currently in flight to ``server``."""
+        return self._open_conn.get(server, 0)
+
+    def _sync_members(self, server_list: Sequence[Server]):
+        """Apply the difference between the current members and ``server_list``."""
+        live = set(server_list)
+
+        for server in [s for s in self._position if s not in live]:
+            self._unlink(server, self._open_conn[server])
             if self._open_conn[server] == 0:
-                # double-release
-                # log at WARNING?
-                return
+                del self._open_conn[server]
+
+        for server in server_list:
+            if server not in self._position:
+                count = self._open_conn.setdefault(server, 0)
+                self._link(server, count)
+
+        self._min_count = min(self._buckets) if self._buckets else 0
+
+    def _link(self, server: Server, count: int):
+        bucket = self._buckets.setdefault(count, [])
+        self._position[server] = len(bucket)
+        bucket.append(server)
+        if count < self._min_count:
+            self._min_count = count
+
+    def _unlink(self, server: Server, count: int):
+        bucket = self._buckets[count]
+        index = self._position.pop(server)
+        last = bucket.pop()
+        if last is not server:
+            # Swap the last server into the freed slot
+            bucket[index] = last
+            self._position[last] = index
+        if not bucket:
+            del self._buckets[count]
 
-            self._open_conn[server] -= 1
+    def _move(self, server: Server, old: int, new: int):
+        self._unlink(server, old)
+        self._link(server, new)
+        if old == self._min_count and old not in self._buckets:
+            # Only reachable on increment: the chosen server moved up from the last min slot
+            self._min_count = new
@@ -0,0 +1,67 @@
+import math
+import time
+from typing import Dict, Set
+
+from src.async_flow.algorithms.power_of_two_choices import PowerOfTwoChoicesAlg
+from src.async_flow.models.config import Server
+
+
+class PeakEwmaAlg(PowerOfTwoChoicesAlg):
+    """
+    Peak EWMA: latency-aware power of two choices.
+
+    Each server's cost is an exponentially weighted moving average of its
+    observed time-to-first-byte multiplied by its outstanding requests + 1.
+    Samples above the average replace it outright (the "peak"), so a backend
+    that stalls is penalised on its first slow response, and the average
+    decays back towards zero while no samples arrive so it gets retried.
+    Latency is reported by the proxy path through ``observe``.
+    """
+
+    def __init__(self, decay_time: float = 10.0, default_rtt: float = 0.1, use_weights: bool = True):
+        super().__init__(use_weights=use_weights)
+        self.decay_time = decay_time  # seconds for a sample's influence to fall to 1/e
+        self.default_rtt = default_rtt  # assumed latency of servers without samples
+        self._rtt: Dict[Server, float] = {}
+        self._stamp: Dict[Server, float] = {}
+        # Removed servers with requests still in flight, whose late samples are ignored
+        self._forgotten: Set[Server] = set()
+
+    def observe(self, server: Server, ttfb: float, duration: float) -> None:
+        """Fold a response's time-to-first-byte into the server's moving average."""
+        if server in self._forgotten:
+            return
+        now = time.monotonic()
+        rtt = self._rtt.get(server)
+        if rtt is None or ttfb > rtt:
+            rtt = ttfb
+        else:
+            weight = math.exp((self._stamp[server] - now) / self.decay_time)
+            rtt = rtt * weight + ttfb * (1.0 - weight)
+        self._rtt[server] = rtt
+        self._stamp[server] = now
+
+    async def release_server(self, server: Server) -> None:
+        await super().release_server(server)
+        if server not in self._open_conn:
+            self._forgotten.discard(server)
+
+    def forget(self, server: Server) -> None:
+        """Drop the latency of a server that left the pool."""
+        self._rtt.pop(server, None)
+        self._stamp.pop(server, None)
+        if server in self._open_conn:
+            self._forgotten.add(server)
+
+    def latency(self, server: Server) -> float:
+        """Current moving average latency of ``server``, decayed to now."""
+        rtt = self._rtt.get(server)
+        if rtt is None:
+            return self.default_rtt
+        return rtt * math.exp((self._stamp[server] - time.monotonic()) / self.decay_time)
+
+    def _load(self, server: Server) -> float:
+        cost = self.latency(server) * (self._open_conn.get(server, 0) + 1)
+        if self.use_weights:
+            return cost / server.weight
+        return cost
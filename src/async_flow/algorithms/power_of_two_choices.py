@@ -0,0 +1,59 @@
+import random
+from typing import Dict, List, Optional
+
+from src.async_flow.algorithms.base_algorithm import BaseAlgorithm
+from src.async_flow.models.config import Server
+
+
+class PowerOfTwoChoicesAlg(BaseAlgorithm):
+    """
+    Power of two choices: sample two distinct servers at random and send the
+    request to the one with fewer outstanding requests.
+
+    Each pick is O(1) and touches only the two sampled counters, so there is no
+    global scan and no lock. With ``use_weights`` the outstanding count is
+    divided by ``Server.weight``, letting bigger backends carry more load.
+    """
+
+    def __init__(self, use_weights: bool = True):
+        self.use_weights = use_weights
+        # Outstanding requests per server, decremented by release_server
+        self._open_conn: Dict[Server, int] = {}
+
+    async def select_server(self, server_list: List[Server], key: Optional[str] = None) -> Server:
+        """
+        Implements Power of Two Choices to select the next server.
+        """
+        if not server_list:
+            raise ValueError("No servers available to select.")
+
+        size = len(server_list)
+        if size == 1:
+            chosen = server_list[0]
+        else:
+            first = random.randrange(size)
+            # Offset into the remaining servers so the two samples are distinct
+            second = (first + random.randrange(1, size)) % size
+            a, b = server_list[first], server_list[second]
+            chosen = a if self._load(a) <= self._load(b) else b
+
+        self._open_conn[chosen] = self._open_conn.get(chosen, 0) + 1
+        return chosen
+
+    async def release_server(self, server: Server) -> None:
+        count = self._open_conn.get(server, 0)
+        if count <= 1:
+            # Drop idle entries so servers that left the pool do not linger
+            self._open_conn.pop(server, None)
+        else:
+            self._open_conn[server] = count - 1
+
+    def active_connections(self, server: Server) -> int:
+        """Number of requests currently in flight to ``server``."""
+        return self._open_conn.get(server, 0)
+
+    def _load(self, server: Server) -> float:
+        outstanding = self._open_conn.get(server, 0)
+        if self.use_weights:
+            return outstanding / server.weight
+        return outstanding
@@ -1,5 +1,5 @@
 import asyncio
-from typing import List
+from typing import List, Optional
 
 from src.async_flow.algorithms.base_algorithm import BaseAlgorithm
 from src.async_flow.models.config import Server
@@ -10,7 +10,7 @@ class RoundRobinAlg(BaseAlgorithm):
         self.current_index = -1  # Keeps track of the last selected server
         self.lock = asyncio.Lock()  # Ensures thread-safe access
 
-    async def select_server(self, server_list: List[Server]) -> Server:
+    async def select_server(self, server_list: List[Server], key: Optional[str] = None) -> Server:
         """
         Implements Round Robin algorithm to select the next server in a thread-safe manner.
         """
@@ -1,16 +1,123 @@
+import heapq
+from functools import reduce
+from math import gcd
+from typing import Collection, List, Optional, Sequence, Tuple
+
 from src.async_flow.algorithms.base_algorithm import BaseAlgorithm
+from src.async_flow.models.config import Server
+
+# Longest cycle that is precomputed. Above it picks follow the same sequence lazily
+# from a heap, so a rebuild stays O(n) however large the weights are.
+MAX_SCHEDULE_SIZE = 1 << 16
 
 
 class WeightedRoundRobinAlg(BaseAlgorithm):
     def __init__(self):
-        self.current_index = -1  # Keeps track of the last selected server
+        self.current_index = -1  # Keeps track of the last selected position in the schedule
+        self._schedule: Tuple[Server, ...] = ()
+        self._schedule_key = None
+        # Used instead of the schedule when it would exceed MAX_SCHEDULE_SIZE
+        self._heap: Optional[List[Tuple[float, int, int]]] = None
+        self._servers: Sequence[Server] = ()
+        self._weights: List[int] = []
+
+    async def select_server(self, server_list: List[Server], key: Optional[str] = None) -> Server:
+        """
+        Implements smooth Weighted Round Robin to select the next server.
+
+        The interleaved schedule is precomputed whenever the healthy set or the
+        weights change, so a pick is a single index step. Cycles longer than
+        MAX_SCHEDULE_SIZE are walked lazily from a heap instead, at O(log n) per pick.
+        """
+        if not server_list:
+            raise ValueError("No servers available to select.")
+
+        self._sync(server_list)
+        if self._heap is not None:
+            _, position, emitted = self._heap[0]
+            weight = self._weights[position]
+            heapq.heapreplace(self._heap, ((emitted + 0.5) / weight, position, emitted + 1))
+            return self._servers[position]
 
-    def select_server(self, server_list):
+        # No await between reading and advancing the index, so no lock is needed
+        self.current_index = (self.current_index + 1) % len(self._schedule)
+        return self._schedule[self.current_index]
+
+    async def select_server_excluding(
+            self, server_list: List[Server], key: Optional[str] = None, exclude: Collection[Server] = ()
+    ) -> Server:
         """
-        Implements Round Robin algorithm to select the next server.
+        Pick the next server in the schedule that is not in ``exclude``. The
+        position in the schedule does not move, so normal picks keep their share.
         """
         if not server_list:
             raise ValueError("No servers available to select.")
 
-        self.current_index = (self.current_index + 1) % len(server_list)
-        return server_list[self.current_index]
+        self._sync(server_list)
+        if self._heap is not None:
+            # Excluded servers are few; look past them and put them back untouched
+            popped = []
+            chosen = None
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                popped.append(entry)
+                if self._servers[entry[1]] not in exclude:
+                    chosen = self._servers[entry[1]]
+                    break
+            for entry in popped:
+                heapq.heappush(self._heap, entry)
+            if chosen is None:
+                raise ValueError("No servers available to select.")
+            return chosen
+
+        schedule = self._schedule
+        for step in range(1, len(schedule) + 1):
+            server = schedule[(self.current_index + step) % len(schedule)]
+            if server not in exclude:
+                return server
+        raise ValueError("No servers available to select.")
+
+    def _sync(self, server_list: Sequence[Server]):
+        """Rebuild the schedule when the healthy set or the weights changed."""
+        schedule_key = self._snapshot_key(server_list)
+        if schedule_key == self._schedule_key:
+            return
+        self._schedule_key = schedule_key
+        self.current_index = -1
+        divisor = reduce(gcd, (server.weight for server in server_list))
+        weights = [server.weight // divisor for server in server_list]
+        if sum(weights) > MAX_SCHEDULE_SIZE:
+            self._schedule = ()
+            self._servers = list(server_list)
+            self._weights = weights
+            self._heap = [(0.5 / weight, position, 1) for position, weight in enumerate(weights)]
+            heapq.heapify(self._heap)
+        else:
+            self._heap = None
+            self._schedule = self.build_schedule(server_list)
+
+    @staticmethod
+    def build_schedule(server_list: Sequence[Server]) -> Tuple[Server, ...]:
+        """
+        Build one full cycle of the smooth weighted schedule.
+
+        Server ``i`` with weight ``w`` gets its ``k``-th slot at virtual time
+        ``(k - 0.5) / w``; emitting slots in that order spreads every server's
+        picks evenly over the cycle (like nginx's smooth WRR) instead of in
+        bursts. Weights are reduced by their gcd to keep the cycle short, and
+        building it costs O(total_weight * log n).
+        """
+        divisor = reduce(gcd, (server.weight for server in server_list))
+        weights = [server.weight // divisor for server in server_list]
+
+        # (virtual time, position, slots emitted so far)
+        heap = [(0.5 / weight, position, 1) for position, weight in enumerate(weights)]
+        heapq.heapify(heap)
+
+        schedule = []
+        for _ in range(sum(weights)):
+            _, position, emitted = heapq.heappop(heap)
+            schedule.append(server_list[position])
+            if emitted < weights[position]:
+                heapq.heappush(heap, ((emitted + 0.5) / weights[position], position, emitted + 1))
+        return tuple(schedule)
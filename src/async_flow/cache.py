@@ -0,0 +1,227 @@
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+from aiohttp import web
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from src.async_flow.logger import get_logger
+from src.async_flow.models.config import Cache as CacheConfig
+from src.async_flow.utils import filter_hop_by_hop
+
+CACHEABLE_METHODS = frozenset(("GET", "HEAD"))
+CACHEABLE_STATUSES = frozenset((200, 203, 300, 301, 404, 410))
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """Parse a Cache-Control header into lower-cased directives and their values."""
+    directives: Dict[str, Optional[str]] = {}
+    for part in value.split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Seconds a response may be served from a shared cache, 0 if it must be
+    revalidated every time, or None if it must not be stored.
+    """
+    directives = parse_cache_control(headers.get("Cache-Control", ""))
+    if "no-store" in directives or "private" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+
+    for name in ("s-maxage", "max-age"):
+        lifetime = _seconds(directives.get(name))
+        if lifetime is not None:
+            return float(max(lifetime - (_seconds(headers.get("Age")) or 0), 0))
+
+    expires = headers.get("Expires")
+    if expires is not None:
+        try:
+            expires_at = parsedate_to_datetime(expires)
+            date = parsedate_to_datetime(headers["Date"]) if "Date" in headers else None
+        except (TypeError, ValueError):
+            # An invalid Expires means already expired
+            return 0.0
+        if date is None:
+            return max(expires_at.timestamp() - time.time(), 0.0)
+        return max((expires_at - date).total_seconds(), 0.0)
+    return None
+
+
+class CacheEntry:
+    __slots__ = ("status", "headers", "body", "stored_at", "expires_at", "initial_age", "etag", "last_modified", "size")
+
+    def __init__(self, status: int, headers: CIMultiDict, body: bytes, lifetime: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + lifetime
+        self.initial_age = _seconds(headers.get("Age")) or 0
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+        self.size = len(body) + sum(len(name) + len(value) for name, value in headers.items())
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at + self.initial_age
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+
+class CacheLookup(NamedTuple):
+    key: Tuple
+    entry: Optional[CacheEntry]
+    # Whether ``entry`` can be served without asking the backend
+    fresh: bool
+
+
+class ResponseCache:
+    """
+    Shared in-memory cache for GET and HEAD responses.
+
+    Entries are keyed by host and URL plus the request headers the response
+    varies on. Their lifetime comes from ``Cache-Control`` (``s-maxage``,
+    ``max-age``) or ``Expires``; ``no-store``, ``private``, ``Vary: *`` and
+    responses setting cookies are never stored. Stale entries with an ``ETag``
+    or ``Last-Modified`` are revalidated with a conditional request instead of
+    being fetched again. The cache is an LRU bounded by ``max_bytes``.
+    """
+
+    def __init__(self, config: CacheConfig):
+        self.config = config
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._entries: "OrderedDict[Tuple, CacheEntry]" = OrderedDict()
+        # URL key -> header names its last response varied on, and how many entries the URL has
+        self._vary: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        self._vary_entries: Dict[Tuple[str, str], int] = {}
+        self.size = 0
+        self.evictions = 0
+
+    def lookup(self, request: web.Request) -> Optional[CacheLookup]:
+        """Find the entry for ``request``, or return None if the request bypasses the cache."""
+        if request.method not in CACHEABLE_METHODS or "Authorization" in request.headers:
+            return None
+        directives = parse_cache_control(request.headers.get("Cache-Control", ""))
+        if "no-store" in directives:
+            return None
+
+        url_key = (request.headers.get("Host", ""), str(request.rel_url))
+        vary = self._vary.get(url_key, ())
+        key = (url_key, tuple(request.headers.get(name, "") for name in vary))
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return CacheLookup(key, None, False)
+
+        fresh = entry.is_fresh()
+        if not fresh and entry.etag is None and entry.last_modified is None:
+            # Expired and cannot be revalidated
+            self._evict(key)
+            return CacheLookup(key, None, False)
+        self._entries.move_to_end(key)
+        # The client may insist on revalidation
+        fresh = fresh and "no-cache" not in directives and directives.get("max-age") != "0"
+        return CacheLookup(key, entry, fresh)
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry) -> Dict[str, str]:
+        """Validators to send upstream when revalidating ``entry``."""
+        headers = {}
+        if entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def respond(self, request: web.Request, entry: CacheEntry) -> web.Response:
+        """Serve ``entry``, answering 304 when the client already holds it."""
+        headers = CIMultiDict(entry.headers)
+        headers["Age"] = str(int(entry.age))
+        if entry.etag is not None and self._matches(request.headers.get("If-None-Match"), entry.etag):
+            headers.pop("Content-Length", None)
+            return web.Response(status=304, headers=headers)
+        return web.Response(status=entry.status, headers=headers, body=entry.body)
+
+    def store(self, lookup: CacheLookup, request: web.Request, status: int,
+              headers: CIMultiDictProxy, body: bytes) -> Optional[CacheEntry]:
+        """Store an upstream response if it is cacheable; returns the new entry."""
+        if request.method != "GET" or status not in CACHEABLE_STATUSES or "Set-Cookie" in headers:
+            return None
+        vary = tuple(sorted(name.strip().lower() for name in headers.get("Vary", "").split(",") if name.strip()))
+        if "*" in vary:
+            return None
+        lifetime = freshness_lifetime(headers)
+        if lifetime is None or len(body) > self.config.max_entry_bytes:
+            return None
+        entry = CacheEntry(status, filter_hop_by_hop(headers), body, lifetime)
+        if lifetime == 0 and entry.etag is None and entry.last_modified is None:
+            return None
+
+        url_key = lookup.key[0]
+        key = (url_key, tuple(request.headers.get(name, "") for name in vary))
+        self._evict(key)
+        if vary:
+            self._vary[url_key] = vary
+            self._vary_entries[url_key] = self._vary_entries.get(url_key, 0) + 1
+        elif url_key in self._vary:
+            self._vary[url_key] = ()
+            self._vary_entries[url_key] += 1
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.config.max_bytes:
+            self._evict(next(iter(self._entries)))
+            self.evictions += 1
+        return entry
+
+    def refresh(self, lookup: CacheLookup, headers: CIMultiDictProxy) -> Optional[CacheEntry]:
+        """Apply a 304 Not Modified to the revalidated entry and return it."""
+        entry = self._entries.get(lookup.key)
+        if entry is None:
+            return None
+        updated = CIMultiDict(entry.headers)
+        updated.pop("Age", None)
+        for name in ("Cache-Control", "Expires", "Date", "ETag", "Last-Modified", "Age"):
+            if name in headers:
+                updated[name] = headers[name]
+        # A 304 need not repeat Cache-Control, so the lifetime comes from the merged headers
+        lifetime = freshness_lifetime(updated)
+        refreshed = CacheEntry(entry.status, updated, entry.body, lifetime or 0.0)
+        self._entries[lookup.key] = refreshed
+        self.size += refreshed.size - entry.size
+        return refreshed
+
+    def _evict(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+            url_key = key[0]
+            if url_key in self._vary_entries:
+                self._vary_entries[url_key] -= 1
+                if not self._vary_entries[url_key]:
+                    # Last entry of the URL: forget what it varied on
+                    del self._vary_entries[url_key]
+                    del self._vary[url_key]
+
+    @staticmethod
+    def _matches(if_none_match: Optional[str], etag: str) -> bool:
+        if if_none_match is None:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison, as required for If-None-Match
+        return "*" in candidates or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in candidates]
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from aiohttp import web
+from multidict import CIMultiDict
+
+from src.async_flow.logger import get_logger
+from src.async_flow.models.config import Coalescing as CoalescingConfig
+
+COALESCED_METHODS = frozenset(("GET", "HEAD"))
+# Personalised requests are only merged when these headers are part of the key
+CREDENTIAL_HEADERS = ("Authorization", "Cookie")
+
+# status, headers, body of a response shared with the waiters
+SharedResponse = Tuple[int, CIMultiDict, bytes]
+
+
+class RequestCoalescer:
+    """
+    Single-flight for identical concurrent GET and HEAD requests.
+
+    The first request for a key (method, host, URL and the configured
+    ``vary_headers``) goes upstream; requests arriving while it is in flight
+    wait for it and get a copy of its response. Responses that are streamed,
+    larger than ``max_body_bytes`` or set cookies are not shared, and waiters
+    that do not get a response within ``wait_timeout`` send their own request.
+    """
+
+    def __init__(self, config: CoalescingConfig):
+        self.config = config
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._flights: Dict[Tuple, asyncio.Future] = {}
+        self._vary_names = frozenset(name.lower() for name in config.vary_headers)
+
+    def key(self, request: web.Request) -> Optional[Tuple]:
+        """Key shared by requests that may be merged, or None if ``request`` is never merged."""
+        if request.method not in COALESCED_METHODS or request.can_read_body:
+            return None
+        for name in CREDENTIAL_HEADERS:
+            if name in request.headers and name.lower() not in self._vary_names:
+                return None
+        return (
+            request.method,
+            request.headers.get("Host", ""),
+            str(request.rel_url),
+            tuple(request.headers.get(name, "") for name in self.config.vary_headers)
+        )
+
+    async def run(self, key: Tuple, fetch: Callable[[], Awaitable[web.StreamResponse]]) -> Tuple[web.StreamResponse, bool]:
+        """
+        Return the response for ``key``, fetching it only if no identical request
+        is in flight. The flag tells whether the response was shared from another request.
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            try:
+                # shield: a waiter timing out must not cancel the flight for the others
+                shared = await asyncio.wait_for(asyncio.shield(flight), self.config.wait_timeout)
+            except asyncio.TimeoutError:
+                shared = None
+            if shared is None:
+                return await fetch(), False
+            status, headers, body = shared
+            return web.Response(status=status, headers=headers, body=body), True
+
+        flight = self._flights[key] = asyncio.get_running_loop().create_future()
+        shared: Optional[SharedResponse] = None
+        try:
+            response = await fetch()
+            shared = self._shareable(response)
+            return response, False
+        finally:
+            del self._flights[key]
+            # None sends the waiters off to make their own request
+            flight.set_result(shared)
+
+    def _shareable(self, response: web.StreamResponse) -> Optional[SharedResponse]:
+        if not isinstance(response, web.Response) or not isinstance(response.body, bytes):
+            return None
+        if len(response.body) > self.config.max_body_bytes or "Set-Cookie" in response.headers:
+            return None
+        return response.status, CIMultiDict(response.headers), response.body
@@ -45,17 +45,14 @@ class Config:
     def loadYamlConfig(self):
         with open(self.file, 'r') as f:
             self.raw_config = yaml.safe_load(f)
-        print(self.config)
 
     def loadJsonConfig(self):
         with open(self.file, 'r') as f:
             self.raw_config = json.load(f)
-        print(self.config)
 
     def loadTomlConfig(self):
         with open(self.file, 'r') as f:
             self.raw_config = toml.load(f)
-        print(self.config)
 
     def validate_config(self):
         if not hasattr(self, 'raw_config') or self.raw_config is None:
@@ -0,0 +1,113 @@
+import asyncio
+import weakref
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+from src.async_flow.logger import get_logger
+from src.async_flow.models.config import Server, UpstreamPool as UpstreamPoolConfig
+
+
+class UpstreamConnectionPool:
+    """
+    Long-lived keep-alive HTTP connections to the backends.
+
+    Every backend gets its own ``aiohttp.ClientSession`` backed by a dedicated
+    ``TCPConnector``, so a removed backend can be closed without touching the
+    sockets of the others. A shared semaphore caps the total number of
+    upstream connections in use across all backends.
+    """
+
+    def __init__(self, config: UpstreamPoolConfig):
+        self.config = config
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._sessions: Dict[Tuple[str, int], aiohttp.ClientSession] = {}
+        self._limit: Optional[asyncio.Semaphore] = None
+        # Requests served per keep-alive connection, keyed by the connection protocol
+        self._served: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        # Sessions of removed backends, closed once their grace period ends
+        self._retiring: Dict[aiohttp.ClientSession, asyncio.Task] = {}
+        self.running = False
+
+    async def start(self):
+        """Prepare the pool; sessions are opened lazily per backend."""
+        self._limit = asyncio.Semaphore(self.config.max_connections)
+        self.running = True
+        self.logger.info("Upstream connection pool started.")
+
+    @property
+    def limit(self) -> asyncio.Semaphore:
+        return self._limit
+
+    def session_for(self, server: Server) -> aiohttp.ClientSession:
+        """Return the session for ``server``, opening one on first use."""
+        key = (server.host, server.port)
+        session = self._sessions.get(key)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.max_connections_per_host,
+                limit_per_host=self.config.max_connections_per_host,
+                keepalive_timeout=self.config.keepalive_timeout,
+            )
+            session = aiohttp.ClientSession(connector=connector, auto_decompress=False)
+            self._sessions[key] = session
+            self.logger.debug(f"Opened upstream pool for {server.host}:{server.port}")
+        return session
+
+    def track(self, response: aiohttp.ClientResponse):
+        """
+        Count a request against the connection that served it and retire the
+        connection once it reaches ``max_requests_per_connection``.
+        """
+        max_requests = self.config.max_requests_per_connection
+        if not max_requests or response.connection is None:
+            return
+
+        protocol = response.connection.protocol
+        if protocol is None:
+            return
+        served = self._served.get(protocol, 0) + 1
+        if served >= max_requests:
+            # The connector closes the socket instead of returning it to the pool
+            protocol.force_close()
+            self._served.pop(protocol, None)
+        else:
+            self._served[protocol] = served
+
+    async def remove(self, server: Server, grace: float = 0):
+        """
+        Close the pooled connections of a backend that left the pool. With a
+        ``grace`` period, requests already using them get that many seconds to
+        finish first; new requests to the address open a fresh session.
+        """
+        session = self._sessions.pop((server.host, server.port), None)
+        if not session or session.closed:
+            return
+        if grace > 0:
+            self._retiring[session] = asyncio.create_task(self._close_later(session, server, grace))
+            return
+        await session.close()
+        self.logger.info(f"Closed upstream pool for {server.host}:{server.port}")
+
+    async def _close_later(self, session: aiohttp.ClientSession, server: Server, grace: float):
+        try:
+            await asyncio.sleep(grace)
+            await session.close()
+            self.logger.info(f"Closed upstream pool for {server.host}:{server.port}")
+        finally:
+            self._retiring.pop(session, None)
+
+    async def close(self):
+        """Close every pooled connection."""
+        self.running = False
+        for task in list(self._retiring.values()):
+            task.cancel()
+        sessions = list(self._sessions.values()) + list(self._retiring)
+        self._sessions.clear()
+        self._retiring.clear()
+        for session in sessions:
+            if not session.closed:
+                await session.close()
+        if sessions:
+            self.logger.info("Upstream connection pool closed.")
@@ -1,39 +1,112 @@
 import asyncio
-from typing import Dict, Callable, Coroutine, Any
+import signal
+import socket
+import time
+from http.cookies import CookieError, SimpleCookie
+from typing import Dict, Callable, Coroutine, Any, FrozenSet, List, Optional, Sequence, Set, Tuple
 
 import aiohttp
 from aiohttp import web
 
+from src.async_flow.access_log import AccessLog
 from src.async_flow.algorithms.alg_strategy import AlgorithmContext, AlgorithmFactory
+from src.async_flow.cache import CacheLookup, ResponseCache
+from src.async_flow.coalescing import RequestCoalescer
+from src.async_flow.connection_pool import UpstreamConnectionPool
+from src.async_flow.enums import HashKeySource, HttpEngine, TcpRelayEngine
+from src.async_flow.exceptions import HttpProtocolError, UpstreamClosedError, UpstreamStreamError
 from src.async_flow.logger import get_logger
 from src.async_flow.health import HealthCheck
-from src.async_flow.models.config import LoadBalancerConfig
+from src.async_flow.limits import ConcurrencyLimiter
+from src.async_flow.metrics import HTTP_5XX_ERROR, OTHER_ERROR, Metrics, classify_error
+from src.async_flow.models.config import LoadBalancerConfig, Server
+from src.async_flow.outlier import OutlierDetector
+from src.async_flow.passthrough import HttpClientProtocol, PassthroughPool, RequestHead, UpstreamProtocol
+from src.async_flow.ratelimit import RateLimiter
+from src.async_flow.relay import SPLICE_AVAILABLE, BufferPool, RelayProtocol, open_socket, splice_relay
+from src.async_flow.retry import RetryPolicy
 from src.async_flow.server_pool import ServerPool
+from src.async_flow.utils import filter_hop_by_hop
+
+# Backend that served a request, for the access log (typed request keys need aiohttp 3.12+)
+UPSTREAM_KEY = web.RequestKey("upstream", Server) if hasattr(web, "RequestKey") else "upstream"
 
 
 class LoadBalancer:
+    # Counters exported by every worker and summed by the WorkerSupervisor
+    STAT_FIELDS = ("requests", "active", "errors", "retries", "cache_hits", "cache_misses", "coalesced", "shed", "rate_limited")
+
     def __init__(self, config: LoadBalancerConfig):
         self.config = config
         self.server_pool = ServerPool(config.load_balance.servers)
+        self.metrics: Optional[Metrics] = None
+        if config.metrics.enabled:
+            self.metrics = Metrics(config.metrics)
+        self.outlier_detector: Optional[OutlierDetector] = None
+        if config.outlier_detection.enabled:
+            self.outlier_detector = OutlierDetector(config.outlier_detection, self.server_pool, metrics=self.metrics)
         self.health_check = HealthCheck(
             server_pool=self.server_pool,
             config=config.health_check,
-            protocol=config.listen.protocol
+            protocol=config.listen.protocol,
+            outlier_detector=self.outlier_detector,
+            metrics=self.metrics
         )
+        self.upstream_pool = UpstreamConnectionPool(config.upstream)
+        self.passthrough_pool: Optional[PassthroughPool] = None
+        if config.proxy.http_engine == HttpEngine.PASSTHROUGH.value:
+            self.passthrough_pool = PassthroughPool(config.upstream)
+        self.retry_policy = RetryPolicy(config.retry)
+        self.limiter: Optional[ConcurrencyLimiter] = None
+        if config.concurrency.enabled:
+            self.limiter = ConcurrencyLimiter(config.concurrency)
+        self.rate_limiter: Optional[RateLimiter] = None
+        if config.rate_limit.enabled:
+            self.rate_limiter = RateLimiter(config.rate_limit)
+        self.access_log = AccessLog(config.logging)
+        self.response_cache: Optional[ResponseCache] = None
+        if config.cache.enabled:
+            self.response_cache = ResponseCache(config.cache)
+        self.coalescer: Optional[RequestCoalescer] = None
+        if config.coalescing.enabled:
+            self.coalescer = RequestCoalescer(config.coalescing)
         self.logger = get_logger(self.__class__.__name__)
+        self.stats: Dict[str, int] = dict.fromkeys(self.STAT_FIELDS, 0)
+        self._runner: Optional[web.AppRunner] = None
 
-        self.server_startup_methods: Dict[str, Callable[[], Coroutine[Any, Any, None]]] = {
-            'http': self.start_http_server,
-            'tcp': self.start_tcp_server
-        }
+        # Set by shutdown(): listeners stop accepting and in-flight work drains
+        self.draining = False
+        self._closing = asyncio.Event()
+        self._tcp_server: Optional[asyncio.AbstractServer] = None
+        self._accept_task: Optional[asyncio.Task] = None
+        # Tasks of the TCP connections being handled, and of those relaying to each backend
+        self._connections: Set[asyncio.Task] = set()
+        self._relays: Dict[Server, Set[asyncio.Task]] = {}
+        # Client connections of the passthrough engine, closed on shutdown while idle
+        self._http_clients: Set[HttpClientProtocol] = set()
+        # Deadlines for the relays of removed backends
+        self._backend_drains: Set[asyncio.Task] = set()
 
         algorithm_factory = AlgorithmFactory()
-        self.algorithm = algorithm_factory.build(algorithm_type=config.load_balance.algorithms)
+        self.algorithm = algorithm_factory.build(
+            algorithm_type=config.load_balance.algorithms, options=config.load_balance.options
+        )
         self.algorithm_context = AlgorithmContext(algorithm=self.algorithm)
 
+    @property
+    def server_startup_methods(self) -> Dict[str, Callable[[], Coroutine[Any, Any, None]]]:
+        # Resolved on access so the startup methods can be swapped (e.g. patched in tests)
+        return {
+            'http': self.start_http_server,
+            'tcp': self.start_tcp_server
+        }
+
     async def start(self):
         """Start the load balancer components."""
+        await self.upstream_pool.start()
         await self.health_check.start()
+        if self.metrics is not None:
+            await self.metrics.start(self)
 
         protocol = self.config.listen.protocol.lower()
         startup_method = self.server_startup_methods.get(protocol)
@@ -50,114 +123,894 @@ class LoadBalancer:
             self.logger.error(f"Unsupported protocol: {self.config.listen.protocol}")
             raise ValueError(f"Unsupported protocol: {self.config.listen.protocol}")
 
+    async def serve(self, stop_signals: Sequence[int] = (signal.SIGINT, signal.SIGTERM)):
+        """
+        Run until one of ``stop_signals`` arrives, then shut down gracefully.
+        """
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for signum in stop_signals:
+            loop.add_signal_handler(signum, stop.set)
+        serving = asyncio.create_task(self.start())
+        stopping = asyncio.create_task(stop.wait())
+        try:
+            await asyncio.wait((serving, stopping), return_when=asyncio.FIRST_COMPLETED)
+            if stopping.done():
+                self.logger.info("Stop signal received, draining connections.")
+        finally:
+            for signum in stop_signals:
+                loop.remove_signal_handler(signum)
+            stopping.cancel()
+            await self.shutdown()
+        # Surface a startup failure
+        await serving
+
     async def handle_http_request(self, request: web.Request) -> web.Response:
+        started = time.monotonic()
+        logged = self.access_log.sampled()
+        response = None
+        try:
+            if self.rate_limiter is not None and not self.rate_limiter.allow(self._rate_limit_key(request)):
+                self.stats["rate_limited"] += 1
+                response = web.Response(status=429, text="Too Many Requests")
+                return response
+            response = await self._handle_http_request(request)
+            return response
+        finally:
+            if logged:
+                self.access_log.log(
+                    request.remote, request.method, request.path_qs,
+                    response.status if response is not None else "-", request.get(UPSTREAM_KEY), started
+                )
+
+    async def _handle_http_request(self, request: web.Request) -> web.Response:
         # Implement your request handling logic here
+        self.stats["requests"] += 1
+
+        cached = None
+        if self.response_cache is not None:
+            cached = self.response_cache.lookup(request)
+            if cached is not None:
+                if cached.fresh:
+                    self.stats["cache_hits"] += 1
+                    return self.response_cache.respond(request, cached.entry)
+                self.stats["cache_misses"] += 1
 
+        if self.coalescer is not None:
+            flight_key = self.coalescer.key(request)
+            if flight_key is not None:
+                response, shared = await self.coalescer.run(flight_key, lambda: self._forward_http(request, cached))
+                if shared:
+                    self.stats["coalesced"] += 1
+                return response
+        return await self._forward_http(request, cached)
+
+    async def _forward_http(self, request: web.Request, cached: Optional[CacheLookup] = None) -> web.StreamResponse:
+        """Forward ``request`` to a healthy backend, retrying on another one where allowed."""
+        self.retry_policy.record_request()
         healthy_servers = self.server_pool.get_healthy_servers()
         if not healthy_servers:
             self.logger.error("No healthy servers available to handle the request.")
+            self.stats["errors"] += 1
             return web.Response(status=503, text="Service Unavailable")
 
-        selected_server = await self.algorithm_context.execute(server_list=healthy_servers)
-        self.logger.info(f"Forwarding HTTP request to: {selected_server['host']}:{selected_server['port']}")
+        key = self._http_routing_key(request) if self.algorithm_context.algorithm.uses_routing_key else None
+        tried: List[Server] = []
+        body_read = False
+        body = None
+        while True:
+            selected_server = await self._select_server(healthy_servers, key, tried)
+            if selected_server is None:
+                self.logger.warning("All backends are at their concurrency limit, shedding the request.")
+                self.stats["shed"] += 1
+                return web.Response(status=503, text="Service Unavailable")
+            tried.append(selected_server)
+            self.stats["active"] += 1
+            # Picked up by the access log
+            request[UPSTREAM_KEY] = selected_server
+            self.logger.debug("Forwarding HTTP request to: %s:%s", selected_server.host, selected_server.port)
+
+            # Construct the target URL
+            target_url = f"http://{selected_server.host}:{selected_server.port}{request.rel_url}"
+
+            headers = filter_hop_by_hop(request.headers)
+            if cached is not None and cached.entry is not None:
+                # Revalidate the stale entry instead of fetching the body again
+                headers.update(self.response_cache.conditional_headers(cached.entry))
+
+            started = time.monotonic()
+            ttfb: Optional[float] = None
+            contacted = False
+            error_class: Optional[int] = None
+            try:
+                if not body_read:
+                    body = await self._request_body(request)
+                    body_read = True
+                session = self.upstream_pool.session_for(selected_server)
+                async with self.upstream_pool.limit:
+                    started = time.monotonic()
+                    contacted = True
+                    if self.metrics is not None:
+                        self.metrics.started(selected_server)
+                    async with session.request(
+                            method=request.method,
+                            url=target_url,
+                            headers=headers,
+                            data=body
+                    ) as resp:
+                        ttfb = time.monotonic() - started
+                        self.upstream_pool.track(resp)
+                        if resp.status >= 500:
+                            error_class = HTTP_5XX_ERROR
+                        if self.outlier_detector is not None:
+                            if resp.status >= 500:
+                                await self.outlier_detector.record_failure(selected_server, f"HTTP {resp.status}")
+                            else:
+                                self.outlier_detector.record_success(selected_server)
+                        if cached is not None and cached.entry is not None and resp.status == 304:
+                            # Still answer from the old entry if it was evicted meanwhile
+                            entry = self.response_cache.refresh(cached, resp.headers) or cached.entry
+                            return self.response_cache.respond(request, entry)
+                        if not self._should_buffer(resp.content_length):
+                            return await self._stream_response(request, resp)
+
+                        response_text = await resp.read()
+                        if cached is not None:
+                            self.response_cache.store(cached, request, resp.status, resp.headers, response_text)
+                        return web.Response(
+                            status=resp.status,
+                            headers=filter_hop_by_hop(resp.headers),
+                            body=response_text
+                        )
+            except UpstreamStreamError:
+                # Headers are already on the wire, so aiohttp can only abort the connection
+                raise
+            except Exception as e:
+                self.logger.error("Error forwarding HTTP request to %s:%s: %r", selected_server.host, selected_server.port, e)
+                error_class = classify_error(e)
+                if self.outlier_detector is not None and contacted and ttfb is None:
+                    # Connect errors and timeouts before the response headers count against the backend
+                    await self.outlier_detector.record_failure(selected_server, type(e).__name__)
+                if contacted and ttfb is None and self.retry_policy.allows(
+                        attempts=len(tried),
+                        candidates=len(healthy_servers),
+                        connect_phase=isinstance(e, aiohttp.ClientConnectorError),
+                        # A streamed upload may be partly consumed and cannot be sent again
+                        idempotent=self.retry_policy.is_idempotent(request.method) and not isinstance(
+                            body, aiohttp.StreamReader
+                        )
+                ):
+                    self.stats["retries"] += 1
+                    continue
+                self.stats["errors"] += 1
+                return web.Response(status=502, text="Bad Gateway")
+            finally:
+                await self._finish_attempt(selected_server, started, ttfb, error_class, contacted)
+
+    async def _finish_attempt(
+            self, server: Server, started: float, ttfb: Optional[float], error_class: Optional[int],
+            contacted: bool = True, duration: Optional[float] = None
+    ):
+        """
+        Bookkeeping after every attempt on ``server``, shared by all engines.
+        ``ttfb`` is the time to the response, or the connect time of a TCP
+        relay, and None without one; ``duration`` overrides the time the
+        metrics record, which is otherwise the time since ``started``.
+        """
+        elapsed = time.monotonic() - started
+        self.stats["active"] -= 1
+        if self.metrics is not None and contacted:
+            self.metrics.finished(server, elapsed if duration is None else duration, error_class)
+        if ttfb is not None:
+            self.algorithm_context.observe(server, ttfb, elapsed)
+        if self.limiter is not None:
+            self.limiter.release(server, ttfb, failed=error_class is not None)
+        await self.algorithm_context.release(server)
+
+    async def _select_server(self, healthy_servers: List[Server], key: Optional[str], tried: List[Server]) -> Optional[Server]:
+        """
+        Pick a backend not in ``tried``. With concurrency limits, backends at
+        their limit are skipped and the pick waits in the queue while every
+        backend is full; None means the request is shed.
+        """
+        limiter = self.limiter
+        if limiter is None:
+            return await self.algorithm_context.execute(server_list=healthy_servers, key=key, exclude=tried)
+
+        deadline = time.monotonic() + limiter.config.queue_timeout
+        while True:
+            if not limiter.all_saturated(healthy_servers):
+                server = await self.algorithm_context.execute(server_list=healthy_servers, key=key, exclude=tried)
+                if limiter.try_acquire(server):
+                    return server
+                await self.algorithm_context.release(server)
+                # The first pick keeps the algorithm's rotation; after it every full backend is left out at once
+                skipped = set(tried)
+                skipped.update(limiter.saturated)
+                skipped.add(server)
+                for _ in range(len(healthy_servers)):
+                    try:
+                        server = await self.algorithm_context.execute(server_list=healthy_servers, key=key, exclude=skipped)
+                    except ValueError:
+                        # Every backend was tried
+                        break
+                    if limiter.try_acquire(server):
+                        return server
+                    await self.algorithm_context.release(server)
+                    skipped.add(server)
+            if not await limiter.wait(deadline - time.monotonic()):
+                return None
+
+    def _rate_limit_key(self, request: web.Request) -> Optional[str]:
+        """The configured header if the request has it, else the client address."""
+        header = self.config.rate_limit.header
+        if header is not None:
+            value = request.headers.get(header)
+            if value is not None:
+                return value
+        return request.remote
+
+    def _http_routing_key(self, request: web.Request) -> Optional[str]:
+        """Extract the configured routing key for consistent hashing from an HTTP request."""
+        hash_key = self.config.load_balance.hash_key
+        match hash_key.source:
+            case HashKeySource.HEADER.value:
+                return request.headers.get(hash_key.name)
+            case HashKeySource.COOKIE.value:
+                return request.cookies.get(hash_key.name)
+            case HashKeySource.PATH.value:
+                return "/".join(request.path.split("/", hash_key.path_segments + 1)[:hash_key.path_segments + 1])
+            case _:
+                return request.remote
+
+    def _should_buffer(self, content_length: Optional[int]) -> bool:
+        """Whether a body of ``content_length`` bytes is read fully into memory."""
+        proxy = self.config.proxy
+        if not proxy.streaming:
+            return True
+        return content_length is not None and content_length <= proxy.buffer_threshold
 
-        # Construct the target URL
-        target_url = f"http://{selected_server['host']}:{selected_server['port']}{request.rel_url}"
+    async def _request_body(self, request: web.Request):
+        """Return the client body, either buffered or as a stream piped into the upstream request."""
+        if self._should_buffer(request.content_length):
+            return await request.read()
+        if not request.can_read_body:
+            return None
+        # aiohttp reads from the client only as fast as the backend accepts the upload
+        return request.content
 
+    async def _stream_response(self, request: web.Request, resp: aiohttp.ClientResponse) -> web.StreamResponse:
+        """Relay the upstream response to the client in bounded chunks."""
+        response = web.StreamResponse(status=resp.status, headers=filter_hop_by_hop(resp.headers))
+        await response.prepare(request)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                        method=request.method,
-                        url=target_url,
-                        headers=request.headers,
-                        data=await request.read()
-                ) as resp:
-                    response_text = await resp.read()
-                    return web.Response(
-                        status=resp.status,
-                        headers=resp.headers,
-                        body=response_text
-                    )
+            async for chunk in resp.content.iter_chunked(self.config.proxy.chunk_size):
+                # write() waits for the client transport to drain, pausing the upstream read
+                await response.write(chunk)
+            await response.write_eof()
         except Exception as e:
-            self.logger.error(f"Error forwarding HTTP request to {selected_server}: {e}")
-            return web.Response(status=502, text="Bad Gateway")
-        finally:
-            if hasattr(self.algorithm_context.algorithm, "release_server"):
-                await self.algorithm_context.algorithm.release_server(selected_server)
+            self.logger.error(f"Error streaming HTTP response from {resp.url}: {e}")
+            raise UpstreamStreamError(str(e)) from e
+        return response
 
     async def start_http_server(self):
         """Initialize and start the HTTP server."""
+        if self.config.proxy.http_engine == HttpEngine.PASSTHROUGH.value:
+            return await self._serve_passthrough()
+
         app = web.Application()
         app.router.add_route('*', '/', self.handle_http_request)
         app.router.add_route('*', '/{tail:.*}', self.handle_http_request)
-        runner = web.AppRunner(app)
-        await runner.setup()
-        site = web.TCPSite(runner, self.config.listen.host, self.config.listen.port)
+        # On cleanup the runner stops listening and waits this long for in-flight handlers
+        self._runner = web.AppRunner(app, shutdown_timeout=self.config.drain.timeout)
+        await self._runner.setup()
+        site = web.TCPSite(
+            self._runner,
+            self.config.listen.host,
+            self.config.listen.port,
+            reuse_port=self.config.listen.reuse_port
+        )
         await site.start()
         self.logger.info(f"HTTP server listening on {self.config.listen.host}:{self.config.listen.port}")
 
-    async def handle_tcp_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Serve until shutdown() or cancellation
+        await self._closing.wait()
+
+    async def _serve_passthrough(self):
+        """Serve HTTP with the passthrough engine, which relays requests and responses as raw bytes."""
+        server = await asyncio.get_running_loop().create_server(
+            lambda: HttpClientProtocol(self.handle_http_passthrough),
+            self.config.listen.host,
+            self.config.listen.port,
+            reuse_port=self.config.listen.reuse_port
+        )
+        self.logger.info(f"HTTP server (passthrough engine) listening on {self.config.listen.host}:{self.config.listen.port}")
+
+        self._tcp_server = server
+        async with server:
+            await self._closing.wait()
+
+    async def handle_http_passthrough(self, client: HttpClientProtocol):
         """
-        Handle incoming TCP connections by forwarding data to a healthy server.
+        Serve one client connection of the passthrough engine. Requests are
+        read and forwarded one at a time, so pipelined requests are answered
+        in order, each on the backend picked for it.
+        """
+        task = asyncio.current_task()
+        self._connections.add(task)
+        self._http_clients.add(client)
+        peername = client.transport.get_extra_info("peername")
+        remote = peername[0] if peername else None
+        capture = self._passthrough_capture()
+        try:
+            while not self.draining:
+                try:
+                    head = await client.read_request(capture)
+                except HttpProtocolError as e:
+                    client.respond_error(e.status, e.reason)
+                    break
+                if head is None:
+                    break
+                started = time.monotonic()
+                logged = self.access_log.sampled()
+                status, upstream, keep_alive = await self._proxy_passthrough(client, head, remote)
+                if logged:
+                    self.access_log.log(
+                        remote, head.method.decode("latin-1"), head.target.decode("latin-1"),
+                        status if status is not None else "-", upstream, started
+                    )
+                if not keep_alive:
+                    break
+        finally:
+            self._connections.discard(task)
+            self._http_clients.discard(client)
+            client.close()
+
+    async def _proxy_passthrough(
+            self, client: HttpClientProtocol, head: RequestHead, remote: Optional[str]
+    ) -> Tuple[Optional[int], Optional[Server], bool]:
         """
+        Forward one request of a passthrough client. Returns the response status,
+        the backend that served it and whether the client connection can carry
+        another request.
+        """
+        if self.rate_limiter is not None and not self.rate_limiter.allow(self._passthrough_rate_limit_key(head, remote)):
+            self.stats["rate_limited"] += 1
+            client.respond_error(429, "Too Many Requests")
+            return 429, None, False
+        self.stats["requests"] += 1
+        self.retry_policy.record_request()
         healthy_servers = self.server_pool.get_healthy_servers()
         if not healthy_servers:
-            self.logger.error("No healthy servers available to handle the TCP connection.")
+            self.logger.error("No healthy servers available to handle the request.")
+            self.stats["errors"] += 1
+            client.respond_error(503, "Service Unavailable")
+            return 503, None, False
+
+        key = None
+        if self.algorithm_context.algorithm.uses_routing_key:
+            key = self._passthrough_routing_key(head, remote)
+        idempotent = self.retry_policy.is_idempotent(head.method.decode("latin-1"))
+        task = asyncio.current_task()
+        tried: List[Server] = []
+        while True:
+            selected_server = await self._select_server(healthy_servers, key, tried)
+            if selected_server is None:
+                self.logger.warning("All backends are at their concurrency limit, shedding the request.")
+                self.stats["shed"] += 1
+                client.respond_error(503, "Service Unavailable")
+                return 503, None, False
+            tried.append(selected_server)
+            self.stats["active"] += 1
+            self.logger.debug("Forwarding HTTP request to: %s:%s", selected_server.host, selected_server.port)
+            relays = self._relays.setdefault(selected_server, set())
+            relays.add(task)
+
+            started = time.monotonic()
+            ttfb: Optional[float] = None
+            contacted = False
+            upstream: Optional[UpstreamProtocol] = None
+            error_class: Optional[int] = None
+            try:
+                async with self.upstream_pool.limit:
+                    started = time.monotonic()
+                    contacted = True
+                    if self.metrics is not None:
+                        self.metrics.started(selected_server)
+                    upstream = await self.passthrough_pool.acquire(selected_server)
+                    try:
+                        await self._exchange_passthrough(client, head, upstream)
+                    except UpstreamClosedError as e:
+                        if (upstream.requests == 1 or e.responded or head.framer is not None or not idempotent
+                                or client.closed):
+                            raise
+                        # The backend closed the kept-alive connection as it was reused; send again on a new one
+                        upstream = await self.passthrough_pool.connect(selected_server)
+                        await self._exchange_passthrough(client, head, upstream)
+
+                ttfb = upstream.first_byte_at - started
+                status = upstream.status
+                if status >= 500:
+                    error_class = HTTP_5XX_ERROR
+                if self.outlier_detector is not None:
+                    if status >= 500:
+                        await self.outlier_detector.record_failure(selected_server, f"HTTP {status}")
+                    else:
+                        self.outlier_detector.record_success(selected_server)
+                # The request must have been read to its end for the next one to follow it
+                keep_alive = head.keep_alive and upstream.keep_alive and (head.framer is None or head.framer.done)
+                if keep_alive:
+                    self.passthrough_pool.release(upstream)
+                else:
+                    upstream.close()
+                return status, selected_server, keep_alive
+            except Exception as e:
+                responded = upstream is not None and upstream.responded
+                if upstream is not None and upstream.first_byte_at is not None:
+                    ttfb = upstream.first_byte_at - started
+                if client.closed:
+                    # The client went away and its relay was aborted; the backend is not to blame
+                    self.logger.debug("Client closed during a request to %s:%s", selected_server.host, selected_server.port)
+                    return (upstream.status if responded else None), selected_server, False
+                self.logger.error("Error forwarding HTTP request to %s:%s: %r", selected_server.host, selected_server.port, e)
+                if isinstance(e, HttpProtocolError) and e.status < 500:
+                    # The client sent a malformed body; the backend is not to blame
+                    if not responded:
+                        client.respond_error(e.status, e.reason)
+                    return e.status, selected_server, False
+                error_class = classify_error(e)
+                if self.outlier_detector is not None and contacted and ttfb is None:
+                    await self.outlier_detector.record_failure(selected_server, type(e).__name__)
+                connect_phase = upstream is None
+                # Once sent, a request body was consumed from the client and cannot be sent again
+                if contacted and not responded and (connect_phase or head.framer is None) and self.retry_policy.allows(
+                        attempts=len(tried),
+                        candidates=len(healthy_servers),
+                        connect_phase=connect_phase,
+                        idempotent=idempotent
+                ):
+                    self.stats["retries"] += 1
+                    continue
+                self.stats["errors"] += 1
+                if responded:
+                    # Part of the response already went out, so the client can only be disconnected
+                    return upstream.status, selected_server, False
+                client.respond_error(502, "Bad Gateway")
+                return 502, selected_server, False
+            finally:
+                relays.discard(task)
+                if not relays and self._relays.get(selected_server) is relays:
+                    del self._relays[selected_server]
+                await self._finish_attempt(selected_server, started, ttfb, error_class, contacted)
+
+    async def _exchange_passthrough(self, client: HttpClientProtocol, head: RequestHead, upstream: UpstreamProtocol):
+        """Send a request and its body on ``upstream``; the response reaches the client as it arrives."""
+        response = upstream.send(head.raw, client.transport, head_only=head.method == b"HEAD")
+        client.attach(upstream)
+        try:
+            if head.framer is not None:
+                await client.forward_body(head.framer, upstream, response)
+            await response
+        except BaseException:
+            upstream.abort()
+            raise
+        finally:
+            client.attach(None)
+
+    def _passthrough_capture(self) -> FrozenSet[bytes]:
+        """Names of the request headers the passthrough engine needs the values of."""
+        names = set()
+        if self.config.rate_limit.enabled and self.config.rate_limit.header is not None:
+            names.add(self.config.rate_limit.header.lower().encode("latin-1"))
+        if self.algorithm_context.algorithm.uses_routing_key:
+            hash_key = self.config.load_balance.hash_key
+            if hash_key.source == HashKeySource.HEADER.value:
+                names.add(hash_key.name.lower().encode("latin-1"))
+            elif hash_key.source == HashKeySource.COOKIE.value:
+                names.add(b"cookie")
+        return frozenset(names)
+
+    def _passthrough_rate_limit_key(self, head: RequestHead, remote: Optional[str]) -> Optional[str]:
+        header = self.config.rate_limit.header
+        if header is not None:
+            value = head.header(header.lower().encode("latin-1"))
+            if value is not None:
+                return value
+        return remote
+
+    def _passthrough_routing_key(self, head: RequestHead, remote: Optional[str]) -> Optional[str]:
+        """The routing key of ``_http_routing_key``, taken from a raw request head."""
+        hash_key = self.config.load_balance.hash_key
+        match hash_key.source:
+            case HashKeySource.HEADER.value:
+                return head.header(hash_key.name.lower().encode("latin-1"))
+            case HashKeySource.COOKIE.value:
+                cookies = SimpleCookie()
+                try:
+                    cookies.load(head.header(b"cookie") or "")
+                except CookieError:
+                    return None
+                morsel = cookies.get(hash_key.name)
+                return morsel.value if morsel is not None else None
+            case HashKeySource.PATH.value:
+                path = head.target.split(b"?", 1)[0].decode("latin-1")
+                return "/".join(path.split("/", hash_key.path_segments + 1)[:hash_key.path_segments + 1])
+            case _:
+                return remote
+
+    async def handle_tcp_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Handle incoming TCP connections by forwarding data to a healthy server.
+        """
+
+        async def connect(server: Server):
+            return await asyncio.open_connection(server.host, server.port)
+
+        async def relay(upstream):
+            remote_reader, remote_writer = upstream
+            # Start relaying data between client and server
+            try:
+                return await asyncio.gather(
+                    self._relay_stream(reader, remote_writer),
+                    self._relay_stream(remote_reader, writer)
+                )
+            finally:
+                remote_writer.close()
+                writer.close()
+
+        async def close():
             writer.close()
             await writer.wait_closed()
-            return
 
-        selected_server = await self.algorithm_context.execute(server_list=healthy_servers)
-        self.logger.info(f"Forwarding TCP connection to: {selected_server['host']}:{selected_server['port']}")
+        await self._forward_tcp(writer.get_extra_info("peername"), connect, relay, close)
+
+    async def handle_tcp_socket(self, client: socket.socket):
+        """
+        Handle an accepted TCP socket with the splice relay: payload moves between
+        the client and backend sockets inside the kernel.
+        """
+        loop = asyncio.get_running_loop()
+        chunk_size = self.config.proxy.chunk_size
+
+        async def connect(server: Server):
+            return await open_socket(loop, server.host, server.port)
+
+        async def relay(upstream: socket.socket):
+            return await splice_relay(client, upstream, chunk_size)
+
+        async def close():
+            client.close()
 
         try:
-            # Connect to the selected server
-            remote_reader, remote_writer = await asyncio.open_connection(
-                selected_server['host'], selected_server['port']
+            peername = client.getpeername()
+        except OSError:
+            peername = None
+        await self._forward_tcp(peername, connect, relay, close)
+
+    async def handle_tcp_protocol(self, client: RelayProtocol):
+        """
+        Handle a connection accepted by the protocol relay: the client and backend
+        transports are paired and write to each other directly, with one task per connection.
+        """
+        loop = asyncio.get_running_loop()
+
+        async def connect(server: Server):
+            _, upstream = await loop.create_connection(
+                lambda: RelayProtocol(client.buffers), server.host, server.port
             )
+            return upstream
+
+        async def relay(upstream: RelayProtocol):
+            await client.relay(upstream)
+            return client.bytes_received, upstream.bytes_received
 
-            async def relay(reader_stream: asyncio.StreamReader, writer_stream: asyncio.StreamWriter):
+        async def close():
+            client.transport.close()
+
+        await self._forward_tcp(client.transport.get_extra_info("peername"), connect, relay, close)
+
+    async def _forward_tcp(
+            self,
+            peername,
+            connect: Callable[[Server], Coroutine[Any, Any, Any]],
+            relay: Callable[[Any], Coroutine[Any, Any, Tuple[int, int]]],
+            close: Callable[[], Coroutine[Any, Any, None]]
+    ):
+        """
+        Pick a backend for one TCP connection and relay it with the engine-specific
+        ``connect``/``relay``/``close`` callables. ``relay`` owns closing both ends
+        once it starts and returns the bytes relayed to and from the backend; ``close``
+        only runs when the client is rejected or the relay fails.
+        """
+        started = time.monotonic()
+        logged = self.access_log.sampled()
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            if self.rate_limiter is not None and not self.rate_limiter.allow(peername[0] if peername else None):
+                self.stats["rate_limited"] += 1
+                await close()
+                status, upstream = "rate_limited", None
+            else:
+                status, upstream = await self._proxy_tcp(peername, connect, relay, close)
+        except asyncio.CancelledError:
+            # Closed by a drain deadline; a started relay has already closed both ends
+            await close()
+            raise
+        finally:
+            self._connections.discard(task)
+        if logged:
+            listen = self.config.listen
+            self.access_log.log(
+                peername[0] if peername else None, "TCP", f"{listen.host}:{listen.port}", status, upstream, started
+            )
+
+    async def _proxy_tcp(self, peername, connect, relay, close) -> Tuple[str, Optional[Server]]:
+        """Run one TCP connection; returns its outcome and the backend it ended on."""
+        self.stats["requests"] += 1
+        self.retry_policy.record_request()
+
+        healthy_servers = self.server_pool.get_healthy_servers()
+        if not healthy_servers:
+            self.logger.error("No healthy servers available to handle the TCP connection.")
+            self.stats["errors"] += 1
+            await close()
+            return "rejected", None
+
+        key = None
+        if self.algorithm_context.algorithm.uses_routing_key:
+            # Only the client address is known before any bytes are relayed
+            key = peername[0] if peername else None
+        tried: List[Server] = []
+        while True:
+            selected_server = await self._select_server(healthy_servers, key, tried)
+            if selected_server is None:
+                self.logger.warning("All backends are at their concurrency limit, shedding the TCP connection.")
+                self.stats["shed"] += 1
+                await close()
+                return "shed", None
+            tried.append(selected_server)
+            self.stats["active"] += 1
+            self.logger.debug("Forwarding TCP connection to: %s:%s", selected_server.host, selected_server.port)
+
+            started = time.monotonic()
+            connect_time: Optional[float] = None
+            error_class: Optional[int] = None
+            if self.metrics is not None:
+                self.metrics.started(selected_server)
+            try:
+                # Connect to the selected server
+                upstream = await connect(selected_server)
+                # A raw TCP backend has no response to time, so the connect latency stands in for TTFB
+                connect_time = time.monotonic() - started
+                if self.outlier_detector is not None:
+                    self.outlier_detector.record_success(selected_server)
+
+                task = asyncio.current_task()
+                relays = self._relays.setdefault(selected_server, set())
+                relays.add(task)
                 try:
-                    while True:
-                        data = await reader_stream.read(4096)
-                        if not data:
-                            break
-                        writer_stream.write(data)
-                        await writer_stream.drain()
-                except Exception as e:
-                    self.logger.error(f"Error relaying data: {e}")
+                    relayed_upstream, relayed_downstream = await relay(upstream)
                 finally:
-                    writer_stream.close()
+                    relays.discard(task)
+                    if not relays and self._relays.get(selected_server) is relays:
+                        del self._relays[selected_server]
+                if self.metrics is not None:
+                    self.metrics.relayed(selected_server, relayed_upstream, relayed_downstream)
+                return "closed", selected_server
+            except Exception as e:
+                self.logger.error("Error forwarding TCP connection to %s:%s: %r", selected_server.host, selected_server.port, e)
+                error_class = classify_error(e) if connect_time is None else OTHER_ERROR
+                if connect_time is None:
+                    if self.outlier_detector is not None:
+                        await self.outlier_detector.record_failure(selected_server, type(e).__name__)
+                    # No client bytes were consumed yet, so another backend can take the connection
+                    if self.retry_policy.allows(
+                            attempts=len(tried), candidates=len(healthy_servers), connect_phase=True, idempotent=False
+                    ):
+                        self.stats["retries"] += 1
+                        continue
+                self.stats["errors"] += 1
+                await close()
+                return "error", selected_server
+            finally:
+                # Connection metrics record the connect time; the relay's length is not a latency
+                await self._finish_attempt(selected_server, started, connect_time, error_class, duration=connect_time)
 
-            # Start relaying data between client and server
-            await asyncio.gather(
-                relay(reader, remote_writer),
-                relay(remote_reader, writer)
-            )
+    async def _relay_stream(self, reader_stream: asyncio.StreamReader, writer_stream: asyncio.StreamWriter) -> int:
+        """Copy one direction until EOF; returns the number of bytes relayed."""
+        relayed = 0
+        try:
+            while True:
+                data = await reader_stream.read(4096)
+                if not data:
+                    break
+                writer_stream.write(data)
+                relayed += len(data)
+                await writer_stream.drain()
+            # Half-close so the peer sees EOF but can still answer
+            if writer_stream.can_write_eof():
+                writer_stream.write_eof()
+                return relayed
         except Exception as e:
-            self.logger.error(f"Error forwarding TCP connection to {selected_server}: {e}")
-            writer.close()
-            await writer.wait_closed()
-        finally:
-            if hasattr(self.algorithm_context.algorithm, "release_server"):
-                await self.algorithm_context.algorithm.release_server(selected_server)
+            self.logger.error("Error relaying data: %r", e)
+        writer_stream.close()
+        return relayed
 
     async def start_tcp_server(self):
         """Initialize and start the TCP server."""
+        engine = self.config.proxy.tcp_relay
+        if engine == TcpRelayEngine.SPLICE.value:
+            if SPLICE_AVAILABLE:
+                return await self._serve_splice()
+            self.logger.warning("Splice relay is not available on this platform, using the protocol relay.")
+            engine = TcpRelayEngine.PROTOCOL.value
 
-        server = await asyncio.start_server(
-            self.handle_tcp_client,
-            self.config.listen.host,
-            self.config.listen.port
-        )
+        if engine == TcpRelayEngine.STREAM.value:
+            server = await asyncio.start_server(
+                self.handle_tcp_client,
+                self.config.listen.host,
+                self.config.listen.port,
+                reuse_port=self.config.listen.reuse_port
+            )
+        else:
+            buffers = BufferPool(self.config.proxy.chunk_size)
+            server = await asyncio.get_running_loop().create_server(
+                lambda: RelayProtocol(buffers, on_connect=self.handle_tcp_protocol),
+                self.config.listen.host,
+                self.config.listen.port,
+                reuse_port=self.config.listen.reuse_port
+            )
         addr = server.sockets[0].getsockname()
-        self.logger.info(f"TCP server listening on {addr}")
+        self.logger.info(f"TCP server ({engine} relay) listening on {addr}")
 
+        # shutdown() closes the listener; accepted connections drain on their own
+        self._tcp_server = server
         async with server:
-            await server.serve_forever()
+            await self._closing.wait()
+
+    async def _serve_splice(self):
+        """Accept raw sockets so the splice relay owns their file descriptors."""
+        loop = asyncio.get_running_loop()
+        listener = socket.create_server(
+            (self.config.listen.host, self.config.listen.port),
+            reuse_port=self.config.listen.reuse_port
+        )
+        listener.setblocking(False)
+        self.logger.info(f"TCP server (splice relay) listening on {listener.getsockname()}")
+
+        async def accept():
+            connections = set()
+            while True:
+                client, _ = await loop.sock_accept(listener)
+                client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                task = asyncio.create_task(self.handle_tcp_socket(client))
+                # Keep a reference until the connection is done
+                connections.add(task)
+                task.add_done_callback(connections.discard)
+
+        self._accept_task = asyncio.create_task(accept())
+        try:
+            await self._closing.wait()
+        finally:
+            self._accept_task.cancel()
+            await asyncio.gather(self._accept_task, return_exceptions=True)
+            listener.close()
+
+    async def add_server(self, server: Server):
+        """Add a backend to the pool; its upstream connections open on first use."""
+        await self.server_pool.add_server(server)
+
+    async def remove_server(self, server: Server, drain_timeout: Optional[float] = None):
+        """
+        Remove a backend from the pool. It gets no new work; its in-flight
+        requests and TCP relays are closed after ``drain_timeout`` seconds,
+        ``drain.backend_timeout`` by default.
+        """
+        await self.server_pool.remove_server(server)
+        if drain_timeout is None:
+            drain_timeout = self.config.drain.backend_timeout
+        await self._forget_server(server, drain_timeout)
+
+    async def _forget_server(self, server: Server, drain_timeout: float):
+        await self.upstream_pool.remove(server, grace=drain_timeout)
+        if self.outlier_detector is not None:
+            self.outlier_detector.forget(server)
+        if self.metrics is not None:
+            self.metrics.forget(server)
+        if self.limiter is not None:
+            self.limiter.forget(server)
+        self.algorithm_context.forget(server)
+        if self.passthrough_pool is not None:
+            self.passthrough_pool.remove(server)
+        if server in self._relays:
+            task = asyncio.create_task(self._close_relays(server, drain_timeout))
+            self._backend_drains.add(task)
+            task.add_done_callback(self._backend_drains.discard)
+
+    async def _close_relays(self, server: Server, delay: float):
+        """Close the relays still open to a removed backend once its drain timeout passes."""
+        await asyncio.sleep(delay)
+        relays = list(self._relays.get(server, ()))
+        if relays:
+            self.logger.info(f"Closing {len(relays)} relays to removed backend {server.host}:{server.port}.")
+        for task in relays:
+            task.cancel()
+
+    async def reload(self, config: LoadBalancerConfig):
+        """
+        Apply the ``load_balance`` section of a reloaded configuration while running.
+
+        The server list is diffed against the live pool: unchanged backends keep
+        their health, algorithm counters and warm upstream connections. Removed
+        ones get no new work, and their in-flight requests and TCP relays get
+        ``drain.backend_timeout`` seconds to finish. The algorithm is only rebuilt
+        when ``algorithms`` or its ``options`` change. Other sections take effect on restart.
+        """
+        added, removed, reweighted = await self.server_pool.update(config.load_balance.servers)
+        for server in removed:
+            await self._forget_server(server, self.config.drain.backend_timeout)
+
+        if (config.load_balance.algorithms != self.config.load_balance.algorithms
+                or config.load_balance.options != self.config.load_balance.options):
+            # Requests still in flight are released against the new algorithm, which at
+            # worst undercounts their backends until they finish
+            self.algorithm = AlgorithmFactory().build(
+                algorithm_type=config.load_balance.algorithms, options=config.load_balance.options
+            )
+            self.algorithm_context.algorithm = self.algorithm
+            self.logger.info(f"Switched to the {config.load_balance.algorithms} algorithm.")
+
+        self.config = self.config.model_copy(update={
+            "load_balance": config.load_balance.model_copy(update={"servers": self.server_pool.servers})
+        })
+        if added or removed or reweighted:
+            self.logger.info(
+                f"Reloaded servers: {len(added)} added, {len(removed)} removed, {len(reweighted)} reweighted."
+            )
 
     async def shutdown(self):
-        """Gracefully shutdown the load balancer."""
+        """
+        Gracefully shutdown the load balancer: stop accepting, give in-flight
+        HTTP requests and TCP connections up to ``drain.timeout`` seconds to
+        finish, then close the rest.
+        """
+        if self.draining:
+            return
         self.logger.info("Initiating LoadBalancer shutdown...")
+        self.draining = True
+        self._closing.set()
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+        for client in list(self._http_clients):
+            client.close_if_idle()
+        if self._accept_task is not None:
+            self._accept_task.cancel()
+        for task in self._backend_drains:
+            task.cancel()
+
+        drains = [self._drain_tcp()]
+        if self._runner is not None:
+            # Stops the listener, closes idle keep-alive connections and waits for handlers
+            drains.append(self._runner.cleanup())
+            self._runner = None
+        await asyncio.gather(*drains)
+
         await self.health_check.close()
+        await self.upstream_pool.close()
+        if self.passthrough_pool is not None:
+            self.passthrough_pool.close()
+        if self.metrics is not None:
+            await self.metrics.close()
         self.logger.info("LoadBalancer shutdown completed.")
+
+    async def _drain_tcp(self):
+        if not self._connections:
+            return
+        self.logger.info(f"Draining {len(self._connections)} TCP connections.")
+        _, pending = await asyncio.wait(set(self._connections), timeout=self.config.drain.timeout)
+        if pending:
+            self.logger.warning(f"Closing {len(pending)} TCP connections still open after the drain timeout.")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
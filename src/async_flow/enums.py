@@ -10,3 +10,24 @@ class AlgorithmType(Enum):
     ROUND_ROBIN = "round_robin"
     WEIGHTED_ROUND_ROBIN = "weighted_round_robin"
     LEAST_CONNECTIONS = "least_connections"
+    POWER_OF_TWO_CHOICES = "p2c"
+    PEAK_EWMA = "peak_ewma"
+    CONSISTENT_HASH = "consistent_hash"
+
+
+class HashKeySource(Enum):
+    CLIENT_IP = "client_ip"
+    HEADER = "header"
+    COOKIE = "cookie"
+    PATH = "path"
+
+
+class TcpRelayEngine(Enum):
+    PROTOCOL = "protocol"
+    STREAM = "stream"
+    SPLICE = "splice"
+
+
+class HttpEngine(Enum):
+    AIOHTTP = "aiohttp"
+    PASSTHROUGH = "passthrough"
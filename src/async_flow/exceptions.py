@@ -2,4 +2,24 @@ class Error(Exception):
     pass
 
 class UnsupportedOperation(Error):
-    pass
\ No newline at end of file
+    pass
+
+class UpstreamStreamError(Error):
+    """Raised when an upstream response fails after it started streaming to the client."""
+    pass
+
+class HttpProtocolError(Error):
+    """Raised for a malformed or unsupported HTTP message; ``status`` is the response it calls for."""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+
+class UpstreamClosedError(Error):
+    """Raised when a backend connection closes before its response is complete."""
+
+    def __init__(self, responded: bool):
+        super().__init__("Upstream connection closed" + (" mid-response" if responded else " before responding"))
+        # Whether part of the response already reached the client
+        self.responded = responded
@@ -1,12 +1,17 @@
 import asyncio
+import heapq
 import logging
-from typing import Optional, Protocol
+import random
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import aiohttp
 
 from src.async_flow.enums import ProtocolType
+from src.async_flow.metrics import Metrics
 from src.async_flow.models.config import HealthCheck as HealthCheckConfig
-from src.async_flow.protocol_health_check.base import ProtocolStrategy
+from src.async_flow.outlier import OutlierDetector
+from src.async_flow.protocol_health_check.base import HealthCheckStrategy
 from src.async_flow.protocol_health_check.http import HttpHealthCheckStrategy
 from src.async_flow.protocol_health_check.tcp import TcpHealthCheckStrategy
 
@@ -19,7 +24,7 @@ class HealthCheckProtocolStrategyFactory:
             session: Optional[aiohttp.ClientSession] = None,
             timeout: int = 5,
             health_check_path: str = "/health"
-    ) -> ProtocolStrategy:
+    ) -> HealthCheckStrategy:
         match protocol_type:
             case ProtocolType.TCP.value:
                 return TcpHealthCheckStrategy(timeout)
@@ -30,8 +35,17 @@ class HealthCheckProtocolStrategyFactory:
 
 
 class HealthCheck:
-    def __init__(self, server_pool: ServerPool, config: HealthCheckConfig, protocol: str = 'http'):
+    def __init__(
+            self,
+            server_pool: ServerPool,
+            config: HealthCheckConfig,
+            protocol: str = 'http',
+            outlier_detector: Optional[OutlierDetector] = None,
+            metrics: Optional[Metrics] = None
+    ):
         self.server_pool = server_pool
+        self.outlier_detector = outlier_detector
+        self.metrics = metrics
         self.config = config
         self.protocol = protocol
         self.interval = config.interval
@@ -46,7 +60,24 @@ class HealthCheck:
         self.max_retries = getattr(config, 'retries', 3)
         self.retry_delay = getattr(config, 'retry_delay', 2)  # seconds
 
-        self.health_check_strategy: Optional[ProtocolStrategy] = None
+        # Scheduling settings
+        self.jitter = getattr(config, 'jitter', 0.1)  # fraction of the interval
+        self.max_concurrent = getattr(config, 'max_concurrent', 100)
+
+        self.health_check_strategy: Optional[HealthCheckStrategy] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # (due time, tie breaker, server) for every scheduled probe
+        self._schedule: List[Tuple[float, int, Any]] = []
+        self._sequence = 0
+        self._members: Set = set()
+        # Servers with a queued or running probe
+        self._scheduled: Set = set()
+        self._pool_version: Optional[int] = None
+        self._failed_attempts: Dict[Any, int] = {}
+        self._probes: Set[asyncio.Task] = set()
+        self._probe_limit = asyncio.Semaphore(self.max_concurrent)
+        self._wakeup = asyncio.Event()
 
     async def start(self):
         """Initialize resources and start the health checker."""
@@ -69,64 +100,148 @@ class HealthCheck:
 
         self.running = True
         self.logger.info("Health Checker has begun.")
-        await asyncio.create_task(self.run())
+        # Run in the background; awaiting the task here would block the caller forever
+        self._task = asyncio.create_task(self.run())
 
     async def run(self):
-        """Continuously perform health checks at specified intervals."""
+        """
+        Schedule probes for every server independently.
+
+        Each server has its own due time on a heap: the first probe is spread
+        over one interval and later ones are jittered, so probes never fire in
+        lockstep. A semaphore bounds concurrent probes, and a failed probe's
+        retry is queued with backoff instead of sleeping, so a dead server never
+        delays the probes of the others.
+        """
         try:
             while self.running:
-                servers = self.server_pool.get_all_servers()
-                if not servers:
+                self._sync_schedule()
+                if not self._schedule:
                     self.logger.warning("No servers available for health checks.")
-                else:
-                    tasks = [self.check_server(server) for server in servers ]
-                    await asyncio.gather(*tasks, return_exceptions=True)
-                await asyncio.sleep(self.interval)
+                    await self._wait_for_wakeup(self.interval)
+                    continue
+
+                due, _, server = self._schedule[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await self._wait_for_wakeup(delay)
+                    continue
+
+                heapq.heappop(self._schedule)
+                if server not in self._members:
+                    # Removed from the pool since it was scheduled
+                    self._scheduled.discard(server)
+                    continue
+
+                await self._probe_limit.acquire()
+                probe = asyncio.create_task(self._probe(server))
+                self._probes.add(probe)
+                probe.add_done_callback(self._probes.discard)
         except asyncio.CancelledError:
             self.logger.info("HealthChecker task cancelled.")
         finally:
             await self.close()
 
+    def _sync_schedule(self):
+        """Schedule servers that joined the pool; removed ones are dropped when they come due."""
+        if self._pool_version == self.server_pool.version:
+            return
+        self._pool_version = self.server_pool.version
+
+        servers = self.server_pool.get_all_servers()
+        now = time.monotonic()
+        self._members = set(servers)
+        for server in servers:
+            if server not in self._scheduled:
+                self._push(server, now + random.uniform(0, self.interval))
+
+    def _push(self, server, due: float):
+        self._scheduled.add(server)
+        self._sequence += 1
+        heapq.heappush(self._schedule, (due, self._sequence, server))
+        self._wakeup.set()
+
+    async def _wait_for_wakeup(self, delay: float):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    def _next_interval(self) -> float:
+        spread = self.interval * self.jitter
+        return self.interval + random.uniform(-spread, spread)
+
+    async def _probe(self, server):
+        try:
+            delay = await self.check_server(server)
+        finally:
+            self._probe_limit.release()
+        if self.running and server in self._members:
+            self._push(server, time.monotonic() + delay)
+        else:
+            self._scheduled.discard(server)
+
+    async def check_server(self, server) -> float:
+        """
+        Run one health check attempt on a single server based on the protocol.
+
+        :return: Seconds until the server should be probed again.
+        """
+        try:
+            is_healthy = await self.health_check_strategy.check_health(server)
+            if not is_healthy:
+                raise ValueError("Health check failed.")
+        except Exception as e:
+            attempt = self._failed_attempts.get(server, 0) + 1
+            self.logger.error(
+                f"Error checking server {server}: {e} (Attempt {attempt}/{self.max_retries})"
+            )
+            if attempt < self.max_retries:
+                self._failed_attempts[server] = attempt
+                backoff = self.retry_delay * 2 ** (attempt - 1)
+                self.logger.info(f"Retrying in {backoff} seconds...")
+                return backoff
+
+            self._failed_attempts.pop(server, None)
+            await self.mark_unhealthy(server)
+            return self._next_interval()
 
-    async def check_server(self, server):
-        """Check the health of a single server based on the protocol."""
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                is_healthy = await self.health_check_strategy.check_health(server)
-                if is_healthy:
-                    await self.mark_healthy(server)
-                else:
-                    raise ValueError("Health check failed.")
-                break
-            except Exception as e:
-                self.logger.error(
-                    f"Error checking server {server}: {e} (Attempt {attempt}/{self.max_retries})"
-                )
-
-                if attempt < self.max_retries:
-                    backoff = self.retry_delay * 2 ** (attempt - 1)
-                    self.logger.info(f"Retrying in {backoff} seconds...")
-                    await asyncio.sleep(backoff)
-                else:
-                    await self.mark_unhealthy(server)
+        self._failed_attempts.pop(server, None)
+        await self.mark_healthy(server)
+        return self._next_interval()
 
     async def mark_healthy(self, server):
         """Mark a server as healthy."""
+        if self.outlier_detector is not None:
+            if self.outlier_detector.is_ejected(server):
+                # Passing probes do not cut an ejection short
+                return
         old_mark = await self.server_pool.mark_healthy(server)
         if old_mark:
             self.logger.info(f"Server {server} marked as healthy.")
+            if self.metrics is not None:
+                self.metrics.health_transition(server, healthy=True)
+            if self.outlier_detector is not None:
+                self.outlier_detector.reinstated(server)
 
     async def mark_unhealthy(self, server):
         """Mark a server as unhealthy."""
         old_mark = await self.server_pool.mark_unhealthy(server)
         if old_mark:
             self.logger.info(f"Server {server} marked as unhealthy.")
+            if self.metrics is not None:
+                self.metrics.health_transition(server, healthy=False)
 
     async def close(self):
         """Clean up resources."""
         if self.running:
             self.running = False
             self.logger.info("Shutting down HealthChecker.")
+        if self._task and not self._task.done() and self._task is not asyncio.current_task():
+            self._task.cancel()
+        for probe in list(self._probes):
+            probe.cancel()
         if self.session and not self.session.closed:
             await self.session.close()
             self.logger.info("HTTP session closed.")
\ No newline at end of file
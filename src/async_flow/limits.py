@@ -0,0 +1,146 @@
+import asyncio
+import time
+from collections import deque
+from typing import AbstractSet, Deque, Dict, Optional, Sequence, Set
+
+from src.async_flow.models.config import ConcurrencyLimit as ConcurrencyLimitConfig, Server
+
+# Share of the distance to a slower sample the latency baseline moves per sample,
+# so it follows a backend that really got slower but not a short overload
+BASELINE_DRIFT = 0.01
+
+
+class _BackendLimit:
+    __slots__ = ("limit", "baseline", "decreased_at")
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.baseline: Optional[float] = None
+        self.decreased_at = 0.0
+
+
+class ConcurrencyLimiter:
+    """
+    Caps the requests and connections in flight to each backend.
+
+    In-flight counts live in ``Server.active_connections``. A backend at its
+    limit is skipped; when every healthy backend is full, requests wait in a
+    FIFO queue of ``queue_size`` for up to ``queue_timeout`` seconds and are
+    shed with a 503 beyond that, so overload is refused early instead of
+    piling onto backends that are already slow.
+
+    With ``adaptive`` the limit of each backend follows AIMD on its latency:
+    it grows by one per limit's worth of samples while the backend is busy,
+    and is multiplied by ``backoff``, at most once per round trip, when an
+    attempt fails or takes longer than ``latency_tolerance`` times the
+    backend's baseline latency.
+    """
+
+    def __init__(self, config: ConcurrencyLimitConfig):
+        self.config = config
+        self._limits: Dict[Server, _BackendLimit] = {}
+        # Backends at their limit, to tell in O(1) when all of them are
+        self._saturated: Set[Server] = set()
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def limit(self, server: Server) -> int:
+        """Current limit of ``server``."""
+        state = self._limits.get(server)
+        if state is None:
+            return self.config.max_connections
+        return int(state.limit)
+
+    def try_acquire(self, server: Server) -> bool:
+        """Take a slot on ``server``; False if it is full."""
+        state = self._limits.get(server)
+        if state is None:
+            state = self._limits[server] = _BackendLimit(float(self.config.max_connections))
+        limit = int(state.limit)
+        if server.active_connections >= limit:
+            self._saturated.add(server)
+            return False
+        server.active_connections += 1
+        if server.active_connections >= limit:
+            self._saturated.add(server)
+        return True
+
+    def release(self, server: Server, latency: Optional[float] = None, failed: bool = False):
+        """
+        Free the slot taken on ``server``. ``latency`` is the response or connect
+        time of the attempt, None if there was no response.
+        """
+        state = self._limits.get(server)
+        if state is not None and self.config.adaptive:
+            self._adapt(server, state, latency, failed)
+        server.active_connections -= 1
+        if state is None or server.active_connections < int(state.limit):
+            self._saturated.discard(server)
+            self._wake()
+
+    def _adapt(self, server: Server, state: _BackendLimit, latency: Optional[float], failed: bool):
+        config = self.config
+        if latency is not None:
+            if state.baseline is None or latency < state.baseline:
+                state.baseline = latency
+            else:
+                state.baseline += (latency - state.baseline) * BASELINE_DRIFT
+
+        if failed or (latency is not None and latency > config.latency_tolerance * state.baseline):
+            now = time.monotonic()
+            # Every attempt in flight during the slowdown reports it; back off once per round trip
+            if now - state.decreased_at >= (latency or state.baseline or 0.0):
+                state.decreased_at = now
+                state.limit = max(float(config.min_connections), state.limit * config.backoff)
+                if server.active_connections >= int(state.limit):
+                    self._saturated.add(server)
+        elif server.active_connections * 2 >= state.limit:
+            # Only grow while the limit is what bounds the backend
+            state.limit = min(float(config.max_connections), state.limit + 1.0 / state.limit)
+
+    @property
+    def saturated(self) -> AbstractSet[Server]:
+        """Backends at their limit; do not modify."""
+        return self._saturated
+
+    def all_saturated(self, servers: Sequence[Server]) -> bool:
+        """Whether every server in ``servers`` is at its limit."""
+        saturated = self._saturated
+        if len(saturated) < len(servers):
+            return False
+        return all(server in saturated for server in servers)
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Queue until a slot is released anywhere. False if the queue is full or
+        ``timeout`` passes first.
+        """
+        if timeout <= 0 or len(self._waiters) >= self.config.queue_size:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if waiter.cancelled():
+                # Timed out or cancelled; woken waiters were already popped
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def _wake(self):
+        waiters = self._waiters
+        while waiters:
+            waiter = waiters.popleft()
+            # Skip waiters cancelled but not yet out of the queue
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def forget(self, server: Server):
+        """Drop the state of a backend removed from the pool; its in-flight attempts still release."""
+        self._limits.pop(server, None)
+        self._saturated.discard(server)
@@ -1,9 +1,28 @@
 # logger.py
 
+import atexit
 import logging
+import os
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from queue import SimpleQueue
+from typing import Optional
+
+# The root logger only enqueues records; this thread formats and writes them
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class _LocalQueueHandler(QueueHandler):
+    """
+    Enqueue records untouched. The stock QueueHandler formats every record in
+    the calling thread to make it picklable; the queue never leaves this
+    process, so formatting is left to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 def setup_logging(
@@ -25,7 +44,12 @@ def setup_logging(
     :param log_file: File path for the log file
     :param max_bytes: Maximum size in bytes for the log file before rotation
     :param backup_count: Number of backup log files to keep
+
+    Records are handed to a queue on the calling thread and written by a
+    listener thread, so console and file I/O (including rotation) never
+    block the event loop.
     """
+    global _listener, _queue_handler
 
     # Ensure the log directory exists
     log_path = Path(log_dir)
@@ -37,6 +61,7 @@ def setup_logging(
 
     logger = logging.getLogger()
     logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
+    stop_logging()
 
     formatter = logging.Formatter(fmt=log_format, datefmt=date_format)
 
@@ -44,7 +69,6 @@ def setup_logging(
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(getattr(logging, log_level.upper(), logging.INFO))
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
 
     # File Handler with Rotation
     file_handler = RotatingFileHandler(
@@ -52,7 +76,71 @@ def setup_logging(
     )
     file_handler.setLevel(getattr(logging, log_level.upper(), logging.INFO))
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+
+    _queue_handler = _LocalQueueHandler(SimpleQueue())
+    logger.addHandler(_queue_handler)
+    _listener = QueueListener(_queue_handler.queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def set_log_level(log_level: str):
+    """Change the level of the root logger and its output handlers."""
+    level = getattr(logging, log_level.upper(), logging.INFO)
+    logging.getLogger().setLevel(level)
+    if _listener is not None:
+        for handler in _listener.handlers:
+            handler.setLevel(level)
+
+
+def stop_logging():
+    """Write out the queued records and stop the listener thread."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+def _restart_listener_in_child():
+    # Threads do not survive fork(); give forked workers their own queue and listener
+    global _listener
+    if _listener is not None:
+        _queue_handler.queue = SimpleQueue()
+        _listener = QueueListener(_queue_handler.queue, *_listener.handlers, respect_handler_level=True)
+        _listener.start()
+
+
+def use_worker_log_file(slot: int):
+    """
+    Switch this process's log file to one of its own, suffixed with the worker
+    ``slot``. Forked workers that shared the supervisor's RotatingFileHandler
+    would each rotate the file by their own stream position and lose records.
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    handlers = []
+    for handler in _listener.handlers:
+        if isinstance(handler, RotatingFileHandler):
+            base, ext = os.path.splitext(handler.baseFilename)
+            # Only this process's descriptor is closed; the supervisor keeps its file open
+            handler.close()
+            worker_handler = RotatingFileHandler(
+                f"{base}.worker-{slot}{ext}", maxBytes=handler.maxBytes, backupCount=handler.backupCount
+            )
+            worker_handler.setLevel(handler.level)
+            worker_handler.setFormatter(handler.formatter)
+            handler = worker_handler
+        handlers.append(handler)
+    _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_listener_in_child)
 
 def get_logger(name: str) -> logging.Logger:
     """
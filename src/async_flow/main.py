@@ -1,9 +1,22 @@
 import asyncio
 import sys
 
-from src.async_flow.logger import setup_logging
+from src.async_flow.logger import set_log_level, setup_logging
 from src.async_flow.core import LoadBalancer
 from src.async_flow.config import Config
+from src.async_flow.reload import ConfigReloader
+from src.async_flow.workers import WorkerSupervisor
+
+
+async def serve(load_balancer: LoadBalancer, config_loader: Config):
+    """Run the load balancer, reloading its configuration on SIGHUP or file change."""
+    reloader = ConfigReloader(config_loader, load_balancer)
+    await reloader.start()
+    try:
+        # Drains in-flight requests and connections on SIGINT/SIGTERM
+        await load_balancer.serve()
+    finally:
+        await reloader.close()
 
 
 def main():
@@ -26,6 +39,7 @@ def main():
     parser = argparse.ArgumentParser(description="Stealth PAWS is a load balancer written in Python")
     parser.add_argument('--config', type=str, required=True, help='Path to the configuration file')
     parser.add_argument('--type', type=str, required=True, choices=['yaml', 'json', 'toml'], help='Configuration file type')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes sharing the listener (SO_REUSEPORT)')
     args = parser.parse_args()
 
     is_yaml = args.type.lower() == 'yaml'
@@ -42,23 +56,25 @@ def main():
     try:
         config = config_loader.get_config()
         logger.info(f"succesfully loaded configuration")
+        set_log_level(config.logging.level)
     except Exception as e:
         logger.error(f"Failed to load configuration: {e}")
         sys.exit(1)
 
     print(config)
 
+    if args.workers > 1:
+        WorkerSupervisor(config, workers=args.workers, config_loader=config_loader).run()
+        return
+
     # Initialize and start LoadBalancer
     load_balancer = LoadBalancer(config)
     try:
-        asyncio.run(load_balancer.start())
+        asyncio.run(serve(load_balancer, config_loader))
     except KeyboardInterrupt:
         logger.info("LoadBalancer shutdown initiated by user.")
     except Exception as e:
         logger.exception(f"LoadBalancer encountered an error: {e}")
-    finally:
-        load_balancer.shutdown()
-
 
 
 if __name__ == "__main__":
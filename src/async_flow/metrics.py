@@ -0,0 +1,223 @@
+import asyncio
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+
+import aiohttp
+from aiohttp import web
+
+from src.async_flow.logger import get_logger
+from src.async_flow.models.config import Metrics as MetricsConfig, Server
+
+# Error classes counted per backend; record() takes an index into this tuple
+ERROR_CLASSES = ("connect", "timeout", "http_5xx", "other")
+CONNECT_ERROR, TIMEOUT_ERROR, HTTP_5XX_ERROR, OTHER_ERROR = range(len(ERROR_CLASSES))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def classify_error(error: BaseException) -> int:
+    """Map an upstream exception to its index in ERROR_CLASSES."""
+    if isinstance(error, (aiohttp.ClientConnectorError, ConnectionRefusedError)):
+        return CONNECT_ERROR
+    if isinstance(error, asyncio.TimeoutError):
+        return TIMEOUT_ERROR
+    return OTHER_ERROR
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() only bumps preallocated counters."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        # One slot per bound plus +Inf
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class BackendMetrics:
+    __slots__ = ("label", "requests", "errors", "in_flight", "bytes_upstream", "bytes_downstream",
+                 "became_healthy", "became_unhealthy", "latency")
+
+    def __init__(self, server: Server, buckets: Sequence[float]):
+        self.label = f"{server.host}:{server.port}"
+        self.requests = 0
+        self.errors = [0] * len(ERROR_CLASSES)
+        self.in_flight = 0
+        self.bytes_upstream = 0
+        self.bytes_downstream = 0
+        self.became_healthy = 0
+        self.became_unhealthy = 0
+        self.latency = Histogram(buckets)
+
+
+class Metrics:
+    """
+    Per-backend counters and latency histograms, exposed in the Prometheus
+    text format on a separate admin listener.
+
+    Recording is O(1) and only touches preallocated counters; the per-backend
+    record is created the first time a backend is seen. In-flight gauges are
+    read from the algorithm's own connection counters when it keeps them
+    (least connections, p2c, peak EWMA).
+    """
+
+    def __init__(self, config: MetricsConfig):
+        self.config = config
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._backends: Dict[Server, BackendMetrics] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    def backend(self, server: Server) -> BackendMetrics:
+        metrics = self._backends.get(server)
+        if metrics is None:
+            metrics = self._backends[server] = BackendMetrics(server, self.config.latency_buckets)
+        return metrics
+
+    def started(self, server: Server):
+        """A request or connection was sent to ``server``."""
+        metrics = self.backend(server)
+        metrics.requests += 1
+        metrics.in_flight += 1
+
+    def finished(self, server: Server, duration: float, error: Optional[int] = None):
+        """The attempt on ``server`` ended after ``duration`` seconds, with an ERROR_CLASSES index on failure."""
+        metrics = self.backend(server)
+        metrics.in_flight -= 1
+        metrics.latency.observe(duration)
+        if error is not None:
+            metrics.errors[error] += 1
+
+    def relayed(self, server: Server, upstream: int, downstream: int):
+        """Bytes a TCP connection moved to and from ``server``."""
+        metrics = self.backend(server)
+        metrics.bytes_upstream += upstream
+        metrics.bytes_downstream += downstream
+
+    def health_transition(self, server: Server, healthy: bool):
+        metrics = self.backend(server)
+        if healthy:
+            metrics.became_healthy += 1
+        else:
+            metrics.became_unhealthy += 1
+
+    def forget(self, server: Server):
+        """Stop exporting a backend removed from the pool."""
+        self._backends.pop(server, None)
+
+    def render(self, load_balancer) -> str:
+        """Text exposition of the load balancer's counters and the per-backend metrics."""
+        lines: List[str] = []
+
+        def family(name: str, kind: str, description: str):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for field in load_balancer.STAT_FIELDS:
+            if field == "active":
+                family("asyncflow_active", "gauge", "Requests and connections being handled.")
+                lines.append(f"asyncflow_active {load_balancer.stats[field]}")
+            else:
+                family(f"asyncflow_{field}_total", "counter", f"Load balancer '{field}' counter.")
+                lines.append(f"asyncflow_{field}_total {load_balancer.stats[field]}")
+
+        backends = list(self._backends.items())
+        algorithm = load_balancer.algorithm_context.algorithm
+        active_connections = getattr(algorithm, "active_connections", None)
+
+        family("asyncflow_backend_requests_total", "counter", "Attempts sent to the backend.")
+        for _, metrics in backends:
+            lines.append(f'asyncflow_backend_requests_total{{backend="{metrics.label}"}} {metrics.requests}')
+
+        family("asyncflow_backend_errors_total", "counter", "Failed attempts by error class.")
+        for _, metrics in backends:
+            for index, error_class in enumerate(ERROR_CLASSES):
+                lines.append(
+                    f'asyncflow_backend_errors_total{{backend="{metrics.label}",class="{error_class}"}} '
+                    f'{metrics.errors[index]}'
+                )
+
+        family("asyncflow_backend_in_flight", "gauge", "Requests or connections currently on the backend.")
+        for server, metrics in backends:
+            in_flight = active_connections(server) if active_connections is not None else metrics.in_flight
+            lines.append(f'asyncflow_backend_in_flight{{backend="{metrics.label}"}} {in_flight}')
+
+        limiter = load_balancer.limiter
+        if limiter is not None:
+            family("asyncflow_backend_concurrency_limit", "gauge", "Requests or connections the backend may have in flight.")
+            for server, metrics in backends:
+                lines.append(f'asyncflow_backend_concurrency_limit{{backend="{metrics.label}"}} {limiter.limit(server)}')
+
+        family("asyncflow_backend_healthy", "gauge", "Whether the backend is in the healthy set.")
+        for server, metrics in backends:
+            lines.append(f'asyncflow_backend_healthy{{backend="{metrics.label}"}} {int(server.healthy)}')
+
+        family("asyncflow_backend_health_transitions_total", "counter", "Health state changes of the backend.")
+        for _, metrics in backends:
+            lines.append(
+                f'asyncflow_backend_health_transitions_total{{backend="{metrics.label}",to="healthy"}} '
+                f'{metrics.became_healthy}'
+            )
+            lines.append(
+                f'asyncflow_backend_health_transitions_total{{backend="{metrics.label}",to="unhealthy"}} '
+                f'{metrics.became_unhealthy}'
+            )
+
+        family("asyncflow_backend_tcp_bytes_total", "counter", "Bytes relayed over TCP connections.")
+        for _, metrics in backends:
+            lines.append(
+                f'asyncflow_backend_tcp_bytes_total{{backend="{metrics.label}",direction="upstream"}} '
+                f'{metrics.bytes_upstream}'
+            )
+            lines.append(
+                f'asyncflow_backend_tcp_bytes_total{{backend="{metrics.label}",direction="downstream"}} '
+                f'{metrics.bytes_downstream}'
+            )
+
+        family(
+            "asyncflow_backend_latency_seconds", "histogram",
+            "HTTP response time or TCP connect time of the backend."
+        )
+        for _, metrics in backends:
+            histogram = metrics.latency
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'asyncflow_backend_latency_seconds_bucket{{backend="{metrics.label}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'asyncflow_backend_latency_seconds_bucket{{backend="{metrics.label}",le="+Inf"}} {histogram.count}'
+            )
+            lines.append(f'asyncflow_backend_latency_seconds_sum{{backend="{metrics.label}"}} {histogram.sum}')
+            lines.append(f'asyncflow_backend_latency_seconds_count{{backend="{metrics.label}"}} {histogram.count}')
+
+        lines.append("")
+        return "\n".join(lines)
+
+    async def start(self, load_balancer):
+        """Serve the metrics on the admin listener."""
+
+        async def handle_metrics(request: web.Request) -> web.Response:
+            return web.Response(body=self.render(load_balancer).encode(), headers={"Content-Type": CONTENT_TYPE})
+
+        app = web.Application()
+        app.router.add_get(self.config.path, handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.config.host, self.config.port)
+        await site.start()
+        self.logger.info(f"Metrics available on http://{self.config.host}:{self.config.port}{self.config.path}")
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
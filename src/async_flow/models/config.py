@@ -1,15 +1,16 @@
 import asyncio
 import os
 from typing import List, Optional
-from pydantic import Field, BaseModel, field_validator, ValidationError, PrivateAttr
+from pydantic import Field, BaseModel, field_validator, model_validator, ValidationError, PrivateAttr
 
-from src.async_flow.enums import ProtocolType, AlgorithmType
+from src.async_flow.enums import ProtocolType, AlgorithmType, HashKeySource, TcpRelayEngine, HttpEngine
 
 
 class Listen(BaseModel):
     host: str = Field(default_factory=lambda: os.getenv('LB_LISTEN_HOST', '0.0.0.0'))
     port: int = Field(..., ge=1, le=65535)
     protocol: str
+    reuse_port: bool = Field(default=False, description="Bind with SO_REUSEPORT so several workers share the port")
 
     @field_validator('protocol')
     def validate_protocol(cls, v):
@@ -38,6 +39,11 @@ class Server(BaseModel):
     # Private attribute for lock
     _lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
 
+    def __hash__(self):
+        # Instances are compared including their private lock, so equal means identical;
+        # hashing on the address lets algorithms key per-server state on the model itself.
+        return hash((self.host, self.port))
+
     @field_validator('host')
     def validate_host(cls, v):
         import socket
@@ -48,9 +54,43 @@ class Server(BaseModel):
             raise ValueError(f"Invalid Server's IP address: {v}")
 
 
+class HashKey(BaseModel):
+    source: str = Field(default=HashKeySource.CLIENT_IP.value, description="Request attribute used as routing key")
+    name: Optional[str] = Field(default=None, description="Header or cookie name")
+    path_segments: int = Field(default=1, ge=1, description="Leading path segments forming the key")
+
+    @field_validator('source')
+    def validate_source(cls, v):
+        v = v.lower()
+        valid_sources = [source.value for source in HashKeySource]
+        if v not in valid_sources:
+            raise ValueError(f"Invalid hash key source '{v}'. Valid options are: {', '.join(valid_sources)}")
+        return v
+
+    @model_validator(mode='after')
+    def validate_name(self):
+        if self.source in (HashKeySource.HEADER.value, HashKeySource.COOKIE.value) and not self.name:
+            raise ValueError(f"Hash key source '{self.source}' requires a name")
+        return self
+
+
+class AlgorithmOptions(BaseModel):
+    use_weights: bool = Field(
+        default=True, description="Scale outstanding requests by Server.weight in 'p2c' and 'peak_ewma'"
+    )
+    decay_time: float = Field(
+        default=10.0, gt=0, description="'peak_ewma': seconds for a latency sample's influence to fall to 1/e"
+    )
+    default_rtt: float = Field(
+        default=0.1, gt=0, description="'peak_ewma': latency assumed for backends without samples, in seconds"
+    )
+
+
 class LoadBalance(BaseModel):
     algorithms: str
     servers: List[Server]
+    hash_key: HashKey = Field(default_factory=HashKey)
+    options: AlgorithmOptions = Field(default_factory=AlgorithmOptions)
 
     @field_validator('algorithms')
     def validate_algorithms(cls, v):
@@ -66,6 +106,9 @@ class HealthCheck(BaseModel):
     timeout: int = Field(gt=0, description="Timeout must be a positive integer")
     path: str = Field(default="/health", description="Path must start with '/'")
     retries: Optional[int] = Field(default=3, gt=0, description="Retries must be a positive integer")
+    retry_delay: float = Field(default=2, gt=0, description="Seconds before the first retry, doubled per attempt")
+    jitter: float = Field(default=0.1, ge=0, lt=1, description="Random spread of each interval, as a fraction")
+    max_concurrent: int = Field(default=100, gt=0, description="Probes allowed to run at the same time")
 
     @field_validator('path')
     def validate_path(cls, v):
@@ -74,8 +117,199 @@ class HealthCheck(BaseModel):
         return v
 
 
+class OutlierDetection(BaseModel):
+    enabled: bool = Field(default=False, description="Eject backends that fail on live traffic")
+    consecutive_errors: int = Field(default=5, gt=0, description="Failures in a row that eject a backend")
+    failure_rate: float = Field(default=0.5, gt=0, le=1, description="Failure fraction per interval that ejects a backend")
+    min_requests: int = Field(default=20, gt=0, description="Requests per interval before the failure rate counts")
+    interval: float = Field(default=10.0, gt=0, description="Seconds per failure rate window")
+    base_ejection_time: float = Field(default=30.0, gt=0, description="Seconds of the first ejection, doubled on repeats")
+    max_ejection_time: float = Field(default=300.0, gt=0, description="Upper bound for the ejection time")
+    max_ejection_percent: int = Field(default=10, ge=0, le=100, description="Share of the pool that may be ejected")
+
+
+class UpstreamPool(BaseModel):
+    max_connections: int = Field(default=1000, gt=0, description="Upstream connections across all backends")
+    max_connections_per_host: int = Field(default=100, gt=0, description="Upstream connections per backend")
+    keepalive_timeout: float = Field(default=15.0, gt=0, description="Seconds an idle connection is kept open")
+    max_requests_per_connection: Optional[int] = Field(
+        default=None, gt=0, description="Requests served before a connection is recycled"
+    )
+
+
+class Retry(BaseModel):
+    max_attempts: int = Field(
+        default=2, ge=1, description="Attempts per request or connection, each on a different backend; 1 disables retries"
+    )
+    budget_percent: float = Field(
+        default=20.0, ge=0, le=100, description="Retries allowed as a percentage of the requests in the budget window"
+    )
+    min_retries: int = Field(default=3, ge=0, description="Retries always allowed per budget window")
+    budget_window: float = Field(default=10.0, gt=0, description="Seconds of traffic the retry budget is measured over")
+    idempotent_methods: List[str] = Field(
+        default=["GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"],
+        description="HTTP methods also retried after the request was sent; others only on connect failures"
+    )
+
+    @field_validator('idempotent_methods')
+    def validate_idempotent_methods(cls, v):
+        return [method.upper() for method in v]
+
+
+class Proxy(BaseModel):
+    streaming: bool = Field(default=False, description="Stream request and response bodies instead of buffering")
+    buffer_threshold: int = Field(
+        default=64 * 1024, ge=0, description="Bodies up to this many bytes are still buffered when streaming"
+    )
+    chunk_size: int = Field(default=64 * 1024, gt=0, description="Bytes per chunk when streaming a body")
+    tcp_relay: str = Field(
+        default=TcpRelayEngine.PROTOCOL.value,
+        description=(
+            "TCP relay engine: 'protocol' relays between paired transports with pooled buffers, "
+            "'stream' copies through asyncio streams, 'splice' moves bytes in the kernel (Linux)"
+        )
+    )
+    http_engine: str = Field(
+        default=HttpEngine.AIOHTTP.value,
+        description=(
+            "HTTP engine: 'aiohttp' proxies through aiohttp with every feature, 'passthrough' parses only "
+            "the framing of HTTP/1.1 and relays the bytes on pooled backend connections"
+        )
+    )
+
+    @field_validator('tcp_relay')
+    def validate_tcp_relay(cls, v):
+        v = v.lower()
+        valid_engines = [engine.value for engine in TcpRelayEngine]
+        if v not in valid_engines:
+            raise ValueError(f"Invalid TCP relay engine '{v}'. Valid options are: {', '.join(valid_engines)}")
+        return v
+
+    @field_validator('http_engine')
+    def validate_http_engine(cls, v):
+        v = v.lower()
+        valid_engines = [engine.value for engine in HttpEngine]
+        if v not in valid_engines:
+            raise ValueError(f"Invalid HTTP engine '{v}'. Valid options are: {', '.join(valid_engines)}")
+        return v
+
+
+class ConcurrencyLimit(BaseModel):
+    enabled: bool = Field(default=False, description="Limit the requests and connections in flight to each backend")
+    max_connections: int = Field(default=100, gt=0, description="Requests or connections in flight per backend")
+    queue_size: int = Field(
+        default=100, ge=0, description="Requests waiting while every backend is full; beyond it they get a 503 at once"
+    )
+    queue_timeout: float = Field(default=1.0, gt=0, description="Seconds a queued request waits before a 503")
+    adaptive: bool = Field(
+        default=False, description="Lower each backend's limit below max_connections when its latency rises (AIMD)"
+    )
+    min_connections: int = Field(default=1, gt=0, description="Lower bound of the adaptive limit")
+    latency_tolerance: float = Field(
+        default=2.0, gt=1, description="Latency above this multiple of the backend's baseline shrinks its limit"
+    )
+    backoff: float = Field(default=0.9, gt=0, lt=1, description="Factor applied to the adaptive limit on a slow or failed attempt")
+
+    @model_validator(mode='after')
+    def validate_min_connections(self):
+        if self.min_connections > self.max_connections:
+            raise ValueError("min_connections must not exceed max_connections")
+        return self
+
+
+class RateLimit(BaseModel):
+    enabled: bool = Field(default=False, description="Limit the request and connection rate of each client")
+    rate: float = Field(default=100.0, gt=0, description="Requests or connections per second a client may sustain")
+    burst: int = Field(default=200, ge=1, description="Requests or connections a client may send at once")
+    header: Optional[str] = Field(
+        default=None, description="Key HTTP clients by this request header instead of their IP, when present"
+    )
+    max_clients: int = Field(
+        default=100_000, gt=0, description="Clients tracked at once; the longest idle one is dropped beyond it"
+    )
+
+
+class Cache(BaseModel):
+    enabled: bool = Field(default=False, description="Serve cacheable GET and HEAD responses from memory")
+    max_bytes: int = Field(default=64 * 1024 * 1024, gt=0, description="Memory bound of the cache, in bytes")
+    max_entry_bytes: int = Field(default=1024 * 1024, gt=0, description="Larger response bodies are not cached")
+
+
+class Coalescing(BaseModel):
+    enabled: bool = Field(default=False, description="Merge identical concurrent GET and HEAD requests into one")
+    vary_headers: List[str] = Field(default=[], description="Request headers that must also match to merge")
+    max_body_bytes: int = Field(default=1024 * 1024, gt=0, description="Larger responses are not shared")
+    wait_timeout: float = Field(
+        default=5.0, gt=0, description="Seconds a merged request waits before sending its own request"
+    )
+
+
+class Logging(BaseModel):
+    level: str = Field(default="INFO", description="Level of the application log")
+    access_log: bool = Field(default=True, description="Write one structured record per request or connection")
+    access_log_sample_rate: float = Field(
+        default=1.0, ge=0, le=1, description="Share of requests written to the access log"
+    )
+
+    @field_validator('level')
+    def validate_level(cls, v):
+        v = v.upper()
+        valid_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+        if v not in valid_levels:
+            raise ValueError(f"Invalid log level '{v}'. Valid options are: {', '.join(valid_levels)}")
+        return v
+
+
+class Metrics(BaseModel):
+    enabled: bool = Field(default=False, description="Serve Prometheus metrics on an admin listener")
+    host: str = Field(default="127.0.0.1", description="Admin listener address")
+    port: int = Field(default=9100, ge=1, le=65535, description="Admin listener port; worker N uses port + N")
+    path: str = Field(default="/metrics", description="Path the metrics are served on")
+    latency_buckets: List[float] = Field(
+        default=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0],
+        description="Upper bounds of the latency histogram buckets, in seconds"
+    )
+
+    @field_validator('latency_buckets')
+    def validate_latency_buckets(cls, v):
+        if not v or any(later <= earlier for earlier, later in zip(v, v[1:])):
+            raise ValueError("Latency buckets must be a non-empty, strictly increasing list")
+        return v
+
+
+class Reload(BaseModel):
+    watch: bool = Field(default=False, description="Also reload when the configuration file changes, not only on SIGHUP")
+    poll_interval: float = Field(default=2.0, gt=0, description="Seconds between checks of the configuration file")
+
+
+class Drain(BaseModel):
+    timeout: float = Field(
+        default=30.0, ge=0, description="Seconds in-flight requests and connections get on shutdown before being closed"
+    )
+    backend_timeout: float = Field(
+        default=30.0, ge=0, description="Seconds a removed backend keeps its in-flight requests and TCP relays"
+    )
+
+
 class LoadBalancerConfig(BaseModel):
     listen: Listen
     load_balance: LoadBalance
     health_check: HealthCheck
+    outlier_detection: OutlierDetection = Field(default_factory=OutlierDetection)
+    upstream: UpstreamPool = Field(default_factory=UpstreamPool)
+    proxy: Proxy = Field(default_factory=Proxy)
+    retry: Retry = Field(default_factory=Retry)
+    concurrency: ConcurrencyLimit = Field(default_factory=ConcurrencyLimit)
+    rate_limit: RateLimit = Field(default_factory=RateLimit)
+    cache: Cache = Field(default_factory=Cache)
+    coalescing: Coalescing = Field(default_factory=Coalescing)
+    logging: Logging = Field(default_factory=Logging)
+    metrics: Metrics = Field(default_factory=Metrics)
+    reload: Reload = Field(default_factory=Reload)
+    drain: Drain = Field(default_factory=Drain)
 
+    @model_validator(mode='after')
+    def validate_http_engine(self):
+        if self.proxy.http_engine == HttpEngine.PASSTHROUGH.value and (self.cache.enabled or self.coalescing.enabled):
+            raise ValueError("The passthrough HTTP engine does not support caching or request coalescing")
+        return self
@@ -0,0 +1,128 @@
+import time
+from typing import Dict, Optional, Set
+
+from src.async_flow.logger import get_logger
+from src.async_flow.metrics import Metrics
+from src.async_flow.models.config import OutlierDetection as OutlierDetectionConfig, Server
+from src.async_flow.server_pool import ServerPool
+
+
+class _BackendStats:
+    __slots__ = ("consecutive", "window_start", "requests", "failures", "ejections", "ejected_until", "healthy_since")
+
+    def __init__(self, now: float):
+        self.consecutive = 0
+        self.window_start = now
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.healthy_since = now
+
+
+class OutlierDetector:
+    """
+    Passive health checking from live traffic.
+
+    The proxy path reports every upstream outcome. A backend is ejected through
+    ``ServerPool.mark_unhealthy`` after ``consecutive_errors`` failures in a row
+    (connect errors, timeouts and 5xx responses), or when its failure rate over
+    ``interval`` reaches ``failure_rate`` with at least ``min_requests``.
+    Each repeated ejection doubles the ejection time up to ``max_ejection_time``,
+    and no more than ``max_ejection_percent`` of the pool is ejected at once
+    (one backend is always allowed). Ejected backends are reinstated by the
+    active HealthCheck once their ejection time is over.
+    """
+
+    def __init__(self, config: OutlierDetectionConfig, server_pool: ServerPool, metrics: Optional[Metrics] = None):
+        self.config = config
+        self.server_pool = server_pool
+        self.metrics = metrics
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._stats: Dict[Server, _BackendStats] = {}
+        self._ejected: Set[Server] = set()
+
+    def _get(self, server: Server, now: float) -> _BackendStats:
+        stats = self._stats.get(server)
+        if stats is None:
+            stats = self._stats[server] = _BackendStats(now)
+        return stats
+
+    def _roll_window(self, stats: _BackendStats, now: float):
+        if now - stats.window_start >= self.config.interval:
+            stats.window_start = now
+            stats.requests = 0
+            stats.failures = 0
+
+    def record_success(self, server: Server):
+        """Record a successful upstream exchange."""
+        now = time.monotonic()
+        stats = self._get(server, now)
+        self._roll_window(stats, now)
+        stats.requests += 1
+        stats.consecutive = 0
+
+        # Forget past ejections once the backend has behaved for a full max ejection time
+        if stats.ejections and now - stats.healthy_since >= self.config.max_ejection_time:
+            stats.ejections = 0
+
+    async def record_failure(self, server: Server, reason: str):
+        """Record a connect error, timeout or 5xx response, ejecting the backend if it is an outlier."""
+        now = time.monotonic()
+        stats = self._get(server, now)
+        self._roll_window(stats, now)
+        stats.requests += 1
+        stats.failures += 1
+        stats.consecutive += 1
+
+        if server in self._ejected:
+            return
+
+        config = self.config
+        if stats.consecutive >= config.consecutive_errors:
+            await self._eject(server, stats, now, f"{stats.consecutive} consecutive failures, last: {reason}")
+        elif stats.requests >= config.min_requests and stats.failures >= config.failure_rate * stats.requests:
+            await self._eject(server, stats, now, f"{stats.failures}/{stats.requests} failures, last: {reason}")
+
+    async def _eject(self, server: Server, stats: _BackendStats, now: float, cause: str):
+        total = len(self.server_pool.get_all_servers())
+        if self._ejected and (len(self._ejected) + 1) * 100 > self.config.max_ejection_percent * total:
+            self.logger.warning(f"Not ejecting {server.host}:{server.port} ({cause}): max ejection percent reached.")
+            return
+
+        ejection_time = min(
+            self.config.base_ejection_time * 2 ** stats.ejections,
+            self.config.max_ejection_time
+        )
+        stats.ejections += 1
+        stats.ejected_until = now + ejection_time
+        self._ejected.add(server)
+
+        if await self.server_pool.mark_unhealthy(server) and self.metrics is not None:
+            self.metrics.health_transition(server, healthy=False)
+        self.logger.warning(f"Ejected {server.host}:{server.port} for {ejection_time:.0f}s: {cause}.")
+
+    def is_ejected(self, server: Server) -> bool:
+        """Whether ``server`` is still serving its ejection time."""
+        if server not in self._ejected:
+            return False
+        return time.monotonic() < self._stats[server].ejected_until
+
+    def reinstated(self, server: Server):
+        """Called when the active health check marks an ejected backend healthy again."""
+        if server in self._ejected:
+            self._ejected.discard(server)
+            now = time.monotonic()
+            stats = self._get(server, now)
+            stats.consecutive = 0
+            stats.window_start = now
+            stats.requests = 0
+            stats.failures = 0
+            stats.healthy_since = now
+            self.logger.info(f"Reinstated {server.host}:{server.port} after ejection.")
+
+    def forget(self, server: Server):
+        """Drop all state for a backend removed from the pool."""
+        self._stats.pop(server, None)
+        self._ejected.discard(server)
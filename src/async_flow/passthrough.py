@@ -0,0 +1,595 @@
+import asyncio
+import re
+import time
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from src.async_flow.exceptions import HttpProtocolError, UpstreamClosedError
+from src.async_flow.models.config import Server, UpstreamPool as UpstreamPoolConfig
+
+MAX_HEAD_BYTES = 64 * 1024
+MAX_LINE_BYTES = 8 * 1024
+# Client bytes buffered before reading pauses: pipelined requests and body data waiting for the backend
+CLIENT_BUFFER_HIGH = 256 * 1024
+CLIENT_BUFFER_LOW = 64 * 1024
+# Seconds an idle keep-alive client, or one sending a request head, is given; aiohttp's default
+KEEPALIVE_TIMEOUT = 75.0
+# Seconds to open a backend connection; aiohttp's default sock_connect timeout
+CONNECT_TIMEOUT = 30.0
+
+_CRLF2 = b"\r\n\r\n"
+# Hex digits and an optional extension, nothing else: int(..., 16) also takes "0x", "_", signs and spaces
+_CHUNK_SIZE = re.compile(rb"([0-9A-Fa-f]{1,16})(?:;[^\r\n]*)?")
+
+
+class BodyFramer:
+    """
+    Finds where a message body ends in the byte stream without decoding it:
+    counts down ``length`` bytes, or follows the chunk sizes and trailer of a
+    chunked body. Without either the body runs until the connection closes.
+    """
+
+    __slots__ = ("remaining", "chunked", "until_close", "done", "_in_data", "_in_crlf", "_in_trailer", "_line")
+
+    def __init__(self, length: Optional[int] = None, chunked: bool = False):
+        self.chunked = chunked
+        self.until_close = not chunked and length is None
+        self.remaining = 0 if chunked or length is None else length
+        self.done = not chunked and length == 0
+        self._in_data = False
+        # Expecting the CRLF that ends chunk data
+        self._in_crlf = False
+        self._in_trailer = False
+        self._line = b""
+
+    def feed(self, data, start: int = 0) -> int:
+        """Consume the body bytes of ``data[start:]``; returns the index just past them."""
+        if self.done:
+            return start
+        end = len(data)
+        if self.until_close:
+            return end
+        if not self.chunked:
+            if end - start >= self.remaining:
+                start += self.remaining
+                self.remaining = 0
+                self.done = True
+                return start
+            self.remaining -= end - start
+            return end
+
+        pos = start
+        while pos < end:
+            if self._in_data:
+                taken = min(self.remaining, end - pos)
+                pos += taken
+                self.remaining -= taken
+                if not self.remaining:
+                    self._in_data = False
+                    self._in_crlf = True
+                continue
+
+            newline = data.find(b"\n", pos)
+            if newline < 0:
+                self._line += data[pos:]
+                if len(self._line) > MAX_LINE_BYTES:
+                    raise HttpProtocolError(400, "Chunk line too long")
+                return end
+            line = self._line + data[pos:newline] if self._line else data[pos:newline]
+            self._line = b""
+            pos = newline + 1
+            # Lines must end in CRLF and hold no other CR, or a backend could split them differently
+            if line[-1:] != b"\r" or b"\r" in line[:-1]:
+                raise HttpProtocolError(400, "Invalid chunk line ending")
+            line = line[:-1]
+            if self._in_crlf:
+                if line:
+                    raise HttpProtocolError(400, "Chunk data longer than its size")
+                self._in_crlf = False
+                continue
+            if self._in_trailer:
+                if not line:
+                    # The blank line after the trailer ends the message
+                    self.done = True
+                    return pos
+                continue
+            match = _CHUNK_SIZE.fullmatch(line)
+            if match is None:
+                raise HttpProtocolError(400, "Invalid chunk size")
+            size = int(match.group(1), 16)
+            if size:
+                self.remaining = size
+                self._in_data = True
+            else:
+                self._in_trailer = True
+        return pos
+
+
+class RequestHead:
+    """The raw head of a client request and what forwarding it needs to know."""
+
+    __slots__ = ("raw", "method", "target", "keep_alive", "framer", "headers")
+
+    def __init__(self, raw: bytes, method: bytes, target: bytes, keep_alive: bool,
+                 framer: Optional[BodyFramer], headers: Optional[Dict[bytes, bytes]]):
+        self.raw = raw
+        self.method = method
+        self.target = target
+        self.keep_alive = keep_alive
+        # None when the request has no body
+        self.framer = framer
+        # Values of the captured headers, by lower-case name
+        self.headers = headers
+
+    def header(self, name: bytes) -> Optional[str]:
+        if self.headers is None:
+            return None
+        value = self.headers.get(name)
+        return value.decode("latin-1") if value is not None else None
+
+
+def parse_request_head(raw: bytes, capture: FrozenSet[bytes] = frozenset()) -> RequestHead:
+    """
+    Parse the request line and the framing headers of ``raw``, a request head
+    ending in a blank line. Values of the header names in ``capture``
+    (lower-case) are kept too; everything else is only forwarded.
+    """
+    crlf = raw.count(b"\r\n")
+    if raw.count(b"\n") != crlf or raw.count(b"\r") != crlf:
+        # A backend that splits lines on bare LF would read other headers than we did
+        raise HttpProtocolError(400, "Bare CR or LF in request head")
+    lines = raw[:-4].split(b"\r\n")
+    try:
+        method, target, version = lines[0].split(b" ")
+    except ValueError:
+        raise HttpProtocolError(400, "Invalid request line")
+    if version == b"HTTP/1.1":
+        keep_alive = True
+    elif version == b"HTTP/1.0":
+        keep_alive = False
+    else:
+        raise HttpProtocolError(505, "HTTP Version Not Supported")
+    if method == b"CONNECT":
+        raise HttpProtocolError(501, "Not Implemented")
+
+    length = None
+    transfer_encoding = None
+    headers = None
+    for line in lines[1:]:
+        name, colon, value = line.partition(b":")
+        # A line starting with whitespace continues the previous one (obs-fold), which backends unfold differently
+        if not colon or not name or name[-1:] in b" \t" or name[:1] in b" \t":
+            raise HttpProtocolError(400, "Invalid header line")
+        name = name.lower()
+        if name == b"content-length":
+            value = value.strip()
+            if not value.isdigit() or (length is not None and int(value) != length):
+                raise HttpProtocolError(400, "Invalid Content-Length")
+            length = int(value)
+        elif name == b"transfer-encoding":
+            transfer_encoding = value.strip().lower()
+        elif name == b"connection":
+            value = value.lower()
+            if b"upgrade" in value:
+                raise HttpProtocolError(501, "Not Implemented")
+            if b"close" in value:
+                keep_alive = False
+            elif b"keep-alive" in value:
+                keep_alive = True
+        elif name in capture:
+            if headers is None:
+                headers = {}
+            headers[name] = value.strip()
+
+    framer = None
+    if transfer_encoding is not None:
+        # Both framings, or one a backend may read differently, would let requests be smuggled past us
+        if length is not None or not transfer_encoding.endswith(b"chunked"):
+            raise HttpProtocolError(400, "Invalid Transfer-Encoding")
+        framer = BodyFramer(chunked=True)
+    elif length:
+        framer = BodyFramer(length)
+    return RequestHead(raw, method, target, keep_alive, framer, headers)
+
+
+def error_response(status: int, reason: str) -> bytes:
+    """A complete response for requests answered by the engine itself; the connection closes after it."""
+    body = reason.encode()
+    return (
+        b"HTTP/1.1 %d %s\r\nContent-Type: text/plain; charset=utf-8\r\nContent-Length: %d\r\n"
+        b"Connection: close\r\n\r\n%s" % (status, body, len(body), body)
+    )
+
+
+class UpstreamProtocol(asyncio.Protocol):
+    """
+    A pooled connection to one backend. ``send`` writes a request head and
+    every response byte is written straight to the client transport as it
+    arrives; only the status line and framing headers are parsed, to find
+    where the response ends.
+    """
+
+    def __init__(self, server: Server):
+        self.server = server
+        self.transport: Optional[asyncio.Transport] = None
+        self.closed = False
+        self.requests = 0
+        self.idle_since = 0.0
+
+        # State of the current exchange
+        self.sink: Optional[asyncio.Transport] = None
+        self.response: Optional[asyncio.Future] = None
+        self.status: Optional[int] = None
+        self.keep_alive = False
+        self.first_byte_at: Optional[float] = None
+        self.responded = False
+        self._head_only = False
+        self._pending = b""
+        self._framer: Optional[BodyFramer] = None
+        self._drain_waiter: Optional[asyncio.Future] = None
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+
+    def send(self, head: bytes, sink: asyncio.Transport, head_only: bool = False) -> asyncio.Future:
+        """Write a request head; the returned future resolves once the response was relayed to ``sink``."""
+        self.sink = sink
+        self.response = asyncio.get_running_loop().create_future()
+        self.status = None
+        self.keep_alive = False
+        self.first_byte_at = None
+        self.responded = False
+        self._head_only = head_only
+        self._pending = b""
+        self._framer = None
+        self.requests += 1
+        self.transport.write(head)
+        return self.response
+
+    def data_received(self, data: bytes):
+        if self.response is None or self.response.done():
+            # Bytes outside an exchange: the connection cannot be trusted any more
+            self.transport.abort()
+            return
+        if self.first_byte_at is None:
+            self.first_byte_at = time.monotonic()
+        try:
+            self._relay(data)
+        except HttpProtocolError as e:
+            self.transport.abort()
+            if e.status < 500:
+                # The framer speaks for requests; in a response the backend is at fault
+                e = HttpProtocolError(502, f"Invalid response: {e.reason}")
+            if not self.response.done():
+                self.response.set_exception(e)
+
+    def _relay(self, data: bytes):
+        while self._framer is None:
+            if self._pending:
+                data = self._pending + data
+                self._pending = b""
+            end = data.find(_CRLF2)
+            if end < 0:
+                if len(data) > MAX_HEAD_BYTES:
+                    raise HttpProtocolError(502, "Response head too large")
+                self._pending = data
+                return
+            body_start = end + 4
+            status = self._parse_head(data[:end])
+            if status >= 200:
+                break
+            # Interim response such as 100 Continue: relay it and read the final one
+            self.responded = True
+            self.sink.write(data[:body_start])
+            data = data[body_start:]
+            if not data:
+                return
+        else:
+            body_start = 0
+
+        stop = self._framer.feed(data, body_start)
+        self.responded = True
+        self.sink.write(data if stop == len(data) else memoryview(data)[:stop])
+        if self._framer.done:
+            if stop < len(data):
+                # More than one response to one request
+                self.keep_alive = False
+                self.transport.abort()
+            self._finish()
+
+    def _parse_head(self, head: bytes) -> int:
+        lines = head.split(b"\r\n")
+        status_line = lines[0]
+        try:
+            status = int(status_line[9:12])
+        except ValueError:
+            raise HttpProtocolError(502, "Invalid response status line")
+        if status < 200:
+            return status
+        keep_alive = status_line.startswith(b"HTTP/1.1 ")
+        length = None
+        chunked = False
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            name = name.lower()
+            if name == b"content-length":
+                value = value.strip()
+                # int() would also take signs and underscores
+                if not value.isdigit() or (length is not None and int(value) != length):
+                    raise HttpProtocolError(502, "Invalid response Content-Length")
+                length = int(value)
+            elif name == b"transfer-encoding":
+                chunked = value.strip().lower().endswith(b"chunked")
+            elif name == b"connection":
+                value = value.lower()
+                if b"close" in value:
+                    keep_alive = False
+                elif b"keep-alive" in value:
+                    keep_alive = True
+
+        self.status = status
+        if self._head_only or status in (204, 304):
+            self._framer = BodyFramer(0)
+        elif chunked:
+            self._framer = BodyFramer(chunked=True)
+        elif length is not None:
+            self._framer = BodyFramer(length)
+        else:
+            # Delimited by the backend closing the connection
+            self._framer = BodyFramer()
+            keep_alive = False
+        self.keep_alive = keep_alive
+        return status
+
+    def _finish(self):
+        self.sink = None
+        if not self.response.done():
+            self.response.set_result(self.status)
+
+    def pause_writing(self):
+        self._drain_waiter = asyncio.get_running_loop().create_future()
+
+    def resume_writing(self):
+        waiter, self._drain_waiter = self._drain_waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def drain(self):
+        """Wait until the request bytes written so far are handed to the kernel."""
+        if self._drain_waiter is not None:
+            await self._drain_waiter
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.closed = True
+        self.keep_alive = False
+        self.resume_writing()
+        response = self.response
+        if response is not None and not response.done():
+            if self._framer is not None and self._framer.until_close:
+                self._finish()
+            else:
+                self.sink = None
+                response.set_exception(UpstreamClosedError(self.responded))
+
+    def abort(self):
+        """Drop the connection mid-exchange; the pending response is cancelled."""
+        self.closed = True
+        if self.response is not None and not self.response.done():
+            self.response.cancel()
+        self.transport.abort()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.transport.close()
+
+
+class PassthroughPool:
+    """
+    Keep-alive connections to the backends for the passthrough engine.
+
+    Idle connections are kept per backend, most recently used first, up to
+    ``max_connections_per_host``, and are dropped once idle for
+    ``keepalive_timeout`` seconds or after ``max_requests_per_connection``
+    requests. Connections of a removed backend are not reused.
+    """
+
+    def __init__(self, config: UpstreamPoolConfig):
+        self.config = config
+        self._idle: Dict[Tuple[str, int], List[UpstreamProtocol]] = {}
+        self._closed = False
+
+    async def acquire(self, server: Server) -> UpstreamProtocol:
+        """An idle connection to ``server``, or a new one."""
+        idle = self._idle.get((server.host, server.port))
+        if idle:
+            expired = time.monotonic() - self.config.keepalive_timeout
+            while idle:
+                upstream = idle.pop()
+                if not upstream.closed and upstream.idle_since > expired:
+                    return upstream
+                upstream.close()
+        return await self.connect(server)
+
+    async def connect(self, server: Server) -> UpstreamProtocol:
+        _, upstream = await asyncio.wait_for(
+            asyncio.get_running_loop().create_connection(lambda: UpstreamProtocol(server), server.host, server.port),
+            CONNECT_TIMEOUT
+        )
+        if not self._closed:
+            self._idle.setdefault((server.host, server.port), [])
+        return upstream
+
+    def release(self, upstream: UpstreamProtocol):
+        """Return a connection after a complete exchange, or close it if it cannot serve another."""
+        idle = self._idle.get((upstream.server.host, upstream.server.port))
+        max_requests = self.config.max_requests_per_connection
+        if (idle is None or upstream.closed or not upstream.keep_alive
+                or (max_requests and upstream.requests >= max_requests)
+                or len(idle) >= self.config.max_connections_per_host):
+            upstream.close()
+            return
+        upstream.response = None
+        upstream.idle_since = time.monotonic()
+        idle.append(upstream)
+
+    def remove(self, server: Server):
+        """Close the idle connections of a backend that left the pool; busy ones close when released."""
+        for upstream in self._idle.pop((server.host, server.port), ()):
+            upstream.close()
+
+    def close(self):
+        self._closed = True
+        for idle in self._idle.values():
+            for upstream in idle:
+                upstream.close()
+        self._idle.clear()
+
+
+class HttpClientProtocol(asyncio.Protocol):
+    """
+    A client connection of the passthrough engine. Incoming bytes are buffered
+    and consumed by the ``on_connect`` task one request at a time, so pipelined
+    requests are answered in order; the response of the current request is
+    written to the transport by its UpstreamProtocol.
+    """
+
+    def __init__(self, on_connect: Callable[["HttpClientProtocol"], Awaitable[None]]):
+        self.on_connect = on_connect
+        self.transport: Optional[asyncio.Transport] = None
+        self.buffer = bytearray()
+        self.eof = False
+        self.closed = False
+        # Waiting for the next request with nothing buffered, so it can be closed on shutdown
+        self.idle = False
+        self._upstream: Optional[UpstreamProtocol] = None
+        self._reading_paused = False
+        self._writing_paused = False
+        self._waiter: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+        # Keep a reference; the loop only holds tasks weakly
+        self._task = asyncio.create_task(self.on_connect(self))
+
+    def data_received(self, data: bytes):
+        self.buffer += data
+        if len(self.buffer) > CLIENT_BUFFER_HIGH and not self._reading_paused:
+            self._reading_paused = True
+            self.transport.pause_reading()
+        self._wake()
+
+    def eof_received(self) -> bool:
+        self.eof = True
+        self._wake()
+        # Keep the transport open to finish the response
+        return True
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.closed = self.eof = True
+        if self._upstream is not None:
+            # Nobody is left to read the response
+            self._upstream.transport.abort()
+        self._wake()
+
+    def pause_writing(self):
+        self._writing_paused = True
+        if self._upstream is not None:
+            self._upstream.transport.pause_reading()
+
+    def resume_writing(self):
+        self._writing_paused = False
+        if self._upstream is not None:
+            self._upstream.transport.resume_reading()
+
+    def attach(self, upstream: Optional[UpstreamProtocol]):
+        """Set the backend connection relaying to this client, for flow control."""
+        if self._writing_paused:
+            if self._upstream is not None:
+                self._upstream.transport.resume_reading()
+            if upstream is not None:
+                upstream.transport.pause_reading()
+        self._upstream = upstream
+
+    def _wake(self, *_):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def _wait(self):
+        self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            await self._waiter
+        finally:
+            self._waiter = None
+
+    def _take(self, size: int) -> bytes:
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        if self._reading_paused and len(self.buffer) < CLIENT_BUFFER_LOW and not self.closed:
+            self._reading_paused = False
+            self.transport.resume_reading()
+        return data
+
+    def _timed_out(self):
+        self.eof = True
+        self._wake()
+
+    async def read_request(self, capture: FrozenSet[bytes] = frozenset()) -> Optional[RequestHead]:
+        """
+        The next request head, or None once the client closed or sent no
+        complete head for ``KEEPALIVE_TIMEOUT`` seconds.
+        """
+        buffer = self.buffer
+        scanned = 0
+        timer = None
+        try:
+            while True:
+                # Blank lines between requests are allowed
+                while buffer[:2] == b"\r\n":
+                    del buffer[:2]
+                end = buffer.find(_CRLF2, max(0, scanned - 3))
+                if end >= 0:
+                    break
+                if len(buffer) > MAX_HEAD_BYTES:
+                    raise HttpProtocolError(431, "Request Header Fields Too Large")
+                if self.eof:
+                    return None
+                scanned = len(buffer)
+                if timer is None:
+                    timer = asyncio.get_running_loop().call_later(KEEPALIVE_TIMEOUT, self._timed_out)
+                self.idle = not buffer
+                await self._wait()
+                self.idle = False
+        finally:
+            if timer is not None:
+                timer.cancel()
+        return parse_request_head(self._take(end + 4), capture)
+
+    async def forward_body(self, framer: BodyFramer, upstream: UpstreamProtocol, response: asyncio.Future):
+        """Relay a request body to ``upstream``; stops early if the response is already complete."""
+        response.add_done_callback(self._wake)
+        try:
+            while not framer.done and not response.done():
+                if self.buffer:
+                    upstream.transport.write(self._take(framer.feed(self.buffer)))
+                    await upstream.drain()
+                elif self.eof:
+                    raise HttpProtocolError(400, "Request body incomplete")
+                else:
+                    await self._wait()
+        finally:
+            response.remove_done_callback(self._wake)
+
+    def respond_error(self, status: int, reason: str):
+        if not self.closed:
+            self.transport.write(error_response(status, reason))
+
+    def close_if_idle(self):
+        if self.idle:
+            self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.transport.close()
@@ -14,7 +14,7 @@ class TcpHealthCheckStrategy(HealthCheckStrategy):
     async def check_health(self, server: Server) -> bool:
         try:
             reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(server.address, server.port),
+                asyncio.open_connection(server.host, server.port),
                 timeout=self.timeout
             )
             writer.close()
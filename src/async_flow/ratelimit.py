@@ -0,0 +1,70 @@
+import time
+from array import array
+from collections import OrderedDict
+from typing import Optional
+
+from src.async_flow.models.config import RateLimit as RateLimitConfig
+
+
+class RateLimiter:
+    """
+    Per-client token buckets.
+
+    Each client may send ``burst`` requests at once and ``rate`` per second
+    after that. Bucket state is two doubles per client in flat arrays, indexed
+    through an insertion-ordered dict of client key to slot. Every check moves
+    its key to the end of the dict, so the front always holds the client that
+    has been idle longest. Once ``max_clients`` keys are tracked, a new client
+    takes over that client's slot. Checks are O(1), and once the table is full
+    they allocate no new storage.
+
+    Dropping a bucket forgives the client. For a client idle for
+    ``burst / rate`` seconds this changes nothing, since its bucket would be
+    full again anyway.
+    """
+
+    def __init__(self, config: RateLimitConfig):
+        self.config = config
+        self._rate = config.rate
+        self._burst = float(config.burst)
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._tokens = array("d")
+        self._stamps = array("d")
+
+    def allow(self, key: Optional[str]) -> bool:
+        """Take one token from ``key``'s bucket; False if it is empty. Unknown clients are allowed."""
+        if key is None:
+            return True
+        now = time.monotonic()
+        slots = self._slots
+        slot = slots.get(key)
+        if slot is None:
+            slot = self._claim(key)
+            tokens = self._burst
+        else:
+            slots.move_to_end(key)
+            tokens = self._tokens[slot] + (now - self._stamps[slot]) * self._rate
+            if tokens > self._burst:
+                tokens = self._burst
+        self._stamps[slot] = now
+        if tokens < 1.0:
+            self._tokens[slot] = tokens
+            return False
+        self._tokens[slot] = tokens - 1.0
+        return True
+
+    def _claim(self, key: str) -> int:
+        slots = self._slots
+        if len(slots) < self.config.max_clients:
+            slot = len(slots)
+            if slot == len(self._tokens):
+                self._tokens.append(0.0)
+                self._stamps.append(0.0)
+        else:
+            # Reuse the slot of the client idle the longest
+            _, slot = slots.popitem(last=False)
+        slots[key] = slot
+        return slot
+
+    def __len__(self) -> int:
+        return len(self._slots)
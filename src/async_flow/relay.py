@@ -0,0 +1,236 @@
+import asyncio
+import os
+import socket
+import sys
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+# os.splice moves bytes between a socket and a pipe inside the kernel (Linux, Python 3.10+)
+SPLICE_AVAILABLE = sys.platform.startswith("linux") and hasattr(os, "splice")
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+async def _wait_readable(loop: asyncio.AbstractEventLoop, fd: int):
+    future = loop.create_future()
+    loop.add_reader(fd, _wake, future)
+    try:
+        await future
+    finally:
+        loop.remove_reader(fd)
+
+
+async def _wait_writable(loop: asyncio.AbstractEventLoop, fd: int):
+    future = loop.create_future()
+    loop.add_writer(fd, _wake, future)
+    try:
+        await future
+    finally:
+        loop.remove_writer(fd)
+
+
+async def open_socket(loop: asyncio.AbstractEventLoop, host: str, port: int) -> socket.socket:
+    """Connect a non-blocking TCP socket to ``host:port``."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        await loop.sock_connect(sock, (host, port))
+    except BaseException:
+        sock.close()
+        raise
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+async def _splice_one_way(loop: asyncio.AbstractEventLoop, src: socket.socket, dst: socket.socket, chunk_size: int) -> int:
+    """
+    Move bytes from ``src`` to ``dst`` through a pipe until ``src`` reaches EOF.
+
+    Nothing more is read from ``src`` until the pipe has been flushed into ``dst``,
+    so a slow receiver throttles the sender. Returns the number of bytes relayed.
+    """
+    flags = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    pipe_read, pipe_write = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+    relayed = 0
+    try:
+        while True:
+            try:
+                pending = os.splice(src_fd, pipe_write, chunk_size, flags=flags)
+            except BlockingIOError:
+                await _wait_readable(loop, src_fd)
+                continue
+            if pending == 0:
+                break
+
+            relayed += pending
+            while pending:
+                try:
+                    pending -= os.splice(pipe_read, dst_fd, pending, flags=flags)
+                except BlockingIOError:
+                    await _wait_writable(loop, dst_fd)
+
+        # Propagate the half-close so the peer sees EOF but can still answer
+        try:
+            dst.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        return relayed
+    finally:
+        os.close(pipe_read)
+        os.close(pipe_write)
+
+
+async def splice_relay(client: socket.socket, upstream: socket.socket, chunk_size: int = 64 * 1024) -> Tuple[int, int]:
+    """
+    Relay both directions between two connected sockets with ``os.splice``,
+    without copying payload through Python buffers. Closes both sockets when
+    done and returns the bytes relayed to and from ``upstream``.
+    """
+    loop = asyncio.get_running_loop()
+    directions = [
+        asyncio.create_task(_splice_one_way(loop, client, upstream, chunk_size)),
+        asyncio.create_task(_splice_one_way(loop, upstream, client, chunk_size)),
+    ]
+    try:
+        await asyncio.wait(directions, return_when=asyncio.FIRST_EXCEPTION)
+        for task in directions:
+            if task.done() and task.exception() is not None:
+                raise task.exception()
+        return directions[0].result(), directions[1].result()
+    finally:
+        # Stop the other direction before its file descriptors are closed
+        for task in directions:
+            task.cancel()
+        await asyncio.gather(*directions, return_exceptions=True)
+        client.close()
+        upstream.close()
+
+
+class BufferPool:
+    """
+    Free list of receive buffers shared by every connection of one engine.
+
+    A connection only holds a buffer while data it read is still queued on the
+    other side, so idle connections cost no buffer memory and steady-state
+    relaying allocates none.
+    """
+
+    def __init__(self, size: int, max_free: int = 1024):
+        self.size = size
+        self.max_free = max_free
+        self._free: List[memoryview] = []
+
+    def acquire(self) -> memoryview:
+        if self._free:
+            return self._free.pop()
+        return memoryview(bytearray(self.size))
+
+    def release(self, buffer: memoryview):
+        if len(self._free) < self.max_free:
+            self._free.append(buffer)
+
+
+class RelayProtocol(asyncio.BufferedProtocol):
+    """
+    One side of a proxied TCP connection. Whatever it receives is written
+    straight to its peer's transport.
+
+    Flow control uses the transports instead of ``drain()``: the write buffer
+    high-water mark is 0, so as soon as a write cannot be sent in full the
+    receiving side pauses reading from the sender until the backlog is flushed.
+    Reading is paused from ``connection_made`` until :meth:`relay` pairs both sides.
+    """
+
+    __slots__ = ("buffers", "on_connect", "transport", "peer", "closed", "bytes_received",
+                 "_buffer", "_writing_paused", "_eof", "_task")
+
+    def __init__(self, buffers: BufferPool, on_connect: Optional[Callable[["RelayProtocol"], Awaitable[None]]] = None):
+        self.buffers = buffers
+        self.on_connect = on_connect
+        self.transport: Optional[asyncio.Transport] = None
+        self.peer: Optional["RelayProtocol"] = None
+        self.closed: Optional[asyncio.Future] = None
+        self.bytes_received = 0
+        self._buffer: Optional[memoryview] = None
+        self._writing_paused = False
+        self._eof = False
+        self._task: Optional[asyncio.Task] = None
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+        self.closed = asyncio.get_running_loop().create_future()
+        transport.pause_reading()
+        transport.set_write_buffer_limits(high=0)
+        if self.on_connect is not None:
+            # Keep a reference; the loop only holds tasks weakly
+            self._task = asyncio.create_task(self.on_connect(self))
+
+    async def relay(self, peer: "RelayProtocol"):
+        """Pair with ``peer``, relay both directions and wait until both sides are closed."""
+        self.peer, peer.peer = peer, self
+        try:
+            if self.closed.done():
+                peer.transport.close()
+            elif peer.closed.done():
+                self.transport.close()
+            else:
+                self.transport.resume_reading()
+                peer.transport.resume_reading()
+            await asyncio.wait((self.closed, peer.closed))
+        finally:
+            if not (self.closed.done() and peer.closed.done()):
+                # Cancelled: drop both connections now
+                self.transport.abort()
+                peer.transport.abort()
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        if self._buffer is None:
+            self._buffer = self.buffers.acquire()
+        return self._buffer
+
+    def buffer_updated(self, nbytes: int):
+        self.bytes_received += nbytes
+        peer = self.peer
+        peer.transport.write(self._buffer[:nbytes])
+        if not peer._writing_paused:
+            # Sent in full, nothing references the buffer any more
+            self._release_buffer()
+
+    def eof_received(self) -> bool:
+        self._eof = True
+        peer = self.peer
+        if peer is None or peer._eof or not peer.transport.can_write_eof():
+            self.transport.close()
+            if peer is not None:
+                peer.transport.close()
+            return False
+        # Half-close: the peer sees EOF but can still answer
+        peer.transport.write_eof()
+        return True
+
+    def pause_writing(self):
+        self._writing_paused = True
+        if self.peer is not None:
+            self.peer.transport.pause_reading()
+
+    def resume_writing(self):
+        self._writing_paused = False
+        peer = self.peer
+        if peer is not None:
+            peer._release_buffer()
+            peer.transport.resume_reading()
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self._release_buffer()
+        if self.peer is not None:
+            self.peer.transport.close()
+        if not self.closed.done():
+            self.closed.set_result(exc)
+
+    def _release_buffer(self):
+        if self._buffer is not None:
+            self.buffers.release(self._buffer)
+            self._buffer = None
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import signal
+import time
+from typing import Optional, Tuple
+
+from src.async_flow.config import Config
+from src.async_flow.core import LoadBalancer
+from src.async_flow.logger import get_logger
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """Modification time, size and inode of ``path``, or None if it cannot be read."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class ConfigReloader:
+    """
+    Reloads the configuration file into a running LoadBalancer on SIGHUP and,
+    with ``reload.watch``, whenever the file changes.
+
+    The file is polled rather than watched with inotify, which keeps the
+    reloader portable and covers editors that replace the file. An invalid
+    file is logged and the running configuration is kept.
+    """
+
+    def __init__(self, config_loader: Config, load_balancer: LoadBalancer, watch: Optional[bool] = None):
+        self.config_loader = config_loader
+        self.load_balancer = load_balancer
+        self.config = load_balancer.config.reload
+        self.watch = self.config.watch if watch is None else watch
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._lock = asyncio.Lock()
+        self._tasks = set()
+        self._watcher: Optional[asyncio.Task] = None
+        self._signal_installed = False
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGHUP, self._spawn_reload)
+            self._signal_installed = True
+        except (NotImplementedError, AttributeError, RuntimeError):
+            # No SIGHUP on this platform, or not running in the main thread
+            self.logger.warning("SIGHUP reload is not available here.")
+        if self.watch:
+            # Taken now, so a change made before the task first runs is not missed
+            signature = file_signature(self.config_loader.file)
+            self._watcher = asyncio.create_task(self._watch(signature))
+
+    def _spawn_reload(self):
+        task = asyncio.create_task(self.reload())
+        # Keep a reference; the loop only holds tasks weakly
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def reload(self) -> bool:
+        """Re-read the configuration file and apply it; returns whether it was applied."""
+        async with self._lock:
+            started = time.perf_counter()
+            loader = self.config_loader
+            try:
+                # Reading, parsing and validating a large file would stall the event loop
+                fresh = await asyncio.to_thread(type(loader), loader.file, loader.is_yaml, loader.is_json, loader.is_toml)
+            except Exception as e:
+                self.logger.error(f"Keeping the running configuration, reload failed: {e}")
+                return False
+            loader.raw_config, loader.config = fresh.raw_config, fresh.config
+            applying = time.perf_counter()
+            await self.load_balancer.reload(fresh.get_config())
+            finished = time.perf_counter()
+            self.logger.info(
+                f"Configuration reloaded in {(finished - started) * 1000:.3f} ms "
+                f"({(finished - applying) * 1000:.3f} ms on the event loop)."
+            )
+            return True
+
+    async def _watch(self, signature: Optional[Tuple[int, int, int]]):
+        path = self.config_loader.file
+        while True:
+            await asyncio.sleep(self.config.poll_interval)
+            current = file_signature(path)
+            if current is not None and current != signature:
+                signature = current
+                await self.reload()
+
+    async def close(self):
+        if self._signal_installed:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+            self._signal_installed = False
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+        for task in list(self._tasks):
+            task.cancel()
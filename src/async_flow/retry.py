@@ -0,0 +1,69 @@
+import time
+
+from src.async_flow.models.config import Retry as RetryConfig
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed attempt is retried on another backend.
+
+    Connect failures are always safe to retry because nothing reached the
+    backend. Failures after the request was sent are retried only for
+    idempotent methods. Every retry also draws from a budget:
+    ``budget_percent`` of the requests seen over the last ``budget_window``
+    seconds (at least ``min_retries``), so a failing pool cannot turn every
+    request into several and amplify an outage.
+
+    The window slides by weighting the previous window's counts by how much
+    of it still overlaps, which keeps every call O(1).
+    """
+
+    def __init__(self, config: RetryConfig):
+        self.config = config
+        self._idempotent = frozenset(config.idempotent_methods)
+
+        self._window_start = time.monotonic()
+        self._requests = 0
+        self._retries = 0
+        self._previous_requests = 0
+        self._previous_retries = 0
+
+    def _roll(self, now: float) -> float:
+        """Advance the window and return the weight of the previous one."""
+        window = self.config.budget_window
+        elapsed = now - self._window_start
+        if elapsed >= window:
+            if elapsed >= 2 * window:
+                self._previous_requests = self._previous_retries = 0
+            else:
+                self._previous_requests, self._previous_retries = self._requests, self._retries
+            self._requests = self._retries = 0
+            self._window_start = now - elapsed % window
+            elapsed %= window
+        return 1.0 - elapsed / window
+
+    def record_request(self):
+        """Count one incoming request or connection towards the budget."""
+        self._roll(time.monotonic())
+        self._requests += 1
+
+    def is_idempotent(self, method: str) -> bool:
+        return method in self._idempotent
+
+    def allows(self, attempts: int, candidates: int, connect_phase: bool, idempotent: bool) -> bool:
+        """
+        Whether to retry after ``attempts`` failed attempts with ``candidates``
+        healthy backends in total. Consumes budget when it returns True.
+        """
+        if attempts >= self.config.max_attempts or attempts >= candidates:
+            return False
+        if not (connect_phase or idempotent):
+            return False
+
+        weight = self._roll(time.monotonic())
+        requests = self._requests + self._previous_requests * weight
+        retries = self._retries + self._previous_retries * weight
+        if retries >= max(self.config.min_retries, requests * self.config.budget_percent / 100):
+            return False
+        self._retries += 1
+        return True
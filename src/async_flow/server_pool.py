@@ -1,4 +1,27 @@
 import asyncio
+from operator import attrgetter
+from typing import List, Tuple
+
+_host, _port, _weight = attrgetter("host"), attrgetter("port"), attrgetter("weight")
+
+
+def _signature(servers) -> Tuple[List, List, List]:
+    """Addresses and weights of ``servers``; a list per field avoids allocating a tuple per server."""
+    return list(map(_host, servers)), list(map(_port, servers)), list(map(_weight, servers))
+
+
+class ServerSnapshot(tuple):
+    """
+    Immutable view of the healthy servers, tagged with the pool version it was built at.
+
+    Algorithms can key derived structures (schedules, rings, indexes) on ``version``
+    and rebuild them only when it changes.
+    """
+
+    def __new__(cls, servers=(), version: int = 0):
+        snapshot = super().__new__(cls, servers)
+        snapshot.version = version
+        return snapshot
 
 
 class ServerPool:
@@ -6,16 +29,85 @@ class ServerPool:
         self.servers = servers # List of Pydantic Server instances from models/config
         self.lock = asyncio.Lock()
 
+        # Bumped whenever membership, weights or health change
+        self.version = 0
+        self._healthy = ServerSnapshot()
+        # Addresses and weights of the members, for cheap no-op checks in update()
+        self._signature = None
+        self._rebuild_snapshot()
+
+    def _rebuild_snapshot(self):
+        self.version += 1
+        self._healthy = ServerSnapshot((s for s in self.servers if s.healthy), self.version)
+
     def get_all_servers(self):
         return self.servers
 
-    def get_healthy_servers(self):
-        return [s for s in self.servers if s.healthy]
+    async def add_server(self, server):
+        async with self.lock:
+            if server not in self.servers:
+                self.servers.append(server)
+                self._signature = None
+                self._rebuild_snapshot()
+
+    async def remove_server(self, server):
+        async with self.lock:
+            if server in self.servers:
+                self.servers.remove(server)
+                self._signature = None
+                self._rebuild_snapshot()
+
+    async def update(self, servers) -> Tuple[List, List, List]:
+        """
+        Replace the members with ``servers``, e.g. from a reloaded configuration.
+
+        Backends are matched by address: one that is still listed keeps its
+        existing instance, so its health and every counter keyed on it survive,
+        and only its weight is updated. Returns the added, removed and
+        reweighted servers. An identical list is detected without touching the
+        pool, and leaves the version (and every cache keyed on it) alone.
+        """
+        signature = _signature(servers)
+        async with self.lock:
+            if self._signature is None:
+                self._signature = _signature(self.servers)
+            if signature == self._signature:
+                return [], [], []
+
+            current = {(server.host, server.port): server for server in self.servers}
+            members, added, reweighted = [], [], []
+            seen = set()
+            for server in servers:
+                address = (server.host, server.port)
+                if address in seen:
+                    continue
+                seen.add(address)
+                existing = current.get(address)
+                if existing is None:
+                    added.append(server)
+                    members.append(server)
+                    continue
+                if existing.weight != server.weight:
+                    existing.weight = server.weight
+                    reweighted.append(existing)
+                members.append(existing)
+            removed = [server for address, server in current.items() if address not in seen]
+
+            # In place: the list is shared with the configuration it came from
+            self.servers[:] = members
+            self._signature = _signature(members)
+            self._rebuild_snapshot()
+            return added, removed, reweighted
+
+    def get_healthy_servers(self) -> ServerSnapshot:
+        # Precomputed; only rebuilt when a server changes state
+        return self._healthy
 
     async def mark_unhealthy(self, server) -> bool:
         async with server._lock:
             if server.healthy:
                 server.healthy = False
+                self._rebuild_snapshot()
                 return True
         return False
 
@@ -23,5 +115,6 @@ class ServerPool:
         async with server._lock:
             if not server.healthy:
                 server.healthy = True
+                self._rebuild_snapshot()
                 return True
         return False
@@ -0,0 +1,21 @@
+from multidict import CIMultiDict
+
+# Headers that describe a single hop and must not be forwarded (RFC 7230, section 6.1)
+HOP_BY_HOP_HEADERS = frozenset({
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+})
+
+
+def filter_hop_by_hop(headers) -> CIMultiDict:
+    """Return a copy of ``headers`` without hop-by-hop headers."""
+    return CIMultiDict(
+        (name, value) for name, value in headers.items()
+        if name.lower() not in HOP_BY_HOP_HEADERS
+    )
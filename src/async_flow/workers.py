@@ -0,0 +1,210 @@
+import asyncio
+import ctypes
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.connection import wait
+from typing import Dict, List, Optional
+
+from src.async_flow.config import Config
+from src.async_flow.core import LoadBalancer
+from src.async_flow.logger import get_logger, stop_logging, use_worker_log_file
+from src.async_flow.models.config import LoadBalancerConfig
+from src.async_flow.reload import ConfigReloader, file_signature
+
+STATS_PUBLISH_INTERVAL = 1.0  # seconds
+
+
+def _worker_main(config: LoadBalancerConfig, slot: int, stats, config_loader: Optional[Config] = None):
+    """Entry point of a forked worker process."""
+    # Drop the handlers inherited from the supervisor. It owns Ctrl-C and SIGUSR1,
+    # stops workers with a forwarded SIGTERM and forwards SIGHUP to reload, which
+    # is ignored until the worker's reloader is listening.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+    use_worker_log_file(slot)
+    try:
+        asyncio.run(_serve_worker(config, slot, stats, config_loader))
+    finally:
+        # multiprocessing ends the child with os._exit(), which skips atexit
+        stop_logging()
+
+
+async def _serve_worker(config: LoadBalancerConfig, slot: int, stats, config_loader: Optional[Config] = None):
+    logger = get_logger(f"Worker-{slot}")
+    if config.metrics.enabled:
+        # Every worker keeps its own counters, so each gets its own admin port
+        config = config.model_copy(
+            update={"metrics": config.metrics.model_copy(update={"port": config.metrics.port + slot})}
+        )
+    load_balancer = LoadBalancer(config)
+    reloader = None
+    if config_loader is not None:
+        # The supervisor watches the file and forwards SIGHUP
+        reloader = ConfigReloader(config_loader, load_balancer, watch=False)
+        await reloader.start()
+    publisher = asyncio.create_task(_publish_stats(load_balancer, slot, stats))
+
+    try:
+        # SIGTERM from the supervisor drains the worker's connections before it exits
+        await load_balancer.serve(stop_signals=(signal.SIGTERM,))
+    finally:
+        publisher.cancel()
+        if reloader is not None:
+            await reloader.close()
+        logger.info("Worker stopped.")
+
+
+async def _publish_stats(load_balancer: LoadBalancer, slot: int, stats):
+    """Copy the worker's counters into its slot of the shared stats array."""
+    fields = LoadBalancer.STAT_FIELDS
+    base = slot * len(fields)
+    while True:
+        for offset, field in enumerate(fields):
+            stats[base + offset] = load_balancer.stats[field]
+        await asyncio.sleep(STATS_PUBLISH_INTERVAL)
+
+
+class WorkerSupervisor:
+    """
+    Forks ``workers`` processes that each run a LoadBalancer on the same
+    SO_REUSEPORT listener, restarts workers that die and forwards signals.
+
+    Given the ``config_loader`` the configuration came from, SIGHUP (and, with
+    ``reload.watch``, a change of the file) reloads it: the supervisor keeps
+    the new configuration for workers it restarts, and every worker applies
+    it to its running LoadBalancer.
+    """
+
+    def __init__(self, config: LoadBalancerConfig, workers: int, restart_delay: float = 1.0,
+                 config_loader: Optional[Config] = None):
+        if workers < 1:
+            raise ValueError("At least one worker is required.")
+
+        # Every worker binds the same address; the kernel spreads connections across them
+        self.config = config.model_copy(
+            update={"listen": config.listen.model_copy(update={"reuse_port": True})}
+        )
+        self.workers = workers
+        self.restart_delay = restart_delay
+        self.config_loader = config_loader
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._ctx = multiprocessing.get_context("fork")
+        self._stats = self._ctx.Array(ctypes.c_longlong, workers * len(LoadBalancer.STAT_FIELDS), lock=False)
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self._started_at: List[float] = [0.0] * workers
+        self._stopping = False
+        self._reload_requested = False
+        self._file_signature = file_signature(config_loader.file) if config_loader is not None else None
+
+    def aggregate_stats(self) -> Dict[str, int]:
+        """Sum the counters published by all workers."""
+        fields = LoadBalancer.STAT_FIELDS
+        totals = dict.fromkeys(fields, 0)
+        for slot in range(self.workers):
+            base = slot * len(fields)
+            for offset, field in enumerate(fields):
+                totals[field] += self._stats[base + offset]
+        return totals
+
+    def run(self):
+        """Start the workers and supervise them until SIGINT/SIGTERM."""
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._request_reload)
+        signal.signal(signal.SIGUSR1, self._log_stats)
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+        self.logger.info(f"Started {self.workers} workers on {self.config.listen.host}:{self.config.listen.port}")
+
+        watching = self.config_loader is not None and self.config.reload.watch
+        timeout = min(self.restart_delay, self.config.reload.poll_interval) if watching else self.restart_delay
+        try:
+            while not self._stopping:
+                sentinels = [p.sentinel for p in self._processes if p is not None and p.is_alive()]
+                wait(sentinels, timeout=timeout)
+                if self._stopping:
+                    break
+                if watching and self._file_changed():
+                    self._reload_requested = True
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._reload()
+                self._restart_dead_workers()
+        finally:
+            self._stop_workers()
+
+    def _spawn(self, slot: int):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.config, slot, self._stats, self.config_loader),
+            name=f"async-flow-worker-{slot}",
+            daemon=False
+        )
+        process.start()
+        self._processes[slot] = process
+        self._started_at[slot] = time.monotonic()
+        self.logger.info(f"Worker {slot} started with pid {process.pid}")
+
+    def _restart_dead_workers(self):
+        now = time.monotonic()
+        for slot, process in enumerate(self._processes):
+            if process is None or process.is_alive():
+                continue
+            # Avoid a fork loop when a worker crashes straight after starting
+            if now - self._started_at[slot] < self.restart_delay:
+                continue
+            self.logger.warning(f"Worker {slot} (pid {process.pid}) exited with code {process.exitcode}; restarting.")
+            process.close()
+            self._spawn(slot)
+
+    def _stop_workers(self):
+        alive = [p for p in self._processes if p is not None and p.is_alive()]
+        for process in alive:
+            process.terminate()
+        for process in alive:
+            process.join()
+        self.logger.info(f"All workers stopped. Totals: {self.aggregate_stats()}")
+
+    def _handle_stop(self, signum, frame):
+        self.logger.info(f"Received {signal.Signals(signum).name}, stopping workers.")
+        self._stopping = True
+
+    def _request_reload(self, signum, frame):
+        if self.config_loader is None:
+            self.logger.warning("Received SIGHUP but the configuration file is unknown; ignoring.")
+            return
+        # Handled by the supervision loop, outside the signal handler
+        self._reload_requested = True
+
+    def _file_changed(self) -> bool:
+        current = file_signature(self.config_loader.file)
+        if current is None or current == self._file_signature:
+            return False
+        self._file_signature = current
+        return True
+
+    def _reload(self):
+        """Reload the configuration for future workers and tell the running ones to apply it."""
+        try:
+            self.config_loader.reload_config()
+        except Exception as e:
+            self.logger.error(f"Keeping the running configuration, reload failed: {e}")
+            return
+        config = self.config_loader.get_config()
+        self.config = self.config.model_copy(update={"load_balance": config.load_balance})
+        self._forward_signal(signal.SIGHUP)
+        self.logger.info("Configuration reloaded; workers notified.")
+
+    def _forward_signal(self, signum):
+        for process in self._processes:
+            if process is not None and process.is_alive():
+                os.kill(process.pid, signum)
+
+    def _log_stats(self, signum, frame):
+        self.logger.info(f"Aggregated worker stats: {self.aggregate_stats()}")
@@ -1,5 +1,45 @@
 import sys
 import os
+import socket
+
+import pytest
 
 # Add src directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from async_flow.models.config import LoadBalancerConfig  # noqa: E402
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def free_port():
+    """A callable returning a local port nothing listens on."""
+    return _free_port
+
+
+@pytest.fixture
+def make_config(free_port):
+    """
+    A factory for configs listening on a free local port and balancing over
+    backends on 127.0.0.1. Other config sections are passed as keywords.
+    """
+    def make(ports, protocol="http", algorithm="round_robin", weights=None, **sections):
+        return LoadBalancerConfig(
+            listen={"host": "127.0.0.1", "port": free_port(), "protocol": protocol},
+            health_check={"interval": 10, "timeout": 2, "path": "/health"},
+            load_balance={
+                "algorithms": algorithm,
+                "servers": [
+                    {"host": "127.0.0.1", "port": port, "weight": weight}
+                    for port, weight in zip(ports, weights or [1] * len(ports))
+                ]
+            },
+            **sections
+        )
+
+    return make
@@ -0,0 +1,33 @@
+import sys
+
+import pytest
+
+from scripts.bench_algorithms import ALGORITHMS, case_name, check_scaling, load_baseline, run_matrix
+
+
+def test_check_scaling_flags_algorithm_turning_linear():
+    baseline = {
+        case_name("least_connections", 10, 1, 0.0): {"ns_per_op": 500, "peak_bytes": 1000, "retained_bytes_per_op": 0},
+        case_name("least_connections", 10000, 1, 0.0): {"ns_per_op": 600, "peak_bytes": 1000, "retained_bytes_per_op": 0},
+    }
+    linear = {
+        case_name("least_connections", 10, 1, 0.0): {"ns_per_op": 500, "peak_bytes": 1000, "retained_bytes_per_op": 0},
+        case_name("least_connections", 10000, 1, 0.0): {"ns_per_op": 90000, "peak_bytes": 80000, "retained_bytes_per_op": 0},
+    }
+
+    assert check_scaling(baseline, baseline, small=10, large=10000) == []
+    regressions = check_scaling(linear, baseline, small=10, large=10000)
+    assert len(regressions) == 2
+    assert "180.0x the cost at n=10" in regressions[0]
+    assert "peak_bytes" in regressions[1]
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_algorithm_cost_scales_like_baseline(algorithm):
+    baseline = load_baseline()
+    results = dict(run_matrix([algorithm], sizes=(10, 10000), concurrency=(1,), flap_rates=(0.0,),
+                              operations=2000, repeat=3))
+
+    # Allocation sizes are only comparable on the Python version the baseline was taken with
+    same_python = baseline["python"].split(".")[:2] == [str(part) for part in sys.version_info[:2]]
+    assert check_scaling(results, baseline["results"], small=10, large=10000, memory=same_python) == []
@@ -0,0 +1,334 @@
+from collections import Counter
+
+import pytest
+
+from async_flow.algorithms.alg_strategy import AlgorithmContext, AlgorithmFactory
+from async_flow.algorithms.weighted_round_robin import WeightedRoundRobinAlg
+from async_flow.models.config import LoadBalance, Server
+from async_flow.server_pool import ServerPool
+
+
+def make_servers(*weights):
+    return [
+        Server(host="127.0.0.1", port=9000 + i, weight=weight)
+        for i, weight in enumerate(weights)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_weighted_round_robin_honours_weights():
+    servers = make_servers(5, 1, 1)
+    context = AlgorithmContext(AlgorithmFactory().build("weighted_round_robin"))
+
+    picks = [await context.execute(servers) for _ in range(70)]
+
+    counts = Counter(server.port for server in picks)
+    assert counts == {9000: 50, 9001: 10, 9002: 10}
+
+
+def test_weighted_round_robin_schedule_is_interleaved():
+    servers = make_servers(2, 2, 4)
+
+    schedule = WeightedRoundRobinAlg.build_schedule(servers)
+
+    # Weights are reduced by their gcd, and the heavy server never runs back to back
+    assert len(schedule) == 4
+    assert [server.port for server in schedule].count(9002) == 2
+    assert all(a is not b for a, b in zip(schedule, schedule[1:]))
+
+
+@pytest.mark.asyncio
+async def test_weighted_round_robin_rebuilds_on_pool_change():
+    servers = make_servers(3, 1)
+    pool = ServerPool(servers)
+    algorithm = WeightedRoundRobinAlg()
+
+    await algorithm.select_server(pool.get_healthy_servers())
+    await pool.mark_unhealthy(servers[0])
+
+    picks = [await algorithm.select_server(pool.get_healthy_servers()) for _ in range(4)]
+    assert all(server is servers[1] for server in picks)
+
+
+@pytest.mark.asyncio
+async def test_least_connections_picks_minimum_and_tracks_releases():
+    servers = make_servers(1, 1, 1)
+    algorithm = AlgorithmFactory().build("least_connections")
+
+    first = [await algorithm.select_server(servers) for _ in range(3)]
+    assert len(set(map(id, first))) == 3
+
+    await algorithm.release_server(first[1])
+    assert await algorithm.select_server(servers) is first[1]
+    assert algorithm.active_connections(first[1]) == 1
+
+
+@pytest.mark.asyncio
+async def test_least_connections_matches_brute_force():
+    import random
+
+    rng = random.Random(7)
+    servers = make_servers(*([1] * 50))
+    pool = ServerPool(servers)
+    algorithm = AlgorithmFactory().build("least_connections")
+    in_flight = []
+
+    for step in range(3000):
+        if step % 200 == 0:
+            await pool.mark_unhealthy(rng.choice(servers))
+            await pool.mark_healthy(rng.choice(servers))
+
+        if in_flight and rng.random() < 0.45:
+            await algorithm.release_server(in_flight.pop(rng.randrange(len(in_flight))))
+            continue
+
+        healthy = pool.get_healthy_servers()
+        expected = min(algorithm.active_connections(server) for server in healthy)
+        chosen = await algorithm.select_server(healthy)
+        assert chosen in healthy
+        assert algorithm.active_connections(chosen) == expected + 1
+        in_flight.append(chosen)
+
+    for server in in_flight:
+        await algorithm.release_server(server)
+    assert all(algorithm.active_connections(server) == 0 for server in servers)
+
+
+@pytest.mark.asyncio
+async def test_least_connections_does_not_mutate_server_list():
+    servers = make_servers(1, 1, 1, 1)
+    original = list(servers)
+    algorithm = AlgorithmFactory().build("least_connections")
+
+    for _ in range(10):
+        await algorithm.select_server(servers)
+
+    assert all(a is b for a, b in zip(servers, original))
+
+
+@pytest.mark.asyncio
+async def test_p2c_prefers_less_loaded_of_two():
+    servers = make_servers(1, 1)
+    algorithm = AlgorithmFactory().build("p2c")
+
+    busy = await algorithm.select_server(servers)
+    # With two servers both are always sampled, so the idle one must win
+    idle = await algorithm.select_server(servers)
+    assert idle is not busy
+
+    await algorithm.release_server(busy)
+    assert algorithm.active_connections(busy) == 0
+    assert algorithm.active_connections(idle) == 1
+
+
+@pytest.mark.asyncio
+async def test_p2c_scales_load_by_weight():
+    servers = make_servers(4, 1)
+    algorithm = AlgorithmFactory().build("p2c")
+
+    picks = Counter()
+    for _ in range(10):
+        picks[(await algorithm.select_server(servers)).port] += 1
+
+    # Without releases the heavy server takes four requests for every one on the light server
+    assert picks == {9000: 8, 9001: 2}
+
+
+@pytest.mark.asyncio
+async def test_p2c_ignores_weights_when_configured():
+    servers = make_servers(4, 1)
+    options = LoadBalance(algorithms="p2c", servers=servers, options={"use_weights": False}).options
+    algorithm = AlgorithmFactory().build("p2c", options)
+
+    picks = Counter()
+    for _ in range(10):
+        picks[(await algorithm.select_server(servers)).port] += 1
+
+    assert not algorithm.use_weights and picks == {9000: 5, 9001: 5}
+
+
+@pytest.mark.asyncio
+async def test_peak_ewma_avoids_slow_backend():
+    servers = make_servers(1, 1)
+    algorithm = AlgorithmFactory().build("peak_ewma")
+    context = AlgorithmContext(algorithm)
+
+    context.observe(servers[0], 0.5, 0.6)
+    context.observe(servers[1], 0.01, 0.02)
+
+    for _ in range(20):
+        chosen = await context.execute(servers)
+        await context.release(chosen)
+        assert chosen is servers[1]
+
+
+def test_peak_ewma_reads_its_options():
+    options = LoadBalance(
+        algorithms="peak_ewma", servers=make_servers(1), options={"decay_time": 2.5, "default_rtt": 0.02}
+    ).options
+    algorithm = AlgorithmFactory().build("peak_ewma", options)
+
+    assert algorithm.decay_time == 2.5 and algorithm.default_rtt == 0.02
+    assert algorithm.latency(make_servers(1)[0]) == 0.02
+
+
+def test_peak_ewma_takes_peaks_and_smooths_dips():
+    servers = make_servers(1)
+    algorithm = AlgorithmFactory().build("peak_ewma")
+
+    algorithm.observe(servers[0], 0.01, 0.01)
+    algorithm.observe(servers[0], 0.2, 0.2)
+    assert algorithm.latency(servers[0]) == pytest.approx(0.2, rel=1e-3)
+
+    # A fast sample right after a peak barely moves the average
+    algorithm.observe(servers[0], 0.01, 0.01)
+    assert algorithm.latency(servers[0]) > 0.19
+
+
+@pytest.mark.asyncio
+async def test_consistent_hash_is_sticky_and_moves_few_keys():
+    servers = make_servers(*([1] * 10))
+    pool = ServerPool(servers)
+    algorithm = AlgorithmFactory().build("consistent_hash")
+    keys = [f"client-{i}" for i in range(2000)]
+
+    before = [await algorithm.select_server(pool.get_healthy_servers(), key) for key in keys]
+    again = [await algorithm.select_server(pool.get_healthy_servers(), key) for key in keys]
+    assert all(a is b for a, b in zip(before, again))
+
+    await pool.mark_unhealthy(servers[3])
+    after = [await algorithm.select_server(pool.get_healthy_servers(), key) for key in keys]
+
+    moved = sum(a is not b for a, b in zip(before, after))
+    owned = sum(server is servers[3] for server in before)
+    assert all(server is not servers[3] for server in after)
+    # Keys of the ejected server move; others mostly stay put
+    assert owned <= moved <= owned * 1.5
+
+
+def test_consistent_hash_table_follows_weights():
+    servers = make_servers(3, 1)
+
+    table = AlgorithmFactory().build("consistent_hash").build_table(servers, table_size=1009)
+
+    share = sum(server is servers[0] for server in table) / len(table)
+    assert share == pytest.approx(0.75, abs=0.02)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("algorithm_type", [
+    "round_robin", "weighted_round_robin", "least_connections", "p2c", "peak_ewma", "consistent_hash"
+])
+async def test_execute_excludes_tried_servers(algorithm_type):
+    servers = make_servers(1, 2, 1)
+    pool = ServerPool(servers)
+    context = AlgorithmContext(AlgorithmFactory().build(algorithm_type))
+
+    for key in ("a", "b", None):
+        tried = [await context.execute(pool.get_healthy_servers(), key)]
+        tried.append(await context.execute(pool.get_healthy_servers(), key, exclude=tried))
+        tried.append(await context.execute(pool.get_healthy_servers(), key, exclude=tried))
+        assert len(set(map(id, tried))) == 3
+        for server in tried:
+            await context.release(server)
+
+
+@pytest.mark.asyncio
+async def test_consistent_hash_retry_is_stable():
+    servers = make_servers(*([1] * 5))
+    pool = ServerPool(servers)
+    algorithm = AlgorithmFactory().build("consistent_hash")
+
+    first = await algorithm.select_server(pool.get_healthy_servers(), "client")
+    fallback = await algorithm.select_server_excluding(pool.get_healthy_servers(), "client", [first])
+    assert fallback is not first
+    assert await algorithm.select_server_excluding(pool.get_healthy_servers(), "client", [first]) is fallback
+
+
+@pytest.mark.asyncio
+async def test_weighted_round_robin_large_weights_skip_the_precomputed_schedule():
+    servers = make_servers(*(1000 + i for i in range(100)))
+    pool = ServerPool(servers)
+    algorithm = WeightedRoundRobinAlg()
+
+    cycle = sum(server.weight for server in servers)
+    picks = Counter([await algorithm.select_server(pool.get_healthy_servers()) for _ in range(cycle)])
+    assert algorithm._schedule == () and len(algorithm._heap) == 100
+    # Over one cycle every server gets exactly its weight
+    assert all(picks[server] == server.weight for server in servers)
+
+
+@pytest.mark.asyncio
+async def test_consistent_hash_builds_large_tables_off_the_request_path():
+    servers = make_servers(*([1] * 1000))
+    pool = ServerPool(servers)
+    algorithm = AlgorithmFactory().build("consistent_hash")
+    keys = [f"client-{i}" for i in range(200)]
+
+    # Before the first table exists keys still route consistently
+    first = [await algorithm.select_server(pool.get_healthy_servers(), key) for key in keys]
+    assert first == [await algorithm.select_server(pool.get_healthy_servers(), key) for key in keys]
+    await algorithm._build
+    assert len(algorithm._table) == 100003
+    built = [await algorithm.select_server(pool.get_healthy_servers(), key) for key in keys]
+
+    ejected = built[0]
+    await pool.mark_unhealthy(ejected)
+    # The old table keeps serving, with the ejected server's keys rehashed
+    during = [await algorithm.select_server(pool.get_healthy_servers(), key) for key in keys]
+    assert algorithm._build is not None and ejected not in during
+    assert all(a is b for a, b in zip(built, during) if a is not ejected)
+    await algorithm._build
+    after = [await algorithm.select_server(pool.get_healthy_servers(), key) for key in keys]
+    assert ejected not in after and len(algorithm._table) == 100003
+
+
+@pytest.mark.asyncio
+async def test_weighted_round_robin_exclusions_keep_the_schedule():
+    servers = make_servers(1, 2, 3, 4)
+    pool = ServerPool(servers)
+    context = AlgorithmContext(WeightedRoundRobinAlg())
+
+    normal = Counter()
+    for _ in range(1000):
+        picked = await context.execute(pool.get_healthy_servers())
+        normal[picked.port] += 1
+        retried = await context.execute(pool.get_healthy_servers(), exclude=[picked])
+        assert retried is not picked
+
+    # Retries neither rebuild the schedule nor move its position
+    assert normal == {9000: 100, 9001: 200, 9002: 300, 9003: 400}
+
+
+@pytest.mark.asyncio
+async def test_least_connections_exclusions_do_not_resync_members():
+    servers = make_servers(1, 1, 1, 1)
+    pool = ServerPool(servers)
+    algorithm = AlgorithmFactory().build("least_connections")
+    context = AlgorithmContext(algorithm)
+
+    picked = await context.execute(pool.get_healthy_servers())
+    members_key = algorithm._members_key
+    retried = [await context.execute(pool.get_healthy_servers(), exclude=[picked]) for _ in range(3)]
+    assert picked not in retried and len(set(map(id, retried))) == 3
+    assert algorithm._members_key == members_key
+
+    # Every server holds one request, so the next normal pick can go anywhere; excluding three leaves one
+    assert await context.execute(pool.get_healthy_servers(), exclude=retried) is picked
+    assert algorithm.active_connections(picked) == 2
+
+
+@pytest.mark.asyncio
+async def test_peak_ewma_forgets_removed_servers():
+    servers = make_servers(1, 1)
+    algorithm = AlgorithmFactory().build("peak_ewma")
+    context = AlgorithmContext(algorithm)
+    context.observe(servers[0], 0.2, 0.2)
+    in_flight = await context.execute(servers[1:])
+
+    context.forget(servers[0])
+    context.forget(servers[1])
+    # A request still in flight to a removed server does not bring its entry back
+    context.observe(in_flight, 0.3, 0.3)
+    await context.release(in_flight)
+    assert algorithm._rtt == {} and algorithm._stamp == {} and algorithm._forgotten == set()
@@ -0,0 +1,136 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer, make_mocked_request
+from multidict import CIMultiDict, CIMultiDictProxy
+from unittest.mock import patch
+
+from async_flow.cache import ResponseCache, freshness_lifetime
+from async_flow.core import LoadBalancer
+from async_flow.models.config import Cache, LoadBalancerConfig
+
+
+def _headers(**headers):
+    return CIMultiDictProxy(CIMultiDict({name.replace("_", "-"): value for name, value in headers.items()}))
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"Cache-Control": "max-age=60"}, 60),
+    ({"Cache-Control": "public, s-maxage=30, max-age=60"}, 30),
+    ({"Cache-Control": "max-age=60", "Age": "20"}, 40),
+    ({"Cache-Control": "no-cache"}, 0),
+    ({"Cache-Control": "no-store, max-age=60"}, None),
+    ({"Cache-Control": "private, max-age=60"}, None),
+    ({"Expires": "Thu, 01 Jan 2026 00:01:00 GMT", "Date": "Thu, 01 Jan 2026 00:00:00 GMT"}, 60),
+    ({"Expires": "0"}, 0),
+    ({}, None),
+])
+def test_freshness_lifetime(headers, expected):
+    assert freshness_lifetime(headers) == expected
+
+
+def test_store_honours_vary():
+    cache = ResponseCache(Cache(enabled=True))
+    english = make_mocked_request("GET", "/items", headers={"Accept-Language": "en"})
+    german = make_mocked_request("GET", "/items", headers={"Accept-Language": "de"})
+
+    lookup = cache.lookup(english)
+    cache.store(lookup, english, 200, _headers(Cache_Control="max-age=60", Vary="Accept-Language"), b"hello")
+
+    assert cache.lookup(english).fresh
+    assert cache.lookup(german).entry is None
+
+
+def test_uncacheable_responses_are_not_stored():
+    cache = ResponseCache(Cache(enabled=True, max_entry_bytes=10))
+    request = make_mocked_request("GET", "/")
+
+    for status, headers, body in [
+        (200, _headers(Cache_Control="max-age=60", Vary="*"), b"x"),
+        (200, _headers(Cache_Control="max-age=60", Set_Cookie="a=b"), b"x"),
+        (500, _headers(Cache_Control="max-age=60"), b"x"),
+        (200, _headers(Cache_Control="max-age=60"), b"x" * 11),
+        (200, _headers(Cache_Control="no-cache"), b"x"),
+    ]:
+        assert cache.store(cache.lookup(request), request, status, headers, body) is None
+    assert cache.lookup(make_mocked_request("POST", "/")) is None
+    assert cache.lookup(make_mocked_request("GET", "/", headers={"Authorization": "token"})) is None
+
+
+def test_lru_eviction_is_bounded_by_bytes():
+    cache = ResponseCache(Cache(enabled=True, max_bytes=250))
+    headers = _headers(Cache_Control="max-age=60")
+
+    for path in ("/a", "/b", "/c"):
+        request = make_mocked_request("GET", path)
+        cache.store(cache.lookup(request), request, 200, headers, b"x" * 100)
+        if path == "/b":
+            # Touch /a so /b is the least recently used
+            cache.lookup(make_mocked_request("GET", "/a"))
+
+    assert cache.size <= 250
+    assert cache.evictions == 1
+    assert cache.lookup(make_mocked_request("GET", "/b")).entry is None
+    assert cache.lookup(make_mocked_request("GET", "/a")).fresh
+
+
+def test_respond_answers_conditional_requests():
+    cache = ResponseCache(Cache(enabled=True))
+    request = make_mocked_request("GET", "/")
+    entry = cache.store(cache.lookup(request), request, 200, _headers(Cache_Control="max-age=60", ETag='"v1"'), b"body")
+
+    assert cache.respond(make_mocked_request("GET", "/", headers={"If-None-Match": '"v1"'}), entry).status == 304
+    response = cache.respond(make_mocked_request("GET", "/", headers={"If-None-Match": '"v0"'}), entry)
+    assert response.status == 200 and response.body == b"body"
+
+
+def test_304_without_cache_control_keeps_the_stored_lifetime():
+    cache = ResponseCache(Cache(enabled=True))
+    request = make_mocked_request("GET", "/")
+    entry = cache.store(cache.lookup(request), request, 200, _headers(Cache_Control="max-age=60", ETag='"v1"'), b"body")
+
+    with patch("async_flow.cache.time.monotonic", return_value=entry.expires_at + 1):
+        lookup = cache.lookup(request)
+        assert not lookup.fresh
+        refreshed = cache.refresh(lookup, _headers(ETag='"v1"', Date="Sat, 17 Oct 2026 04:00:00 GMT"))
+        assert refreshed.headers["Cache-Control"] == "max-age=60"
+        assert cache.lookup(make_mocked_request("GET", "/")).fresh
+
+
+@pytest.mark.asyncio
+async def test_load_balancer_serves_hits_and_revalidates():
+    calls = []
+
+    async def resource(request):
+        calls.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"', "Cache-Control": "max-age=60"})
+        return web.Response(text="payload", headers={"ETag": '"v1"', "Cache-Control": "max-age=60"})
+
+    app = web.Application()
+    app.router.add_get("/resource", resource)
+    backend = TestServer(app)
+    await backend.start_server()
+
+    lb = LoadBalancer(LoadBalancerConfig(
+        listen={"host": "127.0.0.1", "port": 8080, "protocol": "http"},
+        health_check={"interval": 5, "timeout": 2, "path": "/health"},
+        load_balance={"algorithms": "round_robin", "servers": [{"host": "127.0.0.1", "port": backend.port, "weight": 1}]},
+        cache={"enabled": True}
+    ))
+    await lb.upstream_pool.start()
+    try:
+        for _ in range(3):
+            response = await lb.handle_http_request(make_mocked_request("GET", "/resource"))
+            assert response.status == 200 and response.body == b"payload"
+        assert calls == [None]
+        assert (lb.stats["cache_hits"], lb.stats["cache_misses"]) == (2, 1)
+
+        # Once stale, the entry is revalidated and the body is served from memory
+        entry = next(iter(lb.response_cache._entries.values()))
+        with patch("async_flow.cache.time.monotonic", return_value=entry.expires_at + 1):
+            response = await lb.handle_http_request(make_mocked_request("GET", "/resource"))
+        assert response.status == 200 and response.body == b"payload"
+        assert calls == [None, '"v1"']
+    finally:
+        await lb.upstream_pool.close()
+        await backend.close()
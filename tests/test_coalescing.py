@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer, make_mocked_request
+
+from async_flow.coalescing import RequestCoalescer
+from async_flow.core import LoadBalancer
+from async_flow.models.config import Coalescing, LoadBalancerConfig
+
+
+def test_key_covers_method_url_and_vary_headers():
+    coalescer = RequestCoalescer(Coalescing(enabled=True, vary_headers=["Accept"]))
+
+    a = coalescer.key(make_mocked_request("GET", "/items?page=1", headers={"Accept": "text/html"}))
+    b = coalescer.key(make_mocked_request("GET", "/items?page=1", headers={"Accept": "text/html"}))
+    c = coalescer.key(make_mocked_request("GET", "/items?page=1", headers={"Accept": "application/json"}))
+    assert a == b != c
+    assert coalescer.key(make_mocked_request("POST", "/items")) is None
+    # Personalised requests are not merged unless the credentials are part of the key
+    assert coalescer.key(make_mocked_request("GET", "/items", headers={"Cookie": "session=1"})) is None
+    with_cookie = RequestCoalescer(Coalescing(enabled=True, vary_headers=["cookie"]))
+    assert with_cookie.key(make_mocked_request("GET", "/items", headers={"Cookie": "session=1"})) is not None
+
+
+@pytest.mark.asyncio
+async def test_waiters_fall_back_after_timeout_or_unshareable_response():
+    coalescer = RequestCoalescer(Coalescing(enabled=True, max_body_bytes=4, wait_timeout=0.05))
+    release = asyncio.Event()
+    calls = []
+
+    async def fetch(body):
+        calls.append(body)
+        await release.wait()
+        return web.Response(body=body)
+
+    async def slow_then_release():
+        await asyncio.sleep(0.1)
+        release.set()
+
+    # The waiter gives up on the slow leader and fetches on its own
+    results = await asyncio.gather(
+        coalescer.run("slow", lambda: fetch(b"lead")),
+        coalescer.run("slow", lambda: fetch(b"own")),
+        slow_then_release()
+    )
+    assert [shared for _, shared in results[:2]] == [False, False]
+    assert calls == [b"lead", b"own"]
+
+    # Bodies above the cap are not shared either
+    calls.clear()
+    results = await asyncio.gather(
+        coalescer.run("big", lambda: fetch(b"too large")),
+        coalescer.run("big", lambda: fetch(b"too large"))
+    )
+    assert [shared for _, shared in results] == [False, False]
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_load_balancer_merges_identical_requests():
+    calls = 0
+
+    async def popular(request):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return web.Response(text="hot")
+
+    app = web.Application()
+    app.router.add_get("/popular", popular)
+    backend = TestServer(app)
+    await backend.start_server()
+
+    lb = LoadBalancer(LoadBalancerConfig(
+        listen={"host": "127.0.0.1", "port": 8080, "protocol": "http"},
+        health_check={"interval": 5, "timeout": 2, "path": "/health"},
+        load_balance={"algorithms": "round_robin", "servers": [{"host": "127.0.0.1", "port": backend.port, "weight": 1}]},
+        coalescing={"enabled": True}
+    ))
+    await lb.upstream_pool.start()
+    try:
+        responses = await asyncio.gather(
+            *(lb.handle_http_request(make_mocked_request("GET", "/popular")) for _ in range(20))
+        )
+        assert all(response.status == 200 and response.body == b"hot" for response in responses)
+        assert calls == 1
+        assert lb.stats["coalesced"] == 19
+    finally:
+        await lb.upstream_pool.close()
+        await backend.close()
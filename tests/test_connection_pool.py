@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import MagicMock
+
+from async_flow.connection_pool import UpstreamConnectionPool
+from async_flow.models.config import Server, UpstreamPool
+
+
+@pytest.fixture
+def servers():
+    return [
+        Server(host="127.0.0.1", port=9000, weight=1),
+        Server(host="127.0.0.2", port=9001, weight=1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_session_reused_per_backend(servers):
+    pool = UpstreamConnectionPool(UpstreamPool(max_connections_per_host=7, keepalive_timeout=30))
+    await pool.start()
+
+    first = pool.session_for(servers[0])
+    assert pool.session_for(servers[0]) is first
+    assert pool.session_for(servers[1]) is not first
+    assert first.connector.limit_per_host == 7
+
+    await pool.close()
+    assert first.closed
+
+
+@pytest.mark.asyncio
+async def test_remove_closes_backend_session(servers):
+    pool = UpstreamConnectionPool(UpstreamPool())
+    await pool.start()
+
+    removed = pool.session_for(servers[0])
+    kept = pool.session_for(servers[1])
+    await pool.remove(servers[0])
+
+    assert removed.closed
+    assert not kept.closed
+    assert pool.session_for(servers[0]) is not removed
+
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_connection_retired_after_max_requests():
+    pool = UpstreamConnectionPool(UpstreamPool(max_requests_per_connection=2))
+    await pool.start()
+
+    response = MagicMock()
+    pool.track(response)
+    response.connection.protocol.force_close.assert_not_called()
+    pool.track(response)
+    response.connection.protocol.force_close.assert_called_once()
+
+    await pool.close()
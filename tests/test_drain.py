@@ -0,0 +1,170 @@
+import asyncio
+import os
+import signal
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from async_flow.core import LoadBalancer
+
+
+async def _slow_echo_backend(delay):
+    """Answers each line after ``delay`` seconds, or never if ``delay`` is None."""
+
+    async def handle(reader, writer):
+        line = await reader.readline()
+        if delay is None:
+            await reader.read()
+        else:
+            await asyncio.sleep(delay)
+            writer.write(line)
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def _connect(port):
+    for _ in range(50):
+        try:
+            return await asyncio.open_connection("127.0.0.1", port)
+        except ConnectionRefusedError:
+            await asyncio.sleep(0.02)
+    pytest.fail("load balancer never started listening")
+
+
+async def _until(condition):
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    pytest.fail("condition never became true")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("engine", ["protocol", "stream", "splice"])
+async def test_shutdown_lets_in_flight_tcp_connections_finish(engine, make_config):
+    from async_flow.relay import SPLICE_AVAILABLE
+
+    if engine == "splice" and not SPLICE_AVAILABLE:
+        pytest.skip("os.splice is not available")
+    backend = await _slow_echo_backend(0.2)
+    lb = LoadBalancer(make_config([backend.sockets[0].getsockname()[1]], "tcp", proxy={"tcp_relay": engine}, drain={"timeout": 5}))
+    serving = asyncio.create_task(lb.start())
+    try:
+        reader, writer = await _connect(lb.config.listen.port)
+        writer.write(b"hello\n")
+        await _until(lambda: lb._relays)
+
+        shutdown = asyncio.create_task(lb.shutdown())
+        await _until(lambda: lb.draining)
+        # No new connections while draining, but the open one is answered
+        with pytest.raises(OSError):
+            await asyncio.open_connection("127.0.0.1", lb.config.listen.port)
+        assert await asyncio.wait_for(reader.readline(), timeout=5) == b"hello\n"
+        writer.close()
+        await asyncio.wait_for(shutdown, timeout=2)
+        await asyncio.wait_for(serving, timeout=1)
+    finally:
+        serving.cancel()
+        backend.close()
+    assert lb.stats["errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_shutdown_closes_tcp_connections_after_drain_timeout(make_config):
+    backend = await _slow_echo_backend(None)
+    lb = LoadBalancer(make_config([backend.sockets[0].getsockname()[1]], "tcp", drain={"timeout": 0.1}))
+    serving = asyncio.create_task(lb.start())
+    try:
+        reader, writer = await _connect(lb.config.listen.port)
+        writer.write(b"hello\n")
+        await _until(lambda: lb._relays)
+
+        started = time.monotonic()
+        await asyncio.wait_for(lb.shutdown(), timeout=5)
+        assert time.monotonic() - started < 2
+        assert await asyncio.wait_for(reader.read(), timeout=1) == b""
+        assert not lb._connections
+        writer.close()
+    finally:
+        serving.cancel()
+        backend.close()
+
+
+@pytest.mark.asyncio
+async def test_removed_backend_keeps_relays_until_backend_timeout(make_config):
+    backend = await _slow_echo_backend(None)
+    lb = LoadBalancer(make_config([backend.sockets[0].getsockname()[1]], "tcp", drain={"backend_timeout": 0.2}))
+    serving = asyncio.create_task(lb.start())
+    try:
+        reader, writer = await _connect(lb.config.listen.port)
+        writer.write(b"hello\n")
+        await _until(lambda: lb._relays)
+
+        await lb.remove_server(lb.server_pool.get_all_servers()[0])
+        # Still relaying within the backend's drain timeout
+        await asyncio.sleep(0.05)
+        assert lb._relays and not reader.at_eof()
+        assert await asyncio.wait_for(reader.read(), timeout=2) == b""
+        await _until(lambda: not lb._relays)
+        writer.close()
+    finally:
+        await lb.shutdown()
+        serving.cancel()
+        backend.close()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_lets_in_flight_http_requests_finish(make_config):
+    async def slow(request):
+        await asyncio.sleep(0.3)
+        return web.Response(text="done")
+
+    backend_app = web.Application()
+    backend_app.router.add_get("/slow", slow)
+    backend = TestServer(backend_app)
+    await backend.start_server()
+    lb = LoadBalancer(make_config([backend.port], drain={"timeout": 5}))
+    serving = asyncio.create_task(lb.start())
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            port = lb.config.listen.port
+            for _ in range(50):
+                if lb._runner is not None and lb._runner.sites:
+                    break
+                await asyncio.sleep(0.02)
+            request = asyncio.create_task(session.get(f"http://127.0.0.1:{port}/slow"))
+            await _until(lambda: lb.stats["requests"])
+
+            await asyncio.wait_for(lb.shutdown(), timeout=5)
+            response = await request
+            assert response.status == 200 and await response.text() == "done"
+            await asyncio.wait_for(serving, timeout=1)
+    finally:
+        serving.cancel()
+        await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_serve_drains_on_stop_signal(make_config):
+    backend = await _slow_echo_backend(0.1)
+    lb = LoadBalancer(make_config([backend.sockets[0].getsockname()[1]], "tcp", drain={"timeout": 5}))
+    serving = asyncio.create_task(lb.serve(stop_signals=(signal.SIGUSR2,)))
+    try:
+        reader, writer = await _connect(lb.config.listen.port)
+        writer.write(b"hello\n")
+        await _until(lambda: lb._relays)
+
+        os.kill(os.getpid(), signal.SIGUSR2)
+        assert await asyncio.wait_for(reader.readline(), timeout=5) == b"hello\n"
+        writer.close()
+        await asyncio.wait_for(serving, timeout=2)
+        assert lb.draining
+    finally:
+        serving.cancel()
+        backend.close()
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from async_flow.health import HealthCheck
+from async_flow.models.config import HealthCheck as HealthCheckConfig, Server
+from async_flow.server_pool import ServerPool
+
+
+class FakeStrategy:
+    """Health check strategy whose answers are controlled by the test."""
+
+    def __init__(self, dead=(), delay=0.0):
+        self.dead = set(dead)
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+
+    async def check_health(self, server):
+        self.calls.append(server.port)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return server.port not in self.dead
+
+
+def make_health_check(servers, strategy, interval=1, **config):
+    settings = {"interval": 1, "timeout": 1, "retries": 3, "retry_delay": 0.05, **config}
+    health_check = HealthCheck(ServerPool(servers), HealthCheckConfig(**settings))
+    # The config only takes whole seconds; shorten the interval to keep tests fast
+    health_check.interval = interval
+    health_check.health_check_strategy = strategy
+    health_check.running = True
+    return health_check
+
+
+@pytest.fixture
+def servers():
+    return [Server(host="127.0.0.1", port=9000 + i, weight=1) for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_failed_server_retries_without_blocking_others(servers):
+    strategy = FakeStrategy(dead={9000})
+    health_check = make_health_check(servers, strategy, interval=0.2)
+
+    task = asyncio.create_task(health_check.run())
+    await asyncio.sleep(0.45)
+    await health_check.close()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert not servers[0].healthy
+    assert all(server.healthy for server in servers[1:])
+    # Healthy servers kept their own cadence while the dead one was retried
+    assert all(strategy.calls.count(9000 + i) >= 2 for i in range(1, 5))
+
+
+@pytest.mark.asyncio
+async def test_probe_concurrency_is_bounded(servers):
+    strategy = FakeStrategy(delay=0.05)
+    health_check = make_health_check(servers, strategy, interval=0.01, max_concurrent=2)
+
+    task = asyncio.create_task(health_check.run())
+    await asyncio.sleep(0.2)
+    await health_check.close()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert strategy.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_check_server_returns_backoff_then_marks_unhealthy(servers):
+    health_check = make_health_check(servers, FakeStrategy(dead={9000}), retries=2, retry_delay=0.5)
+
+    assert await health_check.check_server(servers[0]) == 0.5
+    assert servers[0].healthy
+
+    delay = await health_check.check_server(servers[0])
+    assert not servers[0].healthy
+    assert 0.9 <= delay <= 1.1
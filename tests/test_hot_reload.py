@@ -0,0 +1,139 @@
+import asyncio
+import os
+import signal
+import threading
+
+import pytest
+import yaml
+
+from async_flow.config import Config
+from async_flow.core import LoadBalancer
+from async_flow.models.config import LoadBalancerConfig, Server
+from async_flow.reload import ConfigReloader
+from async_flow.server_pool import ServerPool
+
+
+def _raw_config(servers, algorithm="least_connections"):
+    return {
+        "listen": {"host": "127.0.0.1", "port": 8080, "protocol": "http"},
+        "health_check": {"interval": 10, "timeout": 2, "path": "/health"},
+        "load_balance": {
+            "algorithms": algorithm,
+            "servers": [{"host": "127.0.0.1", "port": port, "weight": weight} for port, weight in servers]
+        },
+        "reload": {"watch": True, "poll_interval": 0.02},
+        "drain": {"backend_timeout": 5}
+    }
+
+
+def _servers(*ports_and_weights):
+    return [Server(host="127.0.0.1", port=port, weight=weight) for port, weight in ports_and_weights]
+
+
+@pytest.mark.asyncio
+async def test_pool_update_diffs_by_address():
+    pool = ServerPool(_servers((9000, 1), (9001, 1), (9002, 1)))
+    kept, reweighted_server, removed_server = pool.get_all_servers()
+    await pool.mark_unhealthy(kept)
+    version = pool.version
+
+    added, removed, reweighted = await pool.update(_servers((9000, 1), (9001, 3), (9003, 1)))
+
+    assert [s.port for s in added] == [9003]
+    assert removed == [removed_server]
+    assert reweighted == [reweighted_server] and reweighted_server.weight == 3
+    # Unchanged backends keep their instance and health state
+    assert pool.get_all_servers()[0] is kept and not kept.healthy
+    assert [s.port for s in pool.get_healthy_servers()] == [9001, 9003]
+    assert pool.version > version
+
+
+@pytest.mark.asyncio
+async def test_pool_update_with_identical_servers_is_a_no_op():
+    pool = ServerPool(_servers(*((9000 + i, 1) for i in range(2000))))
+    snapshot = pool.get_healthy_servers()
+
+    assert await pool.update(_servers(*((9000 + i, 1) for i in range(2000)))) == ([], [], [])
+    assert pool.get_healthy_servers() is snapshot
+
+
+@pytest.mark.asyncio
+async def test_reload_keeps_algorithm_state_for_unchanged_backends():
+    load_balancer = LoadBalancer(LoadBalancerConfig(**_raw_config([(9000, 1), (9001, 1)])))
+    algorithm = load_balancer.algorithm_context.algorithm
+    busy = await load_balancer.algorithm_context.execute(load_balancer.server_pool.get_healthy_servers())
+
+    await load_balancer.reload(LoadBalancerConfig(**_raw_config([(9000, 1), (9001, 1), (9002, 1)])))
+
+    assert load_balancer.algorithm_context.algorithm is algorithm
+    assert algorithm.active_connections(busy) == 1
+    assert [s.port for s in load_balancer.config.load_balance.servers] == [9000, 9001, 9002]
+    picks = {await load_balancer.algorithm_context.execute(load_balancer.server_pool.get_healthy_servers())
+             for _ in range(2)}
+    assert busy not in picks
+
+    await load_balancer.reload(LoadBalancerConfig(**_raw_config([(9000, 1)], algorithm="round_robin")))
+
+    assert load_balancer.algorithm_context.algorithm is not algorithm
+    assert load_balancer.algorithm is load_balancer.algorithm_context.algorithm
+    assert load_balancer.config.load_balance.algorithms == "round_robin"
+    await load_balancer.upstream_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_reloader_applies_file_changes_and_sighup(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.dump(_raw_config([(9000, 1)])))
+    config_loader = Config(target_file=str(path), is_yaml=True)
+    load_balancer = LoadBalancer(config_loader.get_config())
+    reloader = ConfigReloader(config_loader, load_balancer)
+    await reloader.start()
+
+    async def wait_for_ports(ports):
+        for _ in range(100):
+            if [s.port for s in load_balancer.server_pool.get_all_servers()] == ports:
+                return
+            await asyncio.sleep(0.02)
+        pytest.fail(f"pool never became {ports}")
+
+    try:
+        # Distinct sizes so the change is seen even within one mtime tick
+        path.write_text(yaml.dump(_raw_config([(9000, 1), (9001, 1)])))
+        await wait_for_ports([9000, 9001])
+
+        # An invalid file keeps the running configuration
+        path.write_text("load_balance: [")
+        await asyncio.sleep(0.1)
+        assert [s.port for s in load_balancer.server_pool.get_all_servers()] == [9000, 9001]
+
+        reloader.watch = False
+        reloader._watcher.cancel()
+        path.write_text(yaml.dump(_raw_config([(9002, 1)])))
+        os.kill(os.getpid(), signal.SIGHUP)
+        await wait_for_ports([9002])
+    finally:
+        await reloader.close()
+        await load_balancer.upstream_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_reloader_parses_the_file_off_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.dump(_raw_config([(9000, 1)])))
+    config_loader = Config(target_file=str(path), is_yaml=True)
+    load_balancer = LoadBalancer(config_loader.get_config())
+    reloader = ConfigReloader(config_loader, load_balancer, watch=False)
+
+    threads = []
+    validate = Config.validate_config
+
+    def record_thread(self):
+        threads.append(threading.get_ident())
+        validate(self)
+
+    monkeypatch.setattr(Config, "validate_config", record_thread)
+    path.write_text(yaml.dump(_raw_config([(9000, 1), (9001, 1)])))
+    assert await reloader.reload()
+    assert threads and threading.get_ident() not in threads
+    assert [s.port for s in config_loader.get_config().load_balance.servers] == [9000, 9001]
+    assert [s.port for s in load_balancer.server_pool.get_all_servers()] == [9000, 9001]
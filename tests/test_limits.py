@@ -0,0 +1,170 @@
+import asyncio
+from collections import Counter
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from async_flow.core import LoadBalancer
+from async_flow.limits import ConcurrencyLimiter
+from async_flow.models.config import ConcurrencyLimit, Server
+
+
+def _server(port=9000):
+    return Server(host="127.0.0.1", port=port, weight=1)
+
+
+@pytest.mark.asyncio
+async def test_limiter_queues_until_a_slot_is_released():
+    limiter = ConcurrencyLimiter(ConcurrencyLimit(enabled=True, max_connections=2, queue_size=1))
+    server = _server()
+
+    assert limiter.try_acquire(server) and limiter.try_acquire(server)
+    assert not limiter.try_acquire(server)
+    assert server.active_connections == 2 and limiter.all_saturated([server])
+
+    waiter = asyncio.create_task(limiter.wait(1))
+    await asyncio.sleep(0)
+    # The queue holds one request, the next is shed at once
+    assert await limiter.wait(1) is False
+    limiter.release(server)
+    assert await waiter is True
+    assert not limiter.all_saturated([server]) and limiter.try_acquire(server)
+
+    assert await limiter.wait(0.01) is False
+    assert not limiter._waiters
+
+
+def test_adaptive_limit_backs_off_on_latency_and_recovers():
+    limiter = ConcurrencyLimiter(ConcurrencyLimit(
+        enabled=True, max_connections=10, adaptive=True, min_connections=2, backoff=0.5
+    ))
+    server = _server()
+    for _ in range(10):
+        assert limiter.try_acquire(server)
+    limiter.release(server, latency=0.01)
+    assert limiter.limit(server) == 10
+
+    # Only one back-off per round trip, however many slow responses arrive together
+    limiter.release(server, latency=0.1)
+    limiter.release(server, latency=0.1)
+    assert limiter.limit(server) == 5
+    limiter._limits[server].decreased_at = 0
+    limiter.release(server, failed=True)
+    limiter._limits[server].decreased_at = 0
+    limiter.release(server, failed=True)
+    assert limiter.limit(server) == 2
+
+    while server.active_connections:
+        limiter.release(server, latency=0.01)
+
+    # Fast responses grow the limit back while the backend uses at least half of it
+    for _ in range(100):
+        assert limiter.try_acquire(server) and limiter.try_acquire(server)
+        limiter.release(server, latency=0.01)
+        limiter.release(server, latency=0.01)
+    assert limiter.limit(server) == 4
+
+
+async def _slow_backend(delay):
+    async def slow(request):
+        await asyncio.sleep(delay)
+        return web.Response(text="done")
+
+    app = web.Application()
+    app.router.add_get("/slow", slow)
+    backend = TestServer(app)
+    await backend.start_server()
+    return backend
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("queue_size, statuses", [(0, [200, 503, 503]), (2, [200, 200, 200])])
+async def test_full_backends_queue_or_shed(queue_size, statuses, make_config):
+    backend = await _slow_backend(0.1)
+    lb = LoadBalancer(make_config([backend.port], concurrency={
+        "enabled": True, "max_connections": 1, "queue_size": queue_size, "queue_timeout": 5
+    }))
+    await lb.upstream_pool.start()
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', lb.handle_http_request)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+
+    try:
+        responses = await asyncio.gather(*(client.get("/slow") for _ in range(3)))
+        assert sorted(response.status for response in responses) == statuses
+        assert lb.stats["shed"] == statuses.count(503)
+        assert lb.server_pool.get_all_servers()[0].active_connections == 0
+    finally:
+        await client.close()
+        await backend.close()
+        await lb.upstream_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_saturated_backend_is_skipped(make_config):
+    backends = [await _slow_backend(0.1), await _slow_backend(0.1)]
+    lb = LoadBalancer(make_config(
+        [backend.port for backend in backends], concurrency={"enabled": True, "max_connections": 1, "queue_size": 0}
+    ))
+    await lb.upstream_pool.start()
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', lb.handle_http_request)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+
+    try:
+        first = asyncio.create_task(client.get("/slow"))
+        while not lb.stats["active"]:
+            await asyncio.sleep(0.005)
+        # Point round robin back at the first backend, which is busy
+        lb.algorithm_context.algorithm.current_index = -1
+        second = await client.get("/slow")
+        assert second.status == 200 and (await first).status == 200
+        assert lb.stats["shed"] == 0
+    finally:
+        await client.close()
+        for backend in backends:
+            await backend.close()
+        await lb.upstream_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_saturated_backend_is_skipped_without_disturbing_weighted_round_robin(make_config):
+    lb = LoadBalancer(make_config(
+        [9001, 9002, 9003], algorithm="weighted_round_robin", weights=[1, 2, 3],
+        concurrency={"enabled": True, "max_connections": 2}
+    ))
+    light, medium, heavy = lb.server_pool.get_all_servers()
+    assert lb.limiter.try_acquire(heavy) and lb.limiter.try_acquire(heavy)
+
+    await lb._select_server(lb.server_pool.get_healthy_servers(), None, [])
+    schedule = lb.algorithm._schedule
+    picks = Counter()
+    for _ in range(600):
+        server = await lb._select_server(lb.server_pool.get_healthy_servers(), None, [])
+        picks[server.port] += 1
+        lb.limiter.release(server)
+
+    # The full backend's slots go to the next backend in the cached schedule, which is never rebuilt
+    assert lb.algorithm._schedule is schedule
+    assert picks == {9001: 100, 9002: 500}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("algorithm", ["round_robin", "weighted_round_robin", "least_connections", "p2c"])
+async def test_idle_backend_among_full_ones_takes_every_request(algorithm, make_config):
+    lb = LoadBalancer(make_config(
+        list(range(9000, 9010)), algorithm=algorithm, concurrency={"enabled": True, "max_connections": 1, "queue_size": 0}
+    ))
+    *full, idle = lb.server_pool.get_all_servers()
+    for server in full:
+        assert lb.limiter.try_acquire(server)
+
+    for _ in range(200):
+        server = await lb._select_server(lb.server_pool.get_healthy_servers(), None, [])
+        assert server is idle
+        lb.limiter.release(server)
+        await lb.algorithm_context.release(server)
+    assert lb.stats["shed"] == 0
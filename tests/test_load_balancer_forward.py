@@ -4,8 +4,9 @@ import pytest
 import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 from async_flow.core import LoadBalancer
-from async_flow.models.config import LoadBalancerConfig
+from async_flow.models.config import HashKey, LoadBalancerConfig, Server
 from aiohttp import web
+from yarl import URL
 
 @pytest.fixture
 def mock_config():
@@ -44,14 +45,12 @@ def mock_health_check():
 def mock_server_pool():
     """Fixture to mock the ServerPool object."""
     server_pool = MagicMock()
-    server_pool.get_all_servers.return_value = [
-        {"host": "127.0.0.1", "port": 9000, "weight": 1, "healthy": True},
-        {"host": "127.0.0.2", "port": 9001, "weight": 1, "healthy": True}
-    ]
-    server_pool.get_healthy_servers.return_value = [
-        {"host": "127.0.0.1", "port": 9000, "weight": 1, "healthy": True},
-        {"host": "127.0.0.2", "port": 9001, "weight": 1, "healthy": True}
+    servers = [
+        Server(host="127.0.0.1", port=9000, weight=1, healthy=True),
+        Server(host="127.0.0.2", port=9001, weight=1, healthy=True)
     ]
+    server_pool.get_all_servers.return_value = servers
+    server_pool.get_healthy_servers.return_value = servers
     return server_pool
 
 @pytest.fixture
@@ -82,7 +81,7 @@ async def test_forward_http_request(load_balancer, mock_health_check, mock_serve
         # Create a mock request
         request = MagicMock(spec=web.Request)
         request.method = "GET"
-        request.rel_url = web.URL("/test")
+        request.rel_url = URL("/test")
         request.headers = {}
         request.read = AsyncMock(return_value=b"")
 
@@ -100,3 +99,120 @@ async def test_forward_http_request(load_balancer, mock_health_check, mock_serve
         assert response.text == "Hello from LoadBalancer!"
 
     await load_balancer.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_streaming_proxies_large_bodies():
+    """Test that bodies above the buffer threshold are streamed in both directions."""
+    from aiohttp.test_utils import TestClient, TestServer
+
+    payload = b"x" * (256 * 1024)
+
+    async def echo(request):
+        # Echo the upload back as a chunked response
+        response = web.StreamResponse()
+        await response.prepare(request)
+        async for chunk in request.content.iter_chunked(8192):
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+
+    backend_app = web.Application()
+    backend_app.router.add_post("/echo", echo)
+    backend = TestServer(backend_app)
+    await backend.start_server()
+
+    config = LoadBalancerConfig(
+        listen={"host": "127.0.0.1", "port": 8080, "protocol": "http"},
+        health_check={"interval": 5, "timeout": 2, "path": "/health"},
+        load_balance={
+            "algorithms": "round_robin",
+            "servers": [{"host": "127.0.0.1", "port": backend.port, "weight": 1}]
+        },
+        proxy={"streaming": True, "buffer_threshold": 1024, "chunk_size": 4096}
+    )
+    lb = LoadBalancer(config)
+    await lb.upstream_pool.start()
+
+    lb_app = web.Application()
+    lb_app.router.add_route('*', '/{tail:.*}', lb.handle_http_request)
+    client = TestClient(TestServer(lb_app))
+    await client.start_server()
+
+    try:
+        resp = await client.post("/echo", data=payload)
+        assert resp.status == 200
+        assert await resp.read() == payload
+    finally:
+        await client.close()
+        await backend.close()
+        await lb.upstream_pool.close()
+
+
+@pytest.mark.parametrize("hash_key, expected", [
+    ({"source": "client_ip"}, "10.1.2.3"),
+    ({"source": "header", "name": "X-User"}, "alice"),
+    ({"source": "cookie", "name": "session"}, "abc"),
+    ({"source": "path", "path_segments": 2}, "/api/users"),
+])
+def test_http_routing_key(mock_config, hash_key, expected):
+    """Test extracting the consistent-hash routing key from a request."""
+    mock_config.load_balance.hash_key = HashKey(**hash_key)
+    lb = LoadBalancer(mock_config)
+
+    request = MagicMock(spec=web.Request)
+    request.remote = "10.1.2.3"
+    request.headers = {"X-User": "alice"}
+    request.cookies = {"session": "abc"}
+    request.path = "/api/users/42/profile"
+
+    assert lb._http_routing_key(request) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("engine", ["protocol", "stream", "splice"])
+async def test_tcp_relay_engines(engine, make_config):
+    """Test that both TCP relay engines forward data both ways and propagate half-close."""
+    from async_flow.relay import SPLICE_AVAILABLE
+
+    if engine == "splice" and not SPLICE_AVAILABLE:
+        pytest.skip("os.splice is not available")
+
+    async def echo(reader, writer):
+        writer.write(await reader.read())
+        await writer.drain()
+        writer.close()
+
+    backend = await asyncio.start_server(echo, "127.0.0.1", 0)
+    backend_port = backend.sockets[0].getsockname()[1]
+    lb = LoadBalancer(make_config(
+        [backend_port], "tcp", proxy={"tcp_relay": engine, "chunk_size": 4096}, metrics={"enabled": True}
+    ))
+    listen_port = lb.config.listen.port
+    serving = asyncio.create_task(lb.start_tcp_server())
+
+    payload = b"y" * (512 * 1024)
+    try:
+        for _ in range(50):
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", listen_port)
+                break
+            except ConnectionRefusedError:
+                await asyncio.sleep(0.02)
+        writer.write(payload)
+        writer.write_eof()
+        assert await asyncio.wait_for(reader.read(), timeout=5) == payload
+        writer.close()
+        # Let the relay finish its bookkeeping
+        for _ in range(50):
+            if not lb.stats["active"]:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        serving.cancel()
+        await asyncio.gather(serving, return_exceptions=True)
+        backend.close()
+        await backend.wait_closed()
+    assert lb.stats["errors"] == 0
+    metrics = lb.metrics.backend(lb.server_pool.get_all_servers()[0])
+    assert (metrics.bytes_upstream, metrics.bytes_downstream) == (len(payload), len(payload))
@@ -0,0 +1,96 @@
+import logging
+import threading
+
+import pytest
+from aiohttp.test_utils import make_mocked_request
+
+from async_flow.access_log import AccessLog
+from async_flow.core import LoadBalancer
+from async_flow.logger import set_log_level, setup_logging, stop_logging, use_worker_log_file
+from async_flow.models.config import LoadBalancerConfig, Logging
+
+
+@pytest.fixture
+def root_level():
+    level = logging.getLogger().level
+    yield
+    stop_logging()
+    logging.getLogger().setLevel(level)
+
+
+def test_records_are_written_by_the_listener_thread(tmp_path, root_level):
+    setup_logging(log_level="INFO", log_dir=str(tmp_path), log_file="lb.log")
+    threads = []
+
+    class Probe(logging.Filter):
+        def filter(self, record):
+            threads.append(threading.current_thread())
+            return True
+
+    queue_handler = next(h for h in logging.getLogger().handlers if hasattr(h, "queue"))
+    logger = logging.getLogger("Probe")
+    logger.info("relayed %d bytes", 42)
+    logger.debug("filtered out")
+    set_log_level("DEBUG")
+    logger.debug("now visible")
+
+    # Attach the probe to the output handlers through the listener
+    from async_flow import logger as logger_module
+    for handler in logger_module._listener.handlers:
+        handler.addFilter(Probe())
+    logger.warning("probed")
+    stop_logging()
+
+    contents = (tmp_path / "lb.log").read_text()
+    assert "relayed 42 bytes" in contents
+    assert "filtered out" not in contents
+    assert "now visible" in contents
+    assert queue_handler not in logging.getLogger().handlers
+    assert threads and all(thread is not threading.main_thread() for thread in threads)
+
+
+def test_workers_write_their_own_log_file(tmp_path, root_level):
+    setup_logging(log_level="INFO", log_dir=str(tmp_path), log_file="lb.log")
+    logger = logging.getLogger("Probe")
+    logger.info("from the supervisor")
+
+    use_worker_log_file(3)
+    logger.info("from worker 3")
+    stop_logging()
+
+    # Rotation of one file by several processes would lose records
+    assert (tmp_path / "lb.log").read_text().count("Probe") == 1
+    assert "from worker 3" in (tmp_path / "lb.worker-3.log").read_text()
+
+
+def test_access_log_sampling():
+    assert not AccessLog(Logging(access_log=False)).sampled()
+    assert not AccessLog(Logging(access_log_sample_rate=0)).sampled()
+
+    access_log = AccessLog(Logging(access_log_sample_rate=0.25))
+    access_log.logger.setLevel(logging.INFO)
+    share = sum(access_log.sampled() for _ in range(4000)) / 4000
+    assert share == pytest.approx(0.25, abs=0.05)
+
+    access_log.logger.setLevel(logging.WARNING)
+    assert not AccessLog(Logging()).sampled()
+    access_log.logger.setLevel(logging.NOTSET)
+
+
+@pytest.mark.asyncio
+async def test_http_request_writes_structured_access_record(caplog):
+    lb = LoadBalancer(LoadBalancerConfig(
+        listen={"host": "127.0.0.1", "port": 8080, "protocol": "http"},
+        health_check={"interval": 5, "timeout": 2, "path": "/health"},
+        load_balance={"algorithms": "round_robin", "servers": [{"host": "127.0.0.1", "port": 9000, "weight": 1, "healthy": False}]},
+    ))
+
+    with caplog.at_level(logging.INFO, logger="AccessLog"):
+        response = await lb.handle_http_request(make_mocked_request("GET", "/items?page=2"))
+
+    assert response.status == 503
+    record = next(record for record in caplog.records if record.name == "AccessLog")
+    assert record.access["method"] == "GET"
+    assert record.access["target"] == "/items?page=2"
+    assert record.access["status"] == 503
+    assert '"GET /items?page=2" 503 -' in record.getMessage()
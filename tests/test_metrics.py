@@ -0,0 +1,74 @@
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer, make_mocked_request
+
+from async_flow.core import LoadBalancer
+from async_flow.health import HealthCheck
+from async_flow.metrics import Histogram, Metrics
+from async_flow.models.config import HealthCheck as HealthCheckConfig, Metrics as MetricsConfig, Server
+from async_flow.server_pool import ServerPool
+
+
+def test_histogram_buckets():
+    histogram = Histogram([0.01, 0.1, 1.0])
+    for value in (0.005, 0.01, 0.05, 0.5, 3.0):
+        histogram.observe(value)
+
+    # Upper bounds are inclusive, like Prometheus' le
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(3.565)
+
+
+@pytest.mark.asyncio
+async def test_health_transitions_are_counted():
+    server = Server(host="127.0.0.1", port=9000, weight=1)
+    metrics = Metrics(MetricsConfig(enabled=True))
+    health_check = HealthCheck(ServerPool([server]), HealthCheckConfig(interval=5, timeout=1), metrics=metrics)
+
+    await health_check.mark_unhealthy(server)
+    await health_check.mark_unhealthy(server)
+    await health_check.mark_healthy(server)
+
+    backend = metrics.backend(server)
+    assert (backend.became_unhealthy, backend.became_healthy) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_backend_metrics(free_port, make_config):
+    async def handler(request):
+        return web.Response(status=int(request.query.get("status", 200)))
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    backend = TestServer(app)
+    await backend.start_server()
+    label = f'backend="127.0.0.1:{backend.port}"'
+
+    admin_port = free_port()
+    lb = LoadBalancer(make_config(
+        [backend.port], algorithm="least_connections", metrics={"enabled": True, "port": admin_port}
+    ))
+    await lb.upstream_pool.start()
+    await lb.metrics.start(lb)
+    try:
+        for query in ("/", "/", "/?status=503"):
+            await lb.handle_http_request(make_mocked_request("GET", query))
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{admin_port}/metrics") as resp:
+                assert resp.status == 200
+                assert resp.headers["Content-Type"].startswith("text/plain")
+                text = await resp.text()
+    finally:
+        await lb.metrics.close()
+        await lb.upstream_pool.close()
+        await backend.close()
+
+    assert "asyncflow_requests_total 3" in text
+    assert f"asyncflow_backend_requests_total{{{label}}} 3" in text
+    assert f'asyncflow_backend_errors_total{{{label},class="http_5xx"}} 1' in text
+    assert f"asyncflow_backend_in_flight{{{label}}} 0" in text
+    assert f'asyncflow_backend_latency_seconds_bucket{{{label},le="+Inf"}} 3' in text
+    assert f"asyncflow_backend_latency_seconds_count{{{label}}} 3" in text
@@ -0,0 +1,79 @@
+import pytest
+from unittest.mock import patch
+
+from async_flow.health import HealthCheck
+from async_flow.models.config import HealthCheck as HealthCheckConfig, OutlierDetection, Server
+from async_flow.outlier import OutlierDetector
+from async_flow.server_pool import ServerPool
+
+
+@pytest.fixture
+def servers():
+    return [Server(host="127.0.0.1", port=9000 + i, weight=1) for i in range(4)]
+
+
+@pytest.mark.asyncio
+async def test_consecutive_errors_eject_backend(servers):
+    pool = ServerPool(servers)
+    detector = OutlierDetector(OutlierDetection(enabled=True, consecutive_errors=3, max_ejection_percent=50), pool)
+
+    for _ in range(2):
+        await detector.record_failure(servers[0], "ClientConnectorError")
+    detector.record_success(servers[0])
+    for _ in range(2):
+        await detector.record_failure(servers[0], "HTTP 503")
+    assert servers[0].healthy
+
+    await detector.record_failure(servers[0], "HTTP 503")
+    assert not servers[0].healthy
+    assert servers[0] not in pool.get_healthy_servers()
+    assert detector.is_ejected(servers[0])
+
+
+@pytest.mark.asyncio
+async def test_failure_rate_ejects_backend(servers):
+    pool = ServerPool(servers)
+    config = OutlierDetection(enabled=True, consecutive_errors=100, failure_rate=0.5, min_requests=10, max_ejection_percent=50)
+    detector = OutlierDetector(config, pool)
+
+    for _ in range(5):
+        detector.record_success(servers[1])
+        await detector.record_failure(servers[1], "TimeoutError")
+
+    assert not servers[1].healthy
+
+
+@pytest.mark.asyncio
+async def test_max_ejection_percent_is_respected(servers):
+    pool = ServerPool(servers)
+    detector = OutlierDetector(OutlierDetection(enabled=True, consecutive_errors=1, max_ejection_percent=25), pool)
+
+    await detector.record_failure(servers[0], "HTTP 500")
+    await detector.record_failure(servers[1], "HTTP 500")
+
+    assert not servers[0].healthy
+    assert servers[1].healthy
+
+
+@pytest.mark.asyncio
+async def test_active_check_reinstates_only_after_ejection_time(servers):
+    pool = ServerPool(servers)
+    config = OutlierDetection(enabled=True, consecutive_errors=1, base_ejection_time=30, max_ejection_percent=50)
+    detector = OutlierDetector(config, pool)
+    health_check = HealthCheck(pool, HealthCheckConfig(interval=1, timeout=1), outlier_detector=detector)
+
+    with patch("async_flow.outlier.time.monotonic", return_value=1000.0):
+        await detector.record_failure(servers[0], "HTTP 500")
+        await health_check.mark_healthy(servers[0])
+        assert not servers[0].healthy
+
+    with patch("async_flow.outlier.time.monotonic", return_value=1031.0):
+        await health_check.mark_healthy(servers[0])
+        assert servers[0].healthy
+        assert not detector.is_ejected(servers[0])
+
+        # A repeat offender is ejected for twice as long
+        await detector.record_failure(servers[0], "HTTP 500")
+
+    with patch("async_flow.outlier.time.monotonic", return_value=1031.0 + 59):
+        assert detector.is_ejected(servers[0])
@@ -0,0 +1,236 @@
+import asyncio
+import socket
+import struct
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from pydantic import ValidationError
+
+from async_flow.core import LoadBalancer
+from async_flow.models.config import Server
+from async_flow.passthrough import BodyFramer, HttpProtocolError, UpstreamProtocol, parse_request_head
+
+
+def test_chunked_framer_finds_the_end_across_reads():
+    body = b"4;ext=1\r\nWiki\r\n5\r\npedia\r\n0\r\nX-Trailer: 1\r\n\r\nGET / HTTP/1.1\r\n"
+    for split in range(1, len(body)):
+        framer = BodyFramer(chunked=True)
+        assert framer.feed(body[:split]) == split or framer.done
+        if not framer.done:
+            assert framer.feed(body, split) == body.index(b"GET")
+        assert framer.done
+
+    framer = BodyFramer(length=5)
+    assert framer.feed(b"abc") == 3 and not framer.done
+    assert framer.feed(b"xxdeGET", 2) == 4 and framer.done
+
+
+_CHUNKED = b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+
+
+@pytest.mark.parametrize("head, body, status", [
+    (b"POST / HTTP/1.1\r\nContent-Length: 3\r\nTransfer-Encoding: chunked\r\n\r\n", b"", 400),
+    (b"POST / HTTP/1.1\r\nContent-Length: 3\r\nContent-Length: 4\r\n\r\n", b"", 400),
+    (b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked, gzip\r\n\r\n", b"", 400),
+    (b"GET / HTTP/1.1\r\nHost : example\r\n\r\n", b"", 400),
+    # Bare LF or CR inside the head would let a backend see a different set of headers
+    (b"POST / HTTP/1.1\r\nX: y\nTransfer-Encoding: chunked\r\nContent-Length: 4\r\n\r\n", b"", 400),
+    (b"POST / HTTP/1.1\r\nX: y\rContent-Length: 4\r\n\r\n", b"", 400),
+    (b"GET / HTTP/1.1\nHost: example\r\n\r\n", b"", 400),
+    # Folded lines: a backend may unfold this into a Transfer-Encoding header
+    (b"POST / HTTP/1.1\r\nHost: a\r\nContent-Length: 5\r\n Transfer-Encoding: chunked\r\n\r\n", b"", 400),
+    (b"POST / HTTP/1.1\r\nHost: a\r\nContent-Length: 5\r\n\tTransfer-Encoding: chunked\r\n\r\n", b"", 400),
+    # Chunk sizes int(..., 16) would accept but a backend may read differently
+    (_CHUNKED, b"0x5\r\nhello\r\n0\r\n\r\n", 400),
+    (_CHUNKED, b"1_0\r\n", 400),
+    (_CHUNKED, b"+5\r\nhello\r\n0\r\n\r\n", 400),
+    (_CHUNKED, b" 5\r\nhello\r\n0\r\n\r\n", 400),
+    (_CHUNKED, b"5 ;ext\r\nhello\r\n0\r\n\r\n", 400),
+    (_CHUNKED, b"5\nhello\r\n0\r\n\r\n", 400),
+    # Chunk data must be followed by exactly CRLF
+    (_CHUNKED, b"3\r\nabcXY\r\n0\r\n\r\n", 400),
+    (_CHUNKED, b"3\r\nabc\n0\r\n\r\n", 400),
+    (b"GET / HTTP/1.1\r\nConnection: Upgrade\r\nUpgrade: websocket\r\n\r\n", b"", 501),
+    (b"GET / HTTP/2.0\r\n\r\n", b"", 505),
+])
+def test_ambiguous_or_unsupported_requests_are_refused(head, body, status):
+    # Bodies are fed in two reads at every split point, so partial lines are covered too
+    for split in range(len(body) or 1):
+        with pytest.raises(HttpProtocolError) as error:
+            framer = parse_request_head(head).framer
+            framer.feed(body[:split])
+            framer.feed(body, split)
+        assert error.value.status == status
+
+
+@pytest.mark.parametrize("length", [b"-1", b"+5", b"1_0", b"5, 6", b"5\r\nContent-Length: 6"])
+def test_invalid_response_content_length_is_a_bad_gateway(length):
+    upstream = UpstreamProtocol(Server(host="127.0.0.1", port=9000, weight=1))
+    with pytest.raises(HttpProtocolError) as error:
+        upstream._parse_head(b"HTTP/1.1 200 OK\r\nContent-Length: " + length)
+    assert error.value.status == 502
+
+
+def test_request_head_framing_and_keep_alive():
+    head = parse_request_head(
+        b"POST /a?b HTTP/1.0\r\nConnection: keep-alive\r\nContent-Length: 2\r\nX-Key: abc\r\n\r\n", frozenset({b"x-key"})
+    )
+    assert head.method == b"POST" and head.target == b"/a?b" and head.keep_alive
+    assert head.framer.remaining == 2 and head.header(b"x-key") == "abc"
+    head = parse_request_head(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert not head.keep_alive and head.framer is None
+
+
+def test_passthrough_rejects_features_it_cannot_serve(make_config):
+    with pytest.raises(ValidationError):
+        make_config([9000], proxy={"http_engine": "passthrough"}, cache={"enabled": True})
+
+
+async def _start(lb):
+    await lb.upstream_pool.start()
+    serving = asyncio.create_task(lb.start_http_server())
+    for _ in range(50):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", lb.config.listen.port)
+            writer.close()
+            return serving
+        except ConnectionRefusedError:
+            await asyncio.sleep(0.02)
+
+
+async def _exchange(port, data):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    writer.write_eof()
+    try:
+        return await asyncio.wait_for(reader.read(), timeout=5)
+    finally:
+        writer.close()
+
+
+@pytest.mark.asyncio
+async def test_pipelined_requests_with_bodies_share_pooled_connections(make_config):
+    async def echo(request):
+        body = await request.read()
+        return web.Response(text=f"{request.method} {request.path_qs} {body.decode()}")
+
+    backend_app = web.Application()
+    backend_app.router.add_route("*", "/{tail:.*}", echo)
+    backend = TestServer(backend_app)
+    await backend.start_server()
+    lb = LoadBalancer(make_config([backend.port], proxy={"http_engine": "passthrough"}))
+    serving = await _start(lb)
+
+    try:
+        reply = await _exchange(lb.config.listen.port, (
+            b"GET /a?x=1 HTTP/1.1\r\nHost: lb\r\n\r\n"
+            b"POST /b HTTP/1.1\r\nHost: lb\r\nContent-Length: 5\r\n\r\nhello"
+            b"PUT /c HTTP/1.1\r\nHost: lb\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n"
+            b"HEAD /d HTTP/1.1\r\nHost: lb\r\n\r\n"
+            b"GET /e HTTP/1.1\r\nHost: lb\r\n\r\n"
+        ))
+        assert reply.count(b"HTTP/1.1 200 OK") == 5
+        bodies = [part.split(b"\r\n\r\n", 1)[1] for part in reply.split(b"HTTP/1.1 ")[1:]]
+        assert bodies == [b"GET /a?x=1 ", b"POST /b hello", b"PUT /c abcde", b"", b"GET /e "]
+        assert lb.stats["requests"] == 5 and lb.stats["errors"] == 0
+        # One backend connection served the whole pipeline and went back to the pool
+        assert [len(idle) for idle in lb.passthrough_pool._idle.values()] == [1]
+        assert next(iter(lb.passthrough_pool._idle.values()))[0].requests == 5
+    finally:
+        await lb.shutdown()
+        await serving
+        await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_reused_connection_closed_by_the_backend_is_retried(make_config):
+    connections = []
+
+    async def one_request_per_connection(reader, writer):
+        # Answers the first request as keep-alive, then drops the connection on the next
+        connections.append(writer)
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        await reader.readuntil(b"\r\n\r\n")
+        writer.close()
+
+    backend = await asyncio.start_server(one_request_per_connection, "127.0.0.1", 0)
+    lb = LoadBalancer(make_config([backend.sockets[0].getsockname()[1]], proxy={"http_engine": "passthrough"}))
+    serving = await _start(lb)
+
+    try:
+        for _ in range(3):
+            reply = await _exchange(lb.config.listen.port, b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+            assert reply.startswith(b"HTTP/1.1 200 OK") and reply.endswith(b"ok")
+        # Nothing was relayed before the connection dropped, so the retry is not a failed attempt
+        assert len(connections) == 3 and lb.stats["errors"] == 0 and lb.stats["retries"] == 0
+    finally:
+        await lb.shutdown()
+        await serving
+        backend.close()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_or_missing_backends_get_an_error_response(free_port, make_config):
+    lb = LoadBalancer(make_config([free_port()], proxy={"http_engine": "passthrough"}, retry={"max_attempts": 1}))
+    serving = await _start(lb)
+
+    try:
+        reply = await _exchange(lb.config.listen.port, b"GET / HTTP/1.1\r\n\r\n")
+        assert reply.startswith(b"HTTP/1.1 502 Bad Gateway")
+        await lb.server_pool.mark_unhealthy(lb.server_pool.get_all_servers()[0])
+        reply = await _exchange(lb.config.listen.port, b"GET / HTTP/1.1\r\n\r\n")
+        assert reply.startswith(b"HTTP/1.1 503 Service Unavailable")
+        reply = await _exchange(lb.config.listen.port, b"GET / HTTP/1.1\r\nContent-Length: 1\r\nTransfer-Encoding: chunked\r\n\r\n")
+        assert reply.startswith(b"HTTP/1.1 400 Invalid Transfer-Encoding")
+        assert lb.stats["errors"] == 2
+    finally:
+        await lb.shutdown()
+        await serving
+
+
+@pytest.mark.asyncio
+async def test_client_reset_mid_request_does_not_blame_the_backend(make_config):
+    hits = []
+    started = asyncio.Event()
+
+    async def slow(request):
+        hits.append(request.path)
+        started.set()
+        await asyncio.sleep(1)
+        return web.Response(text="late")
+
+    backends = []
+    for _ in range(2):
+        backend_app = web.Application()
+        backend_app.router.add_get("/", slow)
+        backend = TestServer(backend_app)
+        await backend.start_server()
+        backends.append(backend)
+    lb = LoadBalancer(make_config(
+        [backend.port for backend in backends], proxy={"http_engine": "passthrough"},
+        outlier_detection={"enabled": True, "consecutive_errors": 1, "max_ejection_percent": 100}
+    ))
+    serving = await _start(lb)
+
+    try:
+        _, writer = await asyncio.open_connection("127.0.0.1", lb.config.listen.port)
+        writer.write(b"GET / HTTP/1.1\r\nHost: lb\r\n\r\n")
+        await asyncio.wait_for(started.wait(), timeout=5)
+        # A zero linger time makes the close a reset
+        writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        writer.transport.abort()
+        for _ in range(50):
+            if lb.stats["active"] == 0:
+                break
+            await asyncio.sleep(0.02)
+
+        assert lb.stats["active"] == 0 and lb.stats["retries"] == 0 and lb.stats["errors"] == 0
+        assert len(hits) == 1
+        assert not any(lb.outlier_detector.is_ejected(server) for server in lb.server_pool.get_all_servers())
+    finally:
+        await lb.shutdown()
+        await serving
+        for backend in backends:
+            await backend.close()
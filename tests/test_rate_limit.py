@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from async_flow.core import LoadBalancer
+from async_flow.models.config import RateLimit
+from async_flow.ratelimit import RateLimiter
+
+
+def test_bucket_allows_burst_then_refills_at_rate():
+    limiter = RateLimiter(RateLimit(enabled=True, rate=10, burst=3))
+    with patch("async_flow.ratelimit.time.monotonic", return_value=100.0):
+        assert [limiter.allow("10.0.0.1") for _ in range(4)] == [True, True, True, False]
+        # Other clients have their own bucket, clients without a key are not limited
+        assert limiter.allow("10.0.0.2") and limiter.allow(None)
+    with patch("async_flow.ratelimit.time.monotonic", return_value=100.15):
+        assert [limiter.allow("10.0.0.1") for _ in range(2)] == [True, False]
+    with patch("async_flow.ratelimit.time.monotonic", return_value=200.0):
+        # An idle client's bucket refills up to the burst, no further
+        assert [limiter.allow("10.0.0.1") for _ in range(4)] == [True, True, True, False]
+
+
+def test_table_is_bounded_and_drops_the_longest_idle_client():
+    limiter = RateLimiter(RateLimit(enabled=True, rate=1, burst=1, max_clients=1000))
+    with patch("async_flow.ratelimit.time.monotonic", return_value=100.0):
+        assert limiter.allow("busy") and not limiter.allow("busy")
+        for i in range(100_000):
+            limiter.allow(f"10.{i >> 16}.{(i >> 8) & 255}.{i & 255}")
+            if i % 500 == 0:
+                assert not limiter.allow("busy")
+
+    assert len(limiter) == 1000 and len(limiter._tokens) == 1000
+    # The busy client was seen recently enough to keep its empty bucket
+    assert "busy" in limiter._slots and "10.0.0.0" not in limiter._slots
+
+
+@pytest.mark.asyncio
+async def test_http_clients_over_the_limit_get_429(make_config):
+    async def hello(request):
+        return web.Response(text="hello")
+
+    backend_app = web.Application()
+    backend_app.router.add_get("/", hello)
+    backend = TestServer(backend_app)
+    await backend.start_server()
+    lb = LoadBalancer(make_config([backend.port], rate_limit={"enabled": True, "rate": 0.001, "burst": 2, "header": "X-API-Key"}))
+    await lb.upstream_pool.start()
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', lb.handle_http_request)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+
+    try:
+        statuses = [(await client.get("/", headers={"X-API-Key": "alice"})).status for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        # Keyed by the header, so another key from the same address is still served
+        assert (await client.get("/", headers={"X-API-Key": "bob"})).status == 200
+        assert lb.stats["rate_limited"] == 1 and lb.stats["requests"] == 3
+    finally:
+        await client.close()
+        await backend.close()
+        await lb.upstream_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_tcp_connections_over_the_limit_are_closed(make_config):
+    async def greet(reader, writer):
+        writer.write(b"hello")
+        await writer.drain()
+        writer.close()
+
+    backend = await asyncio.start_server(greet, "127.0.0.1", 0)
+    lb = LoadBalancer(make_config([backend.sockets[0].getsockname()[1]], "tcp", rate_limit={"enabled": True, "rate": 0.001, "burst": 1}))
+    serving = asyncio.create_task(lb.start_tcp_server())
+
+    try:
+        replies = []
+        for _ in range(2):
+            for _ in range(50):
+                try:
+                    reader, writer = await asyncio.open_connection("127.0.0.1", lb.config.listen.port)
+                    break
+                except ConnectionRefusedError:
+                    await asyncio.sleep(0.02)
+            replies.append(await asyncio.wait_for(reader.read(), timeout=5))
+            writer.close()
+        assert replies == [b"hello", b""]
+        assert lb.stats["rate_limited"] == 1
+    finally:
+        serving.cancel()
+        await asyncio.gather(serving, return_exceptions=True)
+        backend.close()
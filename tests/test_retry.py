@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer, make_mocked_request
+from unittest.mock import patch
+
+from async_flow.core import LoadBalancer
+from async_flow.models.config import Retry
+from async_flow.retry import RetryPolicy
+
+
+def test_retry_policy_caps_attempts_and_checks_methods():
+    policy = RetryPolicy(Retry(max_attempts=3, min_retries=100))
+
+    assert policy.allows(attempts=1, candidates=5, connect_phase=True, idempotent=False)
+    assert policy.allows(attempts=2, candidates=5, connect_phase=False, idempotent=True)
+    assert not policy.allows(attempts=3, candidates=5, connect_phase=True, idempotent=True)
+    assert not policy.allows(attempts=2, candidates=2, connect_phase=True, idempotent=True)
+    assert not policy.allows(attempts=1, candidates=5, connect_phase=False, idempotent=False)
+    assert policy.is_idempotent("GET") and not policy.is_idempotent("POST")
+
+
+def test_retry_budget_limits_retries_to_share_of_traffic():
+    policy = RetryPolicy(Retry(max_attempts=5, budget_percent=10, min_retries=2))
+
+    # Low traffic: the floor still allows a couple of retries
+    assert policy.allows(1, 5, True, True)
+    assert policy.allows(1, 5, True, True)
+    assert not policy.allows(1, 5, True, True)
+
+    for _ in range(100):
+        policy.record_request()
+    granted = sum(policy.allows(1, 5, True, True) for _ in range(50))
+    assert granted == 8  # 10% of 100 requests, 2 already spent
+
+    # The previous window's retries fade out as it slides past
+    with patch("async_flow.retry.time.monotonic", return_value=policy._window_start + 25):
+        assert policy.allows(1, 5, True, True)
+
+
+@pytest.mark.asyncio
+async def test_http_request_fails_over_to_next_backend(free_port, make_config):
+    async def ok(request):
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/", ok)
+    backend = TestServer(app)
+    await backend.start_server()
+
+    lb = LoadBalancer(make_config([free_port(), backend.port]))
+    await lb.upstream_pool.start()
+    try:
+        for _ in range(2):
+            response = await lb.handle_http_request(make_mocked_request("GET", "/"))
+            assert response.status == 200
+        assert lb.stats["retries"] == 1
+        assert lb.stats["errors"] == 0
+    finally:
+        await lb.upstream_pool.close()
+        await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_http_request_is_not_retried_when_disabled(free_port, make_config):
+    lb = LoadBalancer(make_config([free_port(), free_port()], retry={"max_attempts": 1}))
+    await lb.upstream_pool.start()
+    try:
+        response = await lb.handle_http_request(make_mocked_request("GET", "/"))
+        assert response.status == 502
+        assert lb.stats["retries"] == 0
+    finally:
+        await lb.upstream_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_tcp_connection_fails_over_to_next_backend(free_port, make_config):
+    async def greet(reader, writer):
+        writer.write(b"hello")
+        await writer.drain()
+        writer.close()
+
+    backend = await asyncio.start_server(greet, "127.0.0.1", 0)
+    lb = LoadBalancer(make_config([free_port(), backend.sockets[0].getsockname()[1]], "tcp"))
+
+    async def connect(server):
+        return await asyncio.open_connection(server.host, server.port)
+
+    received = []
+
+    async def relay(upstream):
+        reader, writer = upstream
+        received.append(await reader.read())
+        writer.close()
+        return 0, len(received[0])
+
+    async def close():
+        pass
+
+    try:
+        await lb._forward_tcp(("127.0.0.1", 50000), connect, relay, close)
+        assert received == [b"hello"]
+        assert lb.stats["retries"] == 1
+        assert lb.stats["errors"] == 0
+    finally:
+        backend.close()
+        await backend.wait_closed()
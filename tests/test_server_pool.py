@@ -0,0 +1,48 @@
+import pytest
+
+from async_flow.models.config import Server
+from async_flow.server_pool import ServerPool
+
+
+@pytest.fixture
+def servers():
+    return [
+        Server(host="127.0.0.1", port=9000, weight=1),
+        Server(host="127.0.0.2", port=9001, weight=1),
+        Server(host="127.0.0.3", port=9002, weight=1, healthy=False)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_healthy_snapshot_is_cached_until_state_flips(servers):
+    pool = ServerPool(servers)
+    snapshot = pool.get_healthy_servers()
+
+    assert isinstance(snapshot, tuple)
+    assert list(snapshot) == servers[:2]
+    assert pool.get_healthy_servers() is snapshot
+
+    # Marking an already healthy server is a no-op
+    assert await pool.mark_healthy(servers[0]) is False
+    assert pool.get_healthy_servers() is snapshot
+
+    assert await pool.mark_unhealthy(servers[0]) is True
+    updated = pool.get_healthy_servers()
+    assert updated is not snapshot
+    assert list(updated) == [servers[1]]
+    assert updated.version > snapshot.version
+
+
+@pytest.mark.asyncio
+async def test_membership_changes_bump_version(servers):
+    pool = ServerPool(servers[:1])
+    version = pool.version
+
+    await pool.add_server(servers[1])
+    assert pool.version == version + 1
+    assert servers[1] in pool.get_healthy_servers()
+
+    await pool.remove_server(servers[0])
+    assert pool.version == version + 2
+    assert list(pool.get_healthy_servers()) == [servers[1]]
+    assert pool.get_healthy_servers().version == pool.version
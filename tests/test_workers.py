@@ -0,0 +1,60 @@
+import pytest
+import yaml
+
+from async_flow.config import Config
+from async_flow.core import LoadBalancer
+from async_flow.models.config import LoadBalancerConfig
+from async_flow.workers import WorkerSupervisor
+
+
+@pytest.fixture
+def mock_config():
+    return LoadBalancerConfig(
+        listen={"host": "127.0.0.1", "port": 8080, "protocol": "tcp"},
+        health_check={"interval": 10, "timeout": 2, "path": "/health"},
+        load_balance={
+            "algorithms": "round_robin",
+            "servers": [{"host": "127.0.0.1", "port": 9000, "weight": 1}]
+        }
+    )
+
+
+def test_workers_bind_with_reuse_port(mock_config):
+    supervisor = WorkerSupervisor(mock_config, workers=2)
+
+    assert supervisor.config.listen.reuse_port is True
+    # The caller's config is left untouched
+    assert mock_config.listen.reuse_port is False
+
+
+def test_aggregate_stats_sums_worker_slots(mock_config):
+    supervisor = WorkerSupervisor(mock_config, workers=3)
+    fields = LoadBalancer.STAT_FIELDS
+    for slot in range(3):
+        for offset, _ in enumerate(fields):
+            supervisor._stats[slot * len(fields) + offset] = slot + 1
+
+    assert supervisor.aggregate_stats() == dict.fromkeys(fields, 6)
+
+
+def test_rejects_zero_workers(mock_config):
+    with pytest.raises(ValueError):
+        WorkerSupervisor(mock_config, workers=0)
+
+
+def test_supervisor_reload_keeps_worker_settings(mock_config, tmp_path):
+    path = tmp_path / "config.yaml"
+    raw = mock_config.model_dump(include={"listen", "health_check", "load_balance"})
+    path.write_text(yaml.dump(raw))
+    config_loader = Config(target_file=str(path), is_yaml=True)
+    supervisor = WorkerSupervisor(mock_config, workers=2, config_loader=config_loader)
+
+    raw["load_balance"]["servers"].append({"host": "127.0.0.1", "port": 9001, "weight": 2})
+    path.write_text(yaml.dump(raw))
+    assert supervisor._file_changed()
+    supervisor._reload()
+
+    # Restarted workers get the new servers, still on the shared listener
+    assert [s.port for s in supervisor.config.load_balance.servers] == [9000, 9001]
+    assert supervisor.config.listen.reuse_port is True
+    assert not supervisor._file_changed()